@@ -6,11 +6,17 @@ FastAPI后端API服务器
 import sys
 import os
 import time
+import asyncio
 import json
 import random
 import uuid
+import gzip
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pydantic import BaseModel
 
 # 添加mABC模块路径
@@ -24,16 +30,39 @@ if os.path.exists(mabc_path):
     if parent_dir not in sys.path:
         sys.path.insert(0, parent_dir)
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只提供 gzip
+    brotli = None
 
 # mABC Core Imports
 from core.vm import blockchain
-from core.types import Transaction, Block, calculate_hash, get_merkle_root
+from core.types import Transaction, Block, MerkleTree, calculate_hash, get_merkle_root, transaction_leaf_hash
 from core.state import world_state
 from core.client import ChainClient
-from contracts.ops_contract import ops_sop_contract
+from core.event_bus import event_bus
+from core.producer import BlockPolicy, BlockProducer
+from core.views import StateViews
+from core.tx_index import DEFAULT_PAGE_SIZE, parse_cursor
+from contracts.ops_contract import OpsSOPContract, ops_sop_contract
+from utils.run_manager import RunManager
+from utils.loop_monitor import EventLoopMonitor
+from settings import (
+    API_MAX_WORKERS,
+    BLOCK_MAX_GAS,
+    BLOCK_MAX_LATENCY,
+    BLOCK_MAX_TRANSACTIONS,
+    RUN_AGENTS_MAX_CONCURRENCY,
+)
 
 # Agent Imports
 from agents.base.profile import (
@@ -49,7 +78,156 @@ from agents.base.run import ReActTotRun
 from agents.base.dao_run import DAOExecutor
 from agents.tools import process_scheduler_tools
 
-app = FastAPI(title="mABC Blockchain API", version="1.0.0")
+# CPU 密集或需要等待区块链锁（出块期间被持有）的处理在有界线程池中执行，
+# 事件循环只负责调度与收发，一个慢请求不会拖住其他客户端（包括日志推送）
+api_executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS, thread_name_prefix="api-worker")
+_blocking_in_flight = 0
+loop_monitor = EventLoopMonitor()
+
+
+async def _run_blocking(func, *args):
+    """在 api_executor 中执行同步函数并等待结果"""
+    global _blocking_in_flight
+    _blocking_in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(api_executor, func, *args)
+    finally:
+        _blocking_in_flight -= 1
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应，未安装 orjson 时退回标准库"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+COMPRESSION_MIN_SIZE = 1024  # 小于该字节数的响应不压缩
+COMPRESSION_THREAD_SIZE = 256 * 1024  # 超过该字节数时在 api_executor 中压缩，避免阻塞事件循环
+GZIP_LEVEL = 4
+BROTLI_QUALITY = 4
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def _accepted_encodings(header: str) -> set:
+    """解析 Accept-Encoding，忽略 q=0 的编码"""
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    按 Accept-Encoding 压缩响应体：优先 br（需安装 brotli），否则 gzip
+    只压缩一次性发送且不小于 COMPRESSION_MIN_SIZE 的响应；
+    SSE 等流式响应（分多次发送）原样透传，不会被缓冲
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+        accepted = _accepted_encodings(accept)
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = start_message["headers"]
+            already_encoded = any(key == b"content-encoding" for key, _ in headers)
+            if message.get("more_body", False) or already_encoded or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= COMPRESSION_THREAD_SIZE:
+                body = await _run_blocking(_compress, body, encoding)
+            else:
+                body = _compress(body, encoding)
+            headers = [(key, value) for key, value in headers if key not in (b"content-length", b"vary")]
+            vary = [value for key, value in start_message["headers"] if key == b"vary"]
+            vary_value = b", ".join(vary + [b"Accept-Encoding"])
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", vary_value),
+            ]
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    loop_monitor.start()
+    # 交易由后台出块器按策略批量出块，而不是每笔交易单独出块
+    producer = BlockProducer(blockchain, BlockPolicy(
+        max_transactions=BLOCK_MAX_TRANSACTIONS,
+        max_gas=BLOCK_MAX_GAS,
+        max_latency=BLOCK_MAX_LATENCY,
+    )).start()
+    yield
+    # 停止前打包交易池中剩余的交易
+    await asyncio.get_running_loop().run_in_executor(api_executor, producer.stop)
+    await loop_monitor.stop()
+
+
+app = FastAPI(
+    title="mABC Blockchain API",
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
+
+# 压缩大响应（区块列表、交易详情等）
+app.add_middleware(CompressionMiddleware)
 
 # 配置CORS
 app.add_middleware(
@@ -62,16 +240,25 @@ app.add_middleware(
 
 
 # Response Models
-class BlockResponse(BaseModel):
+class BlockSummaryResponse(BaseModel):
     index: int
     hash: str
     previous_hash: str
     timestamp: float
     merkle_root: str
+    state_root: str = ""
     transaction_count: int
+
+
+class BlockResponse(BlockSummaryResponse):
     transactions: List[Dict[str, Any]]
 
 
+class BlockPageResponse(BaseModel):
+    blocks: List[Union[BlockResponse, BlockSummaryResponse]]
+    next_cursor: Optional[int]  # 下一页的 before 参数，已到创世区块时为 None
+
+
 class BlockchainInfoResponse(BaseModel):
     block_height: int
     pending_transactions: int
@@ -80,216 +267,227 @@ class BlockchainInfoResponse(BaseModel):
 
 
 class MerkleProofResponse(BaseModel):
+    block_index: int
+    tx_index: int
     transaction_hash: str
     merkle_root: str
     proof_path: List[Dict[str, Any]]
     verified: bool
 
 
-# DualOutput for capturing logs
-class DualOutput:
-    def __init__(self, original_stdout):
-        self.original_stdout = original_stdout
+class ProofLocation(BaseModel):
+    block_index: int
+    tx_index: int
 
-    def write(self, message):
-        self.original_stdout.write(message)
 
-        msg_str = str(message)
-        stripped = msg_str.strip()
+class ProofBatchRequest(BaseModel):
+    items: List[ProofLocation]
 
-        if not stripped:
-            return
 
-        # 1. 关键词过滤 (只允许 Thought, Action, Final Answer)
-        has_keyword = False
-        log_type = "info"
-
-        if "Final Answer:" in msg_str:
-            has_keyword = True
-            log_type = "answer"
-        elif "Action:" in msg_str or "Action Tool" in msg_str:
-            has_keyword = True
-            log_type = "action"
-        elif "Thought:" in msg_str:
-            has_keyword = True
-            log_type = "thought"
-        elif "奖励" in msg_str or "reward" in msg_str.lower():
-            has_keyword = True
-            log_type = "reward"
-
-        if not has_keyword:
-            return
+class AccountProofResponse(BaseModel):
+    address: str
+    account: Optional[Dict[str, Any]]
+    state_root: str
+    siblings: List[str]
+    leaf: Optional[Dict[str, str]]
+    block_number: int
+    block_state_root: str
+    verified: bool
 
-        # 2. 排除垃圾信息 (历史记录dump, 分割线)
-        if stripped.startswith("[{") or stripped.startswith("*"):
-            return
 
-        if log_type == "reward":
-            lower_msg = msg_str.lower()
-            if "transaction added to pending pool" in lower_msg:
-                return
-            is_full_reward = (
-                ("奖励发送" in msg_str)
-                and ("to=" in msg_str)
-                and ("token=" in msg_str)
-                and ("rep=" in msg_str)
-                and ("onchain_block=" in msg_str)
-            )
-            if not is_full_reward:
-                return
-            to_part = None
-            token_part = None
-            rep_part = None
-            block_part = None
-            try:
-                s = stripped
-                idx_to = s.find("to=")
-                idx_token = s.find("token=")
-                idx_rep = s.find("rep=")
-                idx_block = s.find("onchain_block=")
-                if (
-                    idx_to != -1
-                    and idx_token != -1
-                    and idx_rep != -1
-                    and idx_block != -1
-                ):
-                    to_part = s[idx_to + 3 : s.find(",", idx_to)]
-                    token_part = s[idx_token + 6 : s.find(",", idx_token)]
-                    rep_part = s[idx_rep + 4 : s.find(",", idx_rep)]
-                    end_block = s.find(",", idx_block)
-                    block_part = s[
-                        idx_block + 13 : end_block if end_block != -1 else len(s)
-                    ]
-            except Exception:
-                pass
-            if to_part and token_part and rep_part and block_part:
-                key = f"{to_part}:{token_part}:{rep_part}:{block_part}"
-                if not hasattr(app, "_recent_reward_keys"):
-                    app._recent_reward_keys = []
-                if key in app._recent_reward_keys:
-                    return
-                app._recent_reward_keys.append(key)
-                if len(app._recent_reward_keys) > 1000:
-                    app._recent_reward_keys = app._recent_reward_keys[-1000:]
-
-        # Init logs if not exists
-        if not hasattr(app, "agent_logs"):
-            app.agent_logs = []
-
-        # 3. 清理内容 (去除 A: 前缀)
-        content = stripped
-        if content.startswith("A: "):
-            content = content[3:].strip()
-
-        # Add to logs
-        app.agent_logs.append(
-            {
-                "id": str(uuid.uuid4()),
-                "type": "agent_log",
-                "log_type": log_type,
-                "content": content,
-                "timestamp": datetime.now().isoformat(),
-            }
-        )
+def _clear_events():
+    """清空事件总线，并通知推送通道的客户端清空已显示的事件"""
+    event_bus.clear()
+    event_bus.publish({"type": "reset", "timestamp": datetime.now().isoformat()})
+
+
+# 区块哈希 -> 交易列表；区块封装后不再变化，交易哈希只需计算一次
+TRANSACTION_CACHE_SIZE = 256
+_transaction_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+_transaction_cache_lock = threading.Lock()  # 在 api_executor 的多个线程中访问
+
+
+def _transaction_dicts(block: Block) -> List[Dict[str, Any]]:
+    """区块的交易列表（附带交易哈希），返回的列表由缓存共享，调用方不应修改"""
+    with _transaction_cache_lock:
+        cached = _transaction_cache.get(block.hash)
+        if cached is not None:
+            _transaction_cache.move_to_end(block.hash)
+            return cached
+
+    # 交易哈希即Merkle叶子哈希，直接取自出块时缓存的Merkle树
+    merkle_tree = blockchain.get_merkle_tree(block.header.index)
+    tx_list = []
+    for position, tx in enumerate(block.transactions):
+        tx_dict = tx.model_dump()
+        tx_dict["tx_hash"] = merkle_tree.leaf(position)
+        tx_list.append(tx_dict)
+    with _transaction_cache_lock:
+        _transaction_cache[block.hash] = tx_list
+        while len(_transaction_cache) > TRANSACTION_CACHE_SIZE:
+            _transaction_cache.popitem(last=False)
+    return tx_list
+
 
-        # Keep log size manageable
-        if len(app.agent_logs) > 1000:
-            app.agent_logs = app.agent_logs[-1000:]
+def _cache_headers(etag: str) -> Dict[str, str]:
+    # 区块封装后不再变化，但链可能被重置，客户端每次使用前用 ETag 重新验证
+    return {"ETag": etag, "Cache-Control": "no-cache"}
 
-    def flush(self):
-        self.original_stdout.flush()
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """客户端缓存的版本仍然有效（If-None-Match 命中）时返回 True"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag))
+
+
+# 物化视图的版本号在进程重启后从头计数，ETag 带上本进程的标识以免与重启前的版本混淆
+VIEWS_EPOCH = uuid.uuid4().hex[:8]
 
 
 # Routes
-@app.get("/api/blocks", response_model=List[BlockResponse])
-async def get_blocks(limit: int = 10, offset: int = 0):
+def _block_payload(summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {**summary, "transactions": _transaction_dicts(blockchain.chain[summary["index"]])}
+
+
+def _block_page(summaries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [_block_payload(summary) for summary in summaries]
+
+
+@app.get("/api/blocks", response_model=BlockPageResponse)
+async def get_blocks(
+    request: Request,
+    limit: int = 10,
+    before: Optional[int] = None,
+    include: Optional[str] = None,
+):
+    """
+    按高度倒序分页获取区块
+    默认只返回区块摘要（来自出块时预先计算的摘要缓存）；include=transactions 时附带完整交易
+    数据直接来自已封装的区块，跳过响应模型的再次校验，直接序列化；交易列表在 api_executor 中构建
+    """
     try:
-        chain = blockchain.chain
-        total_blocks = len(chain)
-        start = offset or 0
-        end = start + limit if limit else total_blockstx_js
-        blocks = chain[start:end]
-
-        result = []
-        for block in blocks:
-            tx_list = []
-            for tx in block.transactions:
-                tx_dict = tx.model_dump()
-                tx_json = str(sorted(tx_dict.items()))
-                tx_hash = calculate_hash(tx_json)
-                tx_dict["tx_hash"] = tx_hash
-                tx_list.append(tx_dict)
-
-            result.append(
-                BlockResponse(
-                    index=block.header.index,
-                    hash=block.hash,
-                    previous_hash=block.header.previous_hash,
-                    timestamp=block.header.timestamp,
-                    merkle_root=block.header.merkle_root,
-                    transaction_count=len(block.transactions),
-                    transactions=tx_list,
-                )
-            )
-
-        return result
+        with_transactions = include == "transactions"
+        summaries = blockchain.get_block_summaries(before, max(0, min(limit, 1000)))
+        next_cursor = summaries[-1]["index"] if summaries and summaries[-1]["index"] > 0 else None
+
+        # 页面内容完全由区块哈希决定，未变化时无需读取区块
+        etag_source = ",".join(summary["hash"] for summary in summaries)
+        etag = '"' + calculate_hash(f"{include}:{next_cursor}:{etag_source}") + '"'
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+
+        blocks = await _run_blocking(_block_page, summaries) if with_transactions else summaries
+        return FastJSONResponse({"blocks": blocks, "next_cursor": next_cursor}, headers=_cache_headers(etag))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/block/{index}", response_model=BlockResponse)
-async def get_block(index: int):
+async def get_block(index: int, request: Request):
     try:
         if index < 0 or index >= len(blockchain.chain):
             raise HTTPException(status_code=404, detail="Block not found")
 
-        block = blockchain.chain[index]
-
-        tx_list = []
-        for tx in block.transactions:
-            tx_dict = tx.model_dump()
-            tx_json = str(sorted(tx_dict.items()))
-            tx_hash = calculate_hash(tx_json)
-            tx_dict["tx_hash"] = tx_hash
-            tx_list.append(tx_dict)
-
-        return BlockResponse(
-            index=block.header.index,
-            hash=block.hash,
-            previous_hash=block.header.previous_hash,
-            timestamp=block.header.timestamp,
-            merkle_root=block.header.merkle_root,
-            transaction_count=len(block.transactions),
-            transactions=tx_list,
-        )
+        summary = blockchain.get_block_summary(index)
+        etag = f'"{summary["hash"]}"'
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+
+        payload = await _run_blocking(_block_payload, summary)
+        return FastJSONResponse(payload, headers=_cache_headers(etag))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _located_transaction(block_index: int, position: int) -> Dict[str, Any]:
+    block = blockchain.chain[block_index]
+    return {
+        **_transaction_dicts(block)[position],
+        "block_index": block.header.index,
+        "tx_index": position,
+        "block_hash": block.hash,
+    }
+
+
+def _find_transaction(tx_hash: str) -> Optional[Dict[str, Any]]:
+    """通过出块时写入的交易索引定位交易"""
+    location = blockchain.tx_index.lookup(tx_hash)
+    return _located_transaction(*location) if location else None
+
+
 @app.get("/api/transaction/{tx_hash}")
 async def get_transaction(tx_hash: str):
     try:
-        for block in blockchain.chain:
-            for tx in block.transactions:
-                tx_dict = tx.model_dump()
-                tx_json = str(sorted(tx_dict.items()))
-                calculated_hash = calculate_hash(tx_json)
-
-                if calculated_hash == tx_hash:
-                    tx_dict["tx_hash"] = calculated_hash
-                    tx_dict["block_index"] = block.header.index
-                    tx_dict["block_hash"] = block.hash
-                    return tx_dict
-
-        raise HTTPException(status_code=404, detail="Transaction not found")
+        tx_dict = await _run_blocking(_find_transaction, tx_hash)
+        if tx_dict is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return tx_dict
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+MAX_TRANSACTION_PAGE_SIZE = 200
+
+
+@app.get("/api/transactions")
+async def list_transactions(
+    sender: Optional[str] = None,
+    tx_type: Optional[str] = None,
+    proposal_id: Optional[str] = None,
+    target: Optional[str] = None,
+    last_blocks: Optional[int] = None,
+    before: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    """
+    按条件分页查询上链交易（条件之间为“与”，按区块高度、交易序号倒序），走交易二级索引
+    - tx_type 可用逗号分隔多个类型，如 penalty,slash
+    - proposal_id 查询对该提案的投票；target 查询奖励/惩罚/罚没的对象或转账的收款方
+    - last_blocks 只查询最近 N 个区块；before 为上一页返回的 next_cursor
+    - limit 超过 MAX_TRANSACTION_PAGE_SIZE 时按上限返回
+    """
+    try:
+        cursor = parse_cursor(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if last_blocks is not None and last_blocks < 1:
+        raise HTTPException(status_code=400, detail="last_blocks must be at least 1")
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    try:
+        types = [t.strip() for t in tx_type.split(",") if t.strip()] if tx_type else None
+        min_height = max(0, len(blockchain.chain) - last_blocks) if last_blocks is not None else None
+        page = await _run_blocking(
+            _transaction_page, sender, types, proposal_id, target, min_height, cursor,
+            min(limit, MAX_TRANSACTION_PAGE_SIZE),
+        )
+        return FastJSONResponse(page)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _transaction_page(sender, types, proposal_id, target, min_height, cursor, limit) -> Dict[str, Any]:
+    page = blockchain.tx_index.query(
+        sender=sender, tx_type=types, proposal_id=proposal_id, target=target,
+        min_height=min_height, before=cursor, limit=limit,
+    )
+    return {
+        "transactions": [_located_transaction(ref["block_index"], ref["tx_index"]) for ref in page["transactions"]],
+        "next_cursor": page["next_cursor"],
+    }
+
+
 @app.get("/api/blockchain/info", response_model=BlockchainInfoResponse)
 async def get_blockchain_info():
     try:
@@ -304,191 +502,204 @@ async def get_blockchain_info():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/health/loop")
+async def get_loop_health():
+    """
+    事件循环延迟（毫秒）与工作线程池占用
+    延迟持续升高说明有同步处理占住了事件循环
+    """
+    return {
+        "loop": loop_monitor.stats(),
+        "executor": {"max_workers": API_MAX_WORKERS, "in_flight": _blocking_in_flight},
+        "transaction_index": {"blocks": blockchain.tx_index.height},
+    }
+
+
 @app.get(
     "/api/merkle-proof/{block_index}/{tx_index}", response_model=MerkleProofResponse
 )
 async def get_merkle_proof(block_index: int, tx_index: int):
     try:
-        if block_index < 0 or block_index >= len(blockchain.chain):
-            raise HTTPException(status_code=404, detail="Block not found")
+        return await _run_blocking(_merkle_proof, block_index, tx_index)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        block = blockchain.chain[block_index]
 
-        if tx_index < 0 or tx_index >= len(block.transactions):
-            raise HTTPException(status_code=404, detail="Transaction not found")
+def _transaction_proofs(locations: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """由出块时缓存的Merkle树生成证明，并对照区块头中的Merkle根校验（同一批次共用已算出的中间节点）"""
+    try:
+        proofs = blockchain.get_transaction_proofs(locations)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    cache: Dict[Tuple[str, str], str] = {}
+    for proof in proofs:
+        proof["verified"] = MerkleTree.verify_proof(
+            proof["transaction_hash"], proof["proof_path"], proof["merkle_root"], cache
+        )
+    return proofs
 
-        transaction_hashes = []
-        for tx in block.transactions:
-            tx_dict = tx.model_dump()
-            tx_json = str(sorted(tx_dict.items()))
-            transaction_hashes.append(calculate_hash(tx_json))
-
-        target_tx_hash = transaction_hashes[tx_index]
-
-        proof_path = []
-        merkle_tree = transaction_hashes[:]
-        current_index = tx_index
-
-        while len(merkle_tree) > 1:
-            if current_index % 2 == 0:
-                sibling_index = current_index + 1
-                if sibling_index < len(merkle_tree):
-                    proof_path.append(
-                        {"position": "right", "hash": merkle_tree[sibling_index]}
-                    )
-            else:
-                sibling_index = current_index - 1
-                proof_path.append(
-                    {"position": "left", "hash": merkle_tree[sibling_index]}
-                )
-
-            new_level = []
-            for i in range(0, len(merkle_tree), 2):
-                if i + 1 < len(merkle_tree):
-                    combined = merkle_tree[i] + merkle_tree[i + 1]
-                else:
-                    combined = merkle_tree[i] + merkle_tree[i]
-                new_level.append(calculate_hash(combined))
-
-            merkle_tree = new_level
-            current_index = current_index // 2
-
-        verified_root = target_tx_hash
-        for proof in proof_path:
-            if proof["position"] == "left":
-                combined = proof["hash"] + verified_root
-            else:
-                combined = verified_root + proof["hash"]
-            verified_root = calculate_hash(combined)
 
-        verified = verified_root == block.header.merkle_root
+def _merkle_proof(block_index: int, tx_index: int) -> Dict[str, Any]:
+    return _transaction_proofs([(block_index, tx_index)])[0]
 
-        return MerkleProofResponse(
-            transaction_hash=target_tx_hash,
-            merkle_root=block.header.merkle_root,
-            proof_path=proof_path,
-            verified=verified,
-        )
+
+@app.get(
+    "/api/merkle-proofs/{block_index}", response_model=List[MerkleProofResponse]
+)
+async def get_merkle_proofs(block_index: int, tx_indices: str):
+    """批量生成同一区块内多笔交易的Merkle证明，tx_indices 为逗号分隔的交易序号"""
+    try:
+        return await _run_blocking(_merkle_proofs, block_index, tx_indices)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/pending-transactions")
-async def get_pending_transactions():
+def _merkle_proofs(block_index: int, tx_indices: str) -> List[Dict[str, Any]]:
+    try:
+        indices = [int(index) for index in tx_indices.split(",") if index.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid tx_indices")
+    return _transaction_proofs([(block_index, index) for index in dict.fromkeys(indices)])
+
+
+MAX_BATCH_PROOFS = 1000  # 单次批量请求最多返回的证明数
+
+
+@app.post("/api/merkle-proofs", response_model=List[MerkleProofResponse])
+async def get_merkle_proof_batch(request: ProofBatchRequest):
+    """
+    批量生成任意区块中多笔交易的Merkle证明，供审计方一次取回并在本地校验
+    （见 ChainClient.verify_transaction_proofs）；返回顺序与请求一致
+    """
+    if len(request.items) > MAX_BATCH_PROOFS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PROOFS} proofs per request")
     try:
-        result = []
-        for tx in blockchain.pending_transactions:
-            tx_dict = tx.model_dump()
-            tx_json = str(sorted(tx_dict.items()))
-            tx_hash = calculate_hash(tx_json)
-            tx_dict["tx_hash"] = tx_hash
-            result.append(tx_dict)
-        return result
+        locations = [(item.block_index, item.tx_index) for item in request.items]
+        return FastJSONResponse(await _run_blocking(_transaction_proofs, locations))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/reset")
-async def reset_data():
+@app.get("/api/account-proof/{address}", response_model=AccountProofResponse)
+async def get_account_proof(address: str):
+    """生成账户在状态树中的证明（账户不存在时为非成员证明）"""
     try:
-        # 1. 重置世界状态
-        # 清空内存中的状态
-        world_state.state = {}
-        # 删除数据库文件
-        db_path = world_state.db_path
-        if os.path.exists(db_path):
-            try:
-                # 尝试关闭现有的连接（如果有办法访问的话）
-                # 这里直接删除，依赖 os 操作
-                os.remove(db_path)
-            except Exception as e:
-                print(f"Warning: Failed to delete db file: {e}")
-
-        # 重新初始化数据库
-        world_state._init_db()
-        print("✅ World State has been reset.")
+        # 生成证明需要持有区块链锁，出块期间会等待
+        proof = await _run_blocking(blockchain.get_account_proof, address)
+        return AccountProofResponse(**proof, verified=ChainClient.verify_account_proof(proof))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 2. 重置 SOP 合约状态
-        ops_sop_contract.reset_for_testing()
 
-        # 3. 清空日志
-        if hasattr(app, "agent_logs"):
-            app.agent_logs = []
+@app.get("/api/pending-transactions")
+async def get_pending_transactions():
+    try:
+        return await _run_blocking(_pending_transaction_dicts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 4. 初始化核心 Agent 账户资产
-        if not hasattr(app, "dao_agents"):
-            app.dao_agents = {
-                "AlertReceiver": AlertReceiver(),
-                "ProcessScheduler": ProcessScheduler(),
-                "DataDetective": DataDetective(),
-                "DependencyExplorer": DependencyExplorer(),
-                "ProbabilityOracle": ProbabilityOracle(),
-                "FaultMapper": FaultMapper(),
-                "SolutionEngineer": SolutionEngineer(),
-            }
-        agent_addresses = set()
-        for ag in app.dao_agents.values():
-            agent_addresses.add(ag.wallet_address)
-            acc = world_state.get_account(
-                ag.wallet_address
-            ) or world_state.create_account(ag.wallet_address)
-            acc.name = ag.role_name
-            acc.balance = 20000
-            acc.reputation = 80
-            acc.stake = 0
-            world_state.update_account(acc)
-            print(
-                "name: "
-                + str(ag.role_name)
-                + ", address: "
-                + str(ag.wallet_address)
-                + ", balance: "
-                + str(acc.balance)
-            )
 
-        # 5. 更新区块链的Agent地址名单，防止误判金库
-        blockchain.agent_addresses = agent_addresses
+def _pending_transaction_dicts() -> List[Dict[str, Any]]:
+    result = []
+    for tx in list(blockchain.pending_transactions):
+        tx_dict = tx.model_dump()
+        tx_dict["tx_hash"] = transaction_leaf_hash(tx)
+        result.append(tx_dict)
+    return result
 
-        # 6. 显式初始化系统金库 (Treasury)
-        # 生成一个独立的金库地址
-        from ecdsa import SigningKey, SECP256k1
-        from core.types import generate_address
-        from core.blockchain import PublicKeyRegistry
-
-        # 创建金库账户
-        sk = SigningKey.generate(curve=SECP256k1)
-        vk = sk.get_verifying_key()
-        treasury_addr = generate_address(vk.to_string())
-        PublicKeyRegistry.register_public_key(treasury_addr, vk.to_string().hex())
-
-        treasury_acc = world_state.get_account(
-            treasury_addr
-        ) or world_state.create_account(treasury_addr)
-        treasury_acc.balance = 200000
-        treasury_acc.reputation = 80
-        treasury_acc.stake = 0
-        world_state.update_account(treasury_acc)
-
-        # 强制更新 blockchain 的金库地址缓存
-        blockchain._treasury_address = treasury_addr
-        blockchain._treasury_private_key = sk
 
+@app.post("/api/reset")
+async def reset_data():
+    try:
+        # 重置涉及数据库文件、快照与区块链锁，在 api_executor 中执行
+        await _run_blocking(_reset_state)
         return {"success": True, "message": "System reset successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _reset_state() -> None:
+    """清空世界状态、日志与 SOP 状态，重新初始化核心 Agent 与系统金库账户"""
+    # 1. 重置世界状态
+    # 清空内存中的状态
+    world_state.clear()
+    # 删除数据库文件
+    db_path = world_state.db_path
+    if os.path.exists(db_path):
+        try:
+            # 尝试关闭现有的连接（如果有办法访问的话）
+            # 这里直接删除，依赖 os 操作
+            os.remove(db_path)
+        except Exception as e:
+            print(f"Warning: Failed to delete db file: {e}")
+
+    # 重新初始化数据库
+    world_state._init_db()
+    print("✅ World State has been reset.")
+
+    # 2. 重置 SOP 合约状态（控制台回到全局合约，直到下一次运行）
+    ops_sop_contract.reset_for_testing()
+    app.latest_run_id = None
+
+    # 3. 清空日志
+    _clear_events()
+
+    # 4. 初始化核心 Agent 账户资产
+    agent_addresses = set()
+    for ag in _get_dao_agents().values():
+        agent_addresses.add(ag.wallet_address)
+        acc = world_state.get_account(
+            ag.wallet_address
+        ) or world_state.create_account(ag.wallet_address)
+        acc.name = ag.role_name
+        acc.balance = 20000
+        acc.reputation = 80
+        acc.stake = 0
+        world_state.update_account(acc)
+        print(
+            "name: "
+            + str(ag.role_name)
+            + ", address: "
+            + str(ag.wallet_address)
+            + ", balance: "
+            + str(acc.balance)
+        )
+
+    # 5. 更新区块链的Agent地址名单（排行视图据此区分 Agent 与其他账户）
+    blockchain.agent_addresses = agent_addresses
+
+    # 6. 登记系统金库账户（固定地址，私钥保存在区块目录下）
+    blockchain.register_treasury_account()
+
+    # 7. 保存链外初始化后的世界状态快照，并把链外修改同步到物化视图
+    blockchain.take_snapshot()
+    blockchain.refresh_views()
+
+
 @app.post("/api/generate-test-data")
 async def generate_test_data():
     raise HTTPException(status_code=410, detail="接口已移除，请使用 /api/run-agents")
 
 
-@app.post("/api/run-agents")
-async def run_agents():
-    try:
-        # 初始化 Agents
+DEFAULT_INCIDENT_ENDPOINT = "food-buy"
+DEFAULT_INCIDENT_TIME = "2023-10-15 14:00:00"
+
+# 诊断运行队列：每次运行使用独立的 SOP 合约实例，推理事件归入各自的通道
+run_manager = RunManager(max_concurrency=RUN_AGENTS_MAX_CONCURRENCY)
+run_contracts: Dict[str, OpsSOPContract] = {}  # run_id -> 该运行的 SOP 合约
+
+
+_dao_agents_lock = threading.Lock()  # 首次创建 Agent（加载钱包）可能同时发生在多个工作线程中
+
+
+def _get_dao_agents() -> Dict[str, Any]:
+    with _dao_agents_lock:
         if not hasattr(app, "dao_agents"):
             app.dao_agents = {
                 "AlertReceiver": AlertReceiver(),
@@ -499,124 +710,155 @@ async def run_agents():
                 "FaultMapper": FaultMapper(),
                 "SolutionEngineer": SolutionEngineer(),
             }
-        agents_list = list(app.dao_agents.values())
-
-        # 加载数据 (优先使用 root/data, 降级使用 mABC/simple_sample)
-        selected_endpoint = "food-buy"
-        selected_time = "2023-10-15 14:00:00"
-
-        # Root data paths
-        data_stat_path = os.path.join(
-            parent_dir, "data", "topology", "endpoints_stat.json"
-        )
-        data_map_path = os.path.join(
-            parent_dir, "data", "topology", "endpoints_maps.json"
-        )
-
-        # Simple sample paths
-        sample_stat_path = os.path.join(
-            parent_dir, "mABC", "simple_sample", "endpoint_stats.json"
-        )
-        sample_map_path = os.path.join(
-            parent_dir, "mABC", "simple_sample", "endpoints_maps.json"
-        )
-
-        if os.path.exists(data_stat_path) and os.path.exists(data_map_path):
-            stat_path = data_stat_path
-            map_path = data_map_path
-        elif os.path.exists(sample_stat_path) and os.path.exists(sample_map_path):
-            stat_path = sample_stat_path
-            map_path = sample_map_path
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=f"缺少数据文件。查找路径: {data_stat_path} 或 {sample_stat_path}",
-            )
-
+    return app.dao_agents
+
+
+def _load_incident(selected_endpoint: str, selected_time: str):
+    """读取告警端点在该时刻的指标与下游依赖"""
+    # 加载数据 (优先使用 root/data, 降级使用 mABC/simple_sample)
+    # Root data paths
+    data_stat_path = os.path.join(
+        parent_dir, "data", "topology", "endpoints_stat.json"
+    )
+    data_map_path = os.path.join(
+        parent_dir, "data", "topology", "endpoints_maps.json"
+    )
+
+    # Simple sample paths
+    sample_stat_path = os.path.join(
+        parent_dir, "mABC", "simple_sample", "endpoint_stats.json"
+    )
+    sample_map_path = os.path.join(
+        parent_dir, "mABC", "simple_sample", "endpoints_maps.json"
+    )
+
+    if os.path.exists(data_stat_path) and os.path.exists(data_map_path):
+        stat_path = data_stat_path
+        map_path = data_map_path
+    elif os.path.exists(sample_stat_path) and os.path.exists(sample_map_path):
+        stat_path = sample_stat_path
+        map_path = sample_map_path
+    else:
+        raise FileNotFoundError(f"缺少数据文件。查找路径: {data_stat_path} 或 {sample_stat_path}")
+
+    endpoint_stats = {}
+    endpoint_maps = {}
+    try:
+        with open(stat_path, "r", encoding="utf-8") as f:
+            endpoint_stats = json.load(f)
+    except Exception:
         endpoint_stats = {}
+    try:
+        with open(map_path, "r", encoding="utf-8") as f:
+            endpoint_maps = json.load(f)
+    except Exception:
         endpoint_maps = {}
-        try:
-            with open(stat_path, "r", encoding="utf-8") as f:
-                endpoint_stats = json.load(f)
-        except Exception:
-            endpoint_stats = {}
-        try:
-            with open(map_path, "r", encoding="utf-8") as f:
-                endpoint_maps = json.load(f)
-        except Exception:
-            endpoint_maps = {}
-
-        metrics = (
-            endpoint_stats.get(selected_endpoint, {}).get(selected_time, {})
-        ) or {
-            "calls": 95,
-            "success_rate": 90.0,
-            "error_rate": 10.0,
-            "average_duration": 300.0,
-            "timeout_rate": 5.0,
-        }
-        downstreams = endpoint_maps.get(selected_endpoint, {}).get(selected_time, [])
-
-        # 重置 SOP 状态以开始新一轮诊断
-        ops_sop_contract.reset_for_testing()
-
-        # 清空日志
-        if hasattr(app, "agent_logs"):
-            app.agent_logs = []
-
-        # 1. AlertReceiver/System 提交数据收集 (模拟)
-        ops_sop_contract.submit_data_collection(
-            agent_id=app.dao_agents["AlertReceiver"].wallet_address,
-            data_summary=f"{selected_endpoint} 指标异常",
-            raw_data={
-                "endpoint": selected_endpoint,
-                "time": selected_time,
-                "metrics": metrics,
-                "downstreams": downstreams,
-            },
-        )
 
-        # 2. 构造分析问题
-        question = f"Analyze the root cause of the anomaly in endpoint {selected_endpoint} at time {selected_time}. The metrics are: {metrics}. The downstream dependencies are: {downstreams}."
+    metrics = (
+        endpoint_stats.get(selected_endpoint, {}).get(selected_time, {})
+    ) or {
+        "calls": 95,
+        "success_rate": 90.0,
+        "error_rate": 10.0,
+        "average_duration": 300.0,
+        "timeout_rate": 5.0,
+    }
+    downstreams = endpoint_maps.get(selected_endpoint, {}).get(selected_time, [])
+
+    return metrics, downstreams
+
+
+def _investigate(sop_contract: OpsSOPContract, selected_endpoint: str, selected_time: str) -> Dict[str, Any]:
+    """在运行队列的工作线程中执行一次完整的多智能体根因分析"""
+    dao_agents = _get_dao_agents()
+    metrics, downstreams = _load_incident(selected_endpoint, selected_time)
+
+    # 1. AlertReceiver/System 提交数据收集 (模拟)
+    sop_contract.submit_data_collection(
+        agent_id=dao_agents["AlertReceiver"].wallet_address,
+        data_summary=f"{selected_endpoint} 指标异常",
+        raw_data={
+            "endpoint": selected_endpoint,
+            "time": selected_time,
+            "metrics": metrics,
+            "downstreams": downstreams,
+        },
+    )
+
+    # 2. 构造分析问题
+    question = f"Analyze the root cause of the anomaly in endpoint {selected_endpoint} at time {selected_time}. The metrics are: {metrics}. The downstream dependencies are: {downstreams}."
+
+    # 3. 初始化运行环境
+    scheduler = dao_agents["ProcessScheduler"]
+    dao_executor = DAOExecutor(blockchain)
+    run = ReActTotRun()
+
+    print(f"🚀 Starting Multi-Agent Analysis for {selected_endpoint}...")
+    answer = run.run(
+        agent=scheduler,
+        question=question,
+        agent_tool_env=vars(process_scheduler_tools),
+        eval_run=dao_executor,
+        agents=list(dao_agents.values()),
+        sop_contract=sop_contract,
+    )
+    return {"final_answer": answer, "voting": _voting_status(sop_contract)}
+
+
+def _sop_contract(run_id: Optional[str] = None) -> OpsSOPContract:
+    """指定运行的 SOP 合约；未指定时为最近一次运行的合约（尚无运行时为全局合约）"""
+    if run_id is None:
+        run_id = getattr(app, "latest_run_id", None)
+        if run_id is None or run_id not in run_contracts:
+            return ops_sop_contract
+    contract = run_contracts.get(run_id)
+    if contract is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return contract
 
-        # 3. 初始化运行环境
-        scheduler = app.dao_agents["ProcessScheduler"]
-        dao_executor = DAOExecutor(blockchain)
-        run = ReActTotRun()
 
-        print(f"🚀 Starting Multi-Agent Analysis for {selected_endpoint}...")
+@app.post("/api/run-agents")
+async def run_agents(
+    endpoint: str = DEFAULT_INCIDENT_ENDPOINT,
+    incident_time: str = DEFAULT_INCIDENT_TIME,
+    wait: bool = True,
+):
+    """
+    提交一次根因分析运行
+    wait=True 时等待运行结束并返回结论；wait=False 时立即返回 run_id，通过 /api/runs/{run_id} 查询
+    """
+    try:
+        await _run_blocking(_get_dao_agents)
+        sop_contract = OpsSOPContract(isolated=True)
+        record = run_manager.submit(
+            _investigate,
+            sop_contract,
+            endpoint,
+            incident_time,
+            metadata={"endpoint": endpoint, "incident_time": incident_time},
+        )
+        run_contracts[record.run_id] = sop_contract
+        # 只为仍有记录的运行保留合约
+        for run_id in [rid for rid in run_contracts if run_manager.get(rid) is None]:
+            del run_contracts[run_id]
+        app.latest_run_id = record.run_id
 
-        # 4. 在线程池中运行同步的 Agent 逻辑
-        old_stdout = sys.stdout
-        sys.stdout = DualOutput(old_stdout)
+        if not wait:
+            return {"success": True, "run_id": record.run_id, "status": record.status}
 
         try:
-            answer = await run_in_threadpool(
-                run.run,
-                agent=scheduler,
-                question=question,
-                agent_tool_env=vars(process_scheduler_tools),
-                eval_run=dao_executor,
-                agents=agents_list,
-                sop_contract=ops_sop_contract,
-            )
-
-            voting_status = await get_voting_status()
-
-            return {
-                "success": True,
-                "message": "七智能体根因分析已完成",
-                "final_answer": answer,
-                "voting": voting_status,
-            }
-
+            result = await asyncio.wrap_future(record.future)
         except Exception as run_error:
-            print(f"❌ Analysis failed: {run_error}")
             raise HTTPException(
                 status_code=500, detail=f"智能体分析运行失败: {str(run_error)}"
             )
-        finally:
-            sys.stdout = old_stdout
+        return {
+            "success": True,
+            "run_id": record.run_id,
+            "message": "七智能体根因分析已完成",
+            "final_answer": result["final_answer"],
+            "voting": result["voting"],
+        }
 
     except HTTPException:
         raise
@@ -624,100 +866,142 @@ async def run_agents():
         raise HTTPException(status_code=500, detail=f"运行七智能体失败: {str(e)}")
 
 
+@app.get("/api/runs")
+async def list_runs():
+    """全部运行的状态（不含结果）"""
+    return [record.to_dict(include_result=False) for record in run_manager.list()]
+
+
+@app.get("/api/runs/{run_id}")
+async def get_run(run_id: str):
+    """运行的状态、结果、排队位置与 SOP 状态"""
+    record = run_manager.get(run_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    info = record.to_dict()
+    info["queue_position"] = run_manager.queue_position(run_id)
+    contract = run_contracts.get(run_id)
+    info["sop_state"] = contract.get_current_state() if contract else None
+    return info
+
+
 @app.get("/api/state/sop")
-async def get_sop_state():
+async def get_sop_state(run_id: Optional[str] = None):
     try:
-        current_state = ops_sop_contract.get_current_state()
-        current_proposal = ops_sop_contract.get_current_proposal()
-        incident_data = ops_sop_contract.get_incident_data()
-        events = ops_sop_contract.get_events(limit=100)
+        sop_contract = _sop_contract(run_id)
+        current_state = sop_contract.get_current_state()
+        current_proposal = sop_contract.get_current_proposal()
+        incident_data = sop_contract.get_incident_data()
+        events = sop_contract.get_events(limit=100)
         return {
             "current_state": current_state,
             "current_proposal": current_proposal,
             "incident_data": incident_data,
             "events": events,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/events")
-async def get_events(limit: Optional[int] = 100):
+async def get_events(limit: Optional[int] = 100, after: Optional[int] = None, run_id: Optional[str] = None):
+    """
+    合约事件、Agent 推理/奖励事件与出块事件（按发布顺序）
+    指定 after 时返回序号大于 after 的事件，指定 run_id 时只返回该次运行的事件
+    """
     try:
-        # 获取合约事件
-        contract_events = ops_sop_contract.get_events(limit=limit or 100)
+        if after is not None:
+            return event_bus.since(after, limit, run_id)
+        return event_bus.recent(limit or 100, run_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 获取实时日志
-        log_events = (
-            app.agent_logs[-(limit or 100) :] if hasattr(app, "agent_logs") else []
-        )
 
-        # 合并两者
-        all_events = contract_events + log_events
+SSE_KEEPALIVE_SECONDS = 15  # 无事件时发送注释行，防止代理断开空闲连接
 
-        # 按时间戳排序
-        all_events.sort(key=lambda x: x.get("timestamp", 0))
 
-        # 返回最近的 limit 条
-        return all_events[-(limit or 100) :]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/api/events/stream")
+async def stream_events(request: Request, after: Optional[int] = None, run_id: Optional[str] = None):
+    """
+    Server-Sent Events 推送通道
+    从序号 after（或浏览器重连时携带的 Last-Event-ID）之后开始推送，不指定时只推送新事件；
+    指定 run_id 时只推送该次运行的事件
+    """
+    last_id = request.headers.get("last-event-id")
+    if after is None:
+        after = int(last_id) if last_id and last_id.isdigit() else event_bus.last_seq
+
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def on_event(_event):
+        # 事件可能在 Agent 线程或出块线程中发布
+        loop.call_soon_threadsafe(wake.set)
+
+    async def event_source():
+        last_seq = after
+        event_bus.subscribe(on_event)
+        try:
+            while not await request.is_disconnected():
+                # 先清除再读取，读取之后发布的事件一定会再次唤醒
+                wake.clear()
+                for event in event_bus.since(last_seq, run_id=run_id):
+                    last_seq = event["seq"]
+                    yield f"id: {last_seq}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+                try:
+                    await asyncio.wait_for(wake.wait(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            event_bus.unsubscribe(on_event)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _treasury_row() -> Optional[Dict[str, Any]]:
+    """系统金库账户在视图中的数据"""
+    return blockchain.views.account(blockchain.treasury.address)
+
+
+def _state_views() -> StateViews:
+    """账户物化视图；Agent 名单变化（如服务启动后首次访问）时先同步，其余时候只读取出块时更新好的视图"""
+    agent_addresses = {ag.wallet_address for ag in _get_dao_agents().values()}
+    if blockchain.views.version == 0 or agent_addresses != blockchain.views.agent_addresses:
+        blockchain.agent_addresses = agent_addresses
+        blockchain.refresh_views()
+    return blockchain.views
 
 
 @app.get("/api/state/agents")
-async def get_agents_state(limit: Optional[int] = None):
+async def get_agents_state(request: Request, limit: Optional[int] = None, offset: int = 0):
     try:
-        # 确保 DAO Agents 初始化，以便正确过滤非系统账户
-        if not hasattr(app, "dao_agents"):
-            app.dao_agents = {
-                "AlertReceiver": AlertReceiver(),
-                "ProcessScheduler": ProcessScheduler(),
-                "DataDetective": DataDetective(),
-                "DependencyExplorer": DependencyExplorer(),
-                "ProbabilityOracle": ProbabilityOracle(),
-                "FaultMapper": FaultMapper(),
-                "SolutionEngineer": SolutionEngineer(),
-            }
-        # 仅展示系统管理的 DAO Agents，避免把临时/自动创建的提案账户混入经济看板
-        agent_addresses = set()
-        if hasattr(app, "dao_agents"):
-            agent_addresses = {ag.wallet_address for ag in app.dao_agents.values()}
-        # 构造只读的核心Agent账户列表，不在此处修改链上状态
-        agent_accounts = []
-        for account in world_state.state.values():
-            if not agent_addresses or account.address in agent_addresses:
-                agent_accounts.append(
-                    {
-                        "address": account.address,
-                        "balance": account.balance,
-                        "name": account.name,
-                        "stake": account.stake,
-                        "reputation": account.reputation,
-                    }
-                )
-        agent_accounts.sort(
-            key=lambda x: (x["balance"] or 0, x["stake"] or 0, x["reputation"] or 0),
-            reverse=True,
-        )
-        if limit:
-            agent_accounts = agent_accounts[:limit]
+        # 仅展示系统管理的 DAO Agents（按余额、质押、信誉倒序），避免把临时/自动创建的提案账户混入经济看板
+        # 视图需要同步时（如服务启动后首次访问）会等待区块链锁
+        views = await _run_blocking(_state_views)
+        leaderboard = views.leaderboard(offset, limit)
+        etag = f'"{VIEWS_EPOCH}-{leaderboard["version"]}"'
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+
         # 识别并返回系统金库账户（与七个Agent隔离显示）
         treasury_accounts = []
-        treasury = blockchain._get_treasury_account()
+        treasury = _treasury_row()
         if treasury:
-            treasury_accounts.append(
-                {
-                    "address": treasury.address,
-                    "balance": treasury.balance,
-                    "stake": treasury.stake,
-                    "reputation": treasury.reputation,
-                }
-            )
-        return {
-            "accounts": agent_accounts,
+            treasury.pop("name")
+            treasury_accounts.append(treasury)
+        return FastJSONResponse({
+            "accounts": leaderboard["accounts"],
             "treasury": treasury_accounts,
-            "total": len(agent_accounts),
-        }
+            "total": leaderboard["total"],
+            "version": leaderboard["version"],
+            "block_height": leaderboard["block_height"],
+        }, headers=_cache_headers(etag))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -725,20 +1009,7 @@ async def get_agents_state(limit: Optional[int] = None):
 @app.get("/api/economy/overview")
 async def get_economy_overview():
     try:
-        if not hasattr(app, "dao_agents"):
-            app.dao_agents = {
-                "AlertReceiver": AlertReceiver(),
-                "ProcessScheduler": ProcessScheduler(),
-                "DataDetective": DataDetective(),
-                "DependencyExplorer": DependencyExplorer(),
-                "ProbabilityOracle": ProbabilityOracle(),
-                "FaultMapper": FaultMapper(),
-                "SolutionEngineer": SolutionEngineer(),
-            }
-        # 确保 blockchain 知道 Agent 地址
-        blockchain.agent_addresses = {
-            ag.wallet_address for ag in app.dao_agents.values()
-        }
+        views = await _run_blocking(_state_views)
 
         economy_data = {
             "agent_initial_balance": 20000,
@@ -762,10 +1033,11 @@ async def get_economy_overview():
         }
 
         # 获取系统金库账户
-        treasury = blockchain._get_treasury_account()
+        treasury = _treasury_row()
         if treasury:
-            economy_data["treasury_address"] = treasury.address
-            economy_data["treasury_balance"] = treasury.balance
+            economy_data["treasury_address"] = treasury["address"]
+            economy_data["treasury_balance"] = treasury["balance"]
+        economy_data["version"] = views.version
 
         return economy_data
     except Exception as e:
@@ -773,98 +1045,74 @@ async def get_economy_overview():
 
 
 @app.get("/api/voting/status")
-async def get_voting_status():
+async def get_voting_status(run_id: Optional[str] = None):
     try:
-        proposal = ops_sop_contract.get_current_proposal()
-        if not proposal:
-            return {
-                "active": False,
-                "message": "no active proposal",
-                "statistics": {
-                    "for": 0,
-                    "against": 0,
-                    "abstain": 0,
-                    "total_network_weight": 0.0,
-                    "support_rate": 0.0,
-                    "participation_rate": 0.0,
-                    "consensus_reached": False,
-                },
-                "votes": [],
-            }
+        return await _run_blocking(_voting_status, _sop_contract(run_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        proposal_id = proposal["proposal_id"]
-        proposal_holder = None
-        proposal_data = None
-
-        for acc in world_state.state.values():
-            if proposal_id in acc.root_cause_proposals:
-                proposal_holder = acc.address
-                proposal_data = acc.root_cause_proposals[proposal_id]
-                break
-
-        votes_for = 0.0
-        votes_against = 0.0
-        votes_abstain = 0.0
-        total_network_weight = 0.0
-        votes_list = []
-        participants = 0
-
-        for acc in world_state.state.values():
-            # 与治理合约一致的权重计算公式
-            rep_bonus = max(0.0, (acc.reputation - 50) / 10.0)
-            stake_bonus = acc.stake / 1000.0
-            weight = 1.0 + rep_bonus + stake_bonus
-            total_network_weight += weight
-            v = acc.votes.get(proposal_id)
-            if v:
-                participants += 1
-                votes_list.append(
-                    {
-                        "address": acc.address,
-                        "option": v["vote_option"],
-                        "weight": v.get("weight", weight),
-                    }
-                )
-
-        if proposal_data:
-            votes_for = proposal_data["votes"]["for"]
-            votes_against = proposal_data["votes"]["against"]
-            votes_abstain = proposal_data["votes"]["abstain"]
-
-        support_rate = (
-            (votes_for / total_network_weight) if total_network_weight > 0 else 0.0
-        )
-        participation_rate = (
-            (participants / max(1, len(world_state.state)))
-            if len(world_state.state) > 0
-            else 0.0
-        )
-        consensus_reached = (
-            support_rate > 0.5
-            or ops_sop_contract.get_current_state() in ["Consensus", "Solution"]
-        )
 
+def _voting_status(sop_contract: OpsSOPContract) -> Dict[str, Any]:
+    """提案的链上投票统计"""
+    proposal = sop_contract.get_current_proposal()
+    if not proposal:
         return {
-            "active": True,
-            "proposal": {
-                "proposal_id": proposal_id,
-                "proposer": proposal["proposer"],
-                "content": proposal["content"],
-                "holder_address": proposal_holder,
-            },
+            "active": False,
+            "message": "no active proposal",
             "statistics": {
-                "for": votes_for,
-                "against": votes_against,
-                "abstain": votes_abstain,
-                "total_network_weight": total_network_weight,
-                "support_rate": support_rate,
-                "participation_rate": participation_rate,
-                "consensus_reached": consensus_reached,
+                "for": 0,
+                "against": 0,
+                "abstain": 0,
+                "total_network_weight": 0.0,
+                "support_rate": 0.0,
+                "participation_rate": 0.0,
+                "consensus_reached": False,
             },
-            "votes": votes_list,
+            "votes": [],
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    proposal_id = proposal["proposal_id"]
+    # 投票记录、提案所在账户与全网权重来自物化视图，无需扫描全部账户
+    tally = _state_views().proposal_tally(proposal_id)
+    votes_for = tally["votes"]["for"]
+    votes_against = tally["votes"]["against"]
+    votes_abstain = tally["votes"]["abstain"]
+    total_network_weight = tally["total_network_weight"]
+    votes_list = tally["voters"]
+    participants = len(votes_list)
+
+    support_rate = (
+        (votes_for / total_network_weight) if total_network_weight > 0 else 0.0
+    )
+    participation_rate = (
+        (participants / tally["account_count"]) if tally["account_count"] > 0 else 0.0
+    )
+    consensus_reached = (
+        support_rate > 0.5
+        or sop_contract.get_current_state() in ["Consensus", "Solution"]
+    )
+
+    return {
+        "active": True,
+        "proposal": {
+            "proposal_id": proposal_id,
+            "proposer": proposal["proposer"],
+            "content": proposal["content"],
+            "holder_address": tally["holder_address"],
+        },
+        "statistics": {
+            "for": votes_for,
+            "against": votes_against,
+            "abstain": votes_abstain,
+            "total_network_weight": total_network_weight,
+            "support_rate": support_rate,
+            "participation_rate": participation_rate,
+            "consensus_reached": consensus_reached,
+        },
+        "votes": votes_list,
+    }
 
 
 if __name__ == "__main__":
@@ -40,14 +40,12 @@ function BlockChainView({ refreshKey }) {
   const loadBlocks = async () => {
     setLoading(true)
     try {
-      const offset = (pagination.current - 1) * pagination.pageSize
-      const limit = pagination.pageSize
-      const data = await blockchainAPI.getBlocks(limit, offset)
-
-      // 获取总数
+      // 获取总数，按页码换算出高度游标
       const info = await blockchainAPI.getBlockchainInfo()
+      const offset = (pagination.current - 1) * pagination.pageSize
+      const data = await blockchainAPI.getBlocks(pagination.pageSize, info.block_height - offset)
 
-      setBlocks(data.reverse()) // 最新的在前
+      setBlocks(data.blocks) // 最新的在前
       setPagination(prev => ({
         ...prev,
         total: info.block_height,
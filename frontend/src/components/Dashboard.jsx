@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react'
+import React, { useEffect, useRef, useState } from 'react'
 import { Row, Col, Card, List, Steps, Tag, Table, Space, Statistic, message, Avatar, Typography, Progress, Tooltip, Button, Divider } from 'antd'
 import { PieChart, Pie, Cell, Tooltip as RechartsTooltip, ResponsiveContainer } from 'recharts'
 import { UserOutlined, TrophyOutlined, BankOutlined, SafetyCertificateOutlined, CrownOutlined, ThunderboltOutlined, DeleteOutlined } from '@ant-design/icons'
@@ -6,6 +6,7 @@ import { blockchainAPI } from '../utils/api'
 
 const sopSteps = ['Init', 'Data_Collected', 'Root_Cause_Proposed', 'Consensus', 'Solution']
 const COLORS = ['#2ecc71', '#e74c3c', '#f1c40f']
+const MAX_EVENTS = 100
 
 function Dashboard({ refreshKey }) {
   const [events, setEvents] = useState([])
@@ -16,6 +17,7 @@ function Dashboard({ refreshKey }) {
   const [treasury, setTreasury] = useState([])
   const [voting, setVoting] = useState(null)
   const [economy, setEconomy] = useState(null)
+  const accountsTimer = useRef(null)
 
   // 当切换到运维控制台 Tab 时触发一次刷新
   useEffect(() => {
@@ -23,7 +25,7 @@ function Dashboard({ refreshKey }) {
       loadSop()
       loadAccounts()
       loadVoting()
-      pollEvents()
+      loadEvents()
       loadEconomy()
     }
   }, [refreshKey])
@@ -69,14 +71,33 @@ function Dashboard({ refreshKey }) {
     }
   }
 
-  const pollEvents = async () => {
+  const loadEvents = async () => {
     try {
-      const data = await blockchainAPI.getEvents(100)
+      const data = await blockchainAPI.getEvents(MAX_EVENTS)
       setEvents(data || [])
-      await loadAccounts()
     } catch {}
   }
 
+  // 余额随出块和奖励变化，短时间内的多条事件合并为一次刷新
+  const scheduleLoadAccounts = () => {
+    if (accountsTimer.current) return
+    accountsTimer.current = setTimeout(() => {
+      accountsTimer.current = null
+      loadAccounts()
+    }, 500)
+  }
+
+  const handleEvent = (event) => {
+    if (event.type === 'reset') {
+      setEvents([])
+      return
+    }
+    setEvents(prev => [...prev, event].slice(-MAX_EVENTS))
+    if (event.type === 'BlockMined' || event.type === 'RewardSent') {
+      scheduleLoadAccounts()
+    }
+  }
+
   const loadEconomy = async () => {
     try {
       const data = await blockchainAPI.getEconomyOverview()
@@ -87,18 +108,14 @@ function Dashboard({ refreshKey }) {
   const handleRunAnalysis = async () => {
     try {
       message.loading({ content: '多智能体分析进行中...', key: 'gen', duration: 0 })
-      // 开始轮询事件，以便用户看到进度
-      const interval = setInterval(pollEvents, 1000)
-      
+      // 分析进度通过事件推送实时显示
       const res = await blockchainAPI.runAgents()
       
-      clearInterval(interval)
       if (res.success) {
         message.success({ content: '分析完成！共识已达成', key: 'gen' })
         loadAccounts()
         loadSop()
         loadVoting()
-        pollEvents()
       }
     } catch (e) {
       message.error({ content: '分析失败: ' + (e.response?.data?.detail || e.message), key: 'gen' })
@@ -114,7 +131,6 @@ function Dashboard({ refreshKey }) {
         loadAccounts()
         loadSop()
         loadVoting()
-        pollEvents()
       }
     } catch (e) {
       const errorMsg = e.response?.data?.detail || e.message || '未知错误'
@@ -130,13 +146,27 @@ function Dashboard({ refreshKey }) {
     loadEconomy()
     const t1 = setInterval(loadSop, 5000)
     const t2 = setInterval(loadVoting, 5000)
-    const t3 = setInterval(pollEvents, 1000)
-    const t4 = setInterval(loadEconomy, 5000)
+    const t3 = setInterval(loadEconomy, 5000)
+    // 先取最近的事件，再从最后一条的序号开始订阅推送
+    let unsubscribe = null
+    let cancelled = false
+    blockchainAPI.getEvents(MAX_EVENTS)
+      .then(data => {
+        const initial = data || []
+        setEvents(initial)
+        return initial.length ? initial[initial.length - 1].seq : 0
+      })
+      .catch(() => 0)
+      .then(after => {
+        if (!cancelled) unsubscribe = blockchainAPI.subscribeEvents(handleEvent, after)
+      })
     return () => {
+      cancelled = true
       clearInterval(t1)
       clearInterval(t2)
       clearInterval(t3)
-      clearInterval(t4)
+      if (unsubscribe) unsubscribe()
+      if (accountsTimer.current) clearTimeout(accountsTimer.current)
     }
   }, [])
 
@@ -241,8 +271,8 @@ function Dashboard({ refreshKey }) {
       <Col span={6} style={{ height: '100%', overflow: 'auto' }}>
         <Card title="实时日志流" style={{ height: '100%' }} bodyStyle={{ padding: '0 12px' }}>
           <List
-            dataSource={[...(events || [])].filter(item => item.type === 'agent_log').reverse()}
-            rowKey="id"
+            dataSource={[...(events || [])].filter(item => item.log_type).reverse()}
+            rowKey="seq"
             renderItem={(item) => {
               const isAgentLog = true // Filtered above, so always true
               
@@ -268,6 +298,10 @@ function Dashboard({ refreshKey }) {
                     tagColor = 'gold'
                     tagName = '奖励'
                     break
+                  case 'observation':
+                    tagColor = 'cyan'
+                    tagName = '观察'
+                    break
                   default:
                     tagColor = 'default'
                     tagName = '日志'
@@ -53,10 +53,10 @@ function TransactionView({ refreshKey }) {
 
   const loadAllTransactions = async () => {
     try {
-      const blocks = await blockchainAPI.getBlocks(100) // 获取最近100个区块
+      const { blocks } = await blockchainAPI.getBlocks(100, undefined, true) // 获取最近100个区块（最新的在前）
       const txs = []
       blocks.forEach(block => {
-        block.transactions.forEach(tx => {
+        block.transactions.slice().reverse().forEach(tx => {
           txs.push({
             ...tx,
             blockIndex: block.index,
@@ -65,7 +65,7 @@ function TransactionView({ refreshKey }) {
           })
         })
       })
-      setAllTransactions(txs.reverse()) // 最新的在前
+      setAllTransactions(txs) // 最新的在前
     } catch (error) {
       console.error('Failed to load transactions:', error)
     }
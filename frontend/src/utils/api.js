@@ -13,26 +13,29 @@ const api = axios.create({
 })
 
 // 添加请求拦截器，为每个 GET 请求增加时间戳
+// 区块接口带 ETag，标记 cacheable 的请求不加时间戳，由浏览器携带 If-None-Match 重新验证
 api.interceptors.request.use((config) => {
-  if (config.method === 'get') {
+  if (config.method === 'get' && !config.cacheable) {
     config.params = { ...config.params, _t: Date.now() }
   }
   return config
 })
 
 export const blockchainAPI = {
-  // 获取区块列表
-  getBlocks: async (limit, offset = 0) => {
+  // 获取区块列表（按高度倒序）：返回 { blocks, next_cursor }，before 为上一页的 next_cursor
+  // includeTransactions 为 true 时附带完整交易，否则只返回区块摘要
+  getBlocks: async (limit, before, includeTransactions = false) => {
     const params = {}
     if (limit) params.limit = limit
-    if (offset) params.offset = offset
-    const response = await api.get('/blocks', { params })
+    if (before !== undefined && before !== null) params.before = before
+    if (includeTransactions) params.include = 'transactions'
+    const response = await api.get('/blocks', { params, cacheable: true })
     return response.data
   },
 
   // 获取单个区块
   getBlock: async (index) => {
-    const response = await api.get(`/block/${index}`)
+    const response = await api.get(`/block/${index}`, { cacheable: true })
     return response.data
   },
 
@@ -42,6 +45,13 @@ export const blockchainAPI = {
     return response.data
   },
 
+  // 按发送者、交易类型、提案、目标地址分页查询交易；filters 如 { tx_type: 'penalty,slash', last_blocks: 100 }
+  // 下一页传入上一页返回的 next_cursor
+  getTransactions: async (filters = {}, before) => {
+    const response = await api.get('/transactions', { params: { ...filters, before } })
+    return response.data
+  },
+
   // 获取区块链信息
   getBlockchainInfo: async () => {
     const response = await api.get('/blockchain/info')
@@ -54,6 +64,26 @@ export const blockchainAPI = {
     return response.data
   },
 
+  // 批量获取同一区块内多笔交易的Merkle Proof
+  getMerkleProofs: async (blockIndex, txIndices) => {
+    const response = await api.get(`/merkle-proofs/${blockIndex}`, {
+      params: { tx_indices: txIndices.join(',') }
+    })
+    return response.data
+  },
+
+  // 获取账户状态证明
+  // 批量获取任意区块中交易的Merkle证明，items 为 [{ block_index, tx_index }]
+  getMerkleProofBatch: async (items) => {
+    const response = await api.post('/merkle-proofs', { items })
+    return response.data
+  },
+
+  getAccountProof: async (address) => {
+    const response = await api.get(`/account-proof/${address}`)
+    return response.data
+  },
+
   // 获取待处理交易
   getPendingTransactions: async () => {
     const response = await api.get('/pending-transactions')
@@ -70,10 +100,18 @@ export const blockchainAPI = {
     return response.data
   },
 
+  // 订阅事件推送（SSE），断线后浏览器携带 Last-Event-ID 自动续传；返回取消订阅函数
+  subscribeEvents: (onEvent, after) => {
+    const query = after !== undefined ? `?after=${after}` : ''
+    const source = new EventSource(`${API_BASE_URL}/events/stream${query}`)
+    source.onmessage = (e) => onEvent(JSON.parse(e.data))
+    return () => source.close()
+  },
+
   getAgentsState: async (limit) => {
     const params = {}
     if (limit) params.limit = limit
-    const response = await api.get('/state/agents', { params })
+    const response = await api.get('/state/agents', { params, cacheable: true })
     return response.data
   },
 
@@ -92,6 +130,16 @@ export const blockchainAPI = {
     return response.data
   },
 
+  getRuns: async () => {
+    const response = await api.get('/runs')
+    return response.data
+  },
+
+  getRun: async (runId) => {
+    const response = await api.get(`/runs/${runId}`)
+    return response.data
+  },
+
   resetData: async () => {
     const response = await api.post('/reset')
     return response.data
@@ -101,6 +149,11 @@ export const blockchainAPI = {
     const response = await api.get('/economy/overview')
     return response.data
   },
+
+  getLoopHealth: async () => {
+    const response = await api.get('/health/loop')
+    return response.data
+  },
 }
 
 export default api
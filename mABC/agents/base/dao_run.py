@@ -3,15 +3,17 @@ DAO化的Agent执行器
 将多智能体投票机制从纯内存操作改造为基于区块链的链上交易模式
 """
 
+import hashlib
+import json
 import time
-from typing import List, Dict, Any
-from ecdsa import SigningKey, SECP256k1
+from typing import List, Dict, Any, Optional
+from ecdsa import SigningKey
 
 from .run import BaseRun
 from agents.base.profile import AgentWorkflow
+from core import crypto
 from core.client import ChainClient
-from core.blockchain import PublicKeyRegistry
-from core.types import generate_address
+from core.event_bus import RewardSent, current_run_id, event_bus
 from core.state import world_state
 
 
@@ -269,7 +271,8 @@ class DAOExecutor(BaseRun):
     def _send_reward(self, admin_agent: AgentWorkflow, target_address: str, amount: int, reputation: int, memo: str):
         """发送奖励交易"""
         try:
-            tx = self.chain_client.create_transaction(
+            # 交由出块器与同一轮的其他奖励打包进同一区块，上链后再发出事件
+            future = self.chain_client.create_and_submit(
                 tx_type="reward",
                 sender=admin_agent.wallet_address,
                 data={
@@ -281,18 +284,33 @@ class DAOExecutor(BaseRun):
                 private_key=admin_agent.private_key,
                 gas_limit=200
             )
-            success = self.chain_client.send_and_mine(tx, silent=True)
-            block = self.chain_client.get_latest_block() if success else None
-            block_index = block.header.index if block else "-"
-            short_addr = f"{target_address[:6]}...{target_address[-4:]}"
-            print(f"奖励发送: to={short_addr}, token={amount}, rep={reputation}, success={success}, onchain_block={block_index}")
+            # 回调在出块线程中执行，那里没有当前运行的上下文，提交时记下 run_id
+            run_id = current_run_id.get()
+            future.add_done_callback(
+                lambda done: self._emit_reward_sent(done, target_address, amount, reputation, memo, run_id)
+            )
+        except Exception as e:
+            event_bus.emit(RewardSent(
+                to=target_address, amount=amount, reputation=reputation, success=False, memo=memo, error=str(e),
+            ))
+    
+    @staticmethod
+    def _emit_reward_sent(future, target_address: str, amount: int, reputation: int, memo: str,
+                          run_id: Optional[str] = None):
+        try:
+            receipt = future.result() or {}
         except Exception as e:
-            short_addr = f"{target_address[:6]}...{target_address[-4:]}"
-            print(f"奖励发送: to={short_addr}, token={amount}, rep={reputation}, success=False, onchain_block=-, error={e}")
+            receipt = {"success": False, "error": str(e)}
+        success = receipt.get("success", False)
+        event_bus.emit(RewardSent(
+            to=target_address, amount=amount, reputation=reputation, success=success,
+            block_number=receipt.get("block_number") if success else None, memo=memo, error=receipt.get("error"),
+            run_id=run_id,
+        ))
     
     def _send_penalty(self, admin_agent: AgentWorkflow, target_address: str, amount: int, reputation: int, memo: str):
         try:
-            tx = self.chain_client.create_transaction(
+            self.chain_client.create_and_submit(
                 tx_type="penalty",
                 sender=admin_agent.wallet_address,
                 data={
@@ -304,33 +322,16 @@ class DAOExecutor(BaseRun):
                 private_key=admin_agent.private_key,
                 gas_limit=200
             )
-            self.chain_client.send_and_mine(tx, silent=True)
         except Exception:
             pass
     
     def _get_or_create_treasury_account(self):
         if hasattr(self, "_treasury") and self._treasury:
             return self._treasury
-        addr = getattr(self.blockchain, "_treasury_address", None)
-        pk = getattr(self.blockchain, "_treasury_private_key", None)
-        if addr and pk and world_state.get_account(addr):
-            self._treasury = DAOExecutor.TreasuryAccount(addr, pk)
-            return self._treasury
-        sk = SigningKey.generate(curve=SECP256k1)
-        vk = sk.get_verifying_key()
-        addr = generate_address(vk.to_string())
-        PublicKeyRegistry.register_public_key(addr, vk.to_string().hex())
-        acc = world_state.get_account(addr) or world_state.create_account(addr)
-        if acc.balance is None or acc.balance < 200000:
-            acc.balance = 200000
-        if acc.reputation is None or acc.reputation < 80:
-            acc.reputation = 80
-        if acc.stake is None:
-            acc.stake = 0
-        world_state.update_account(acc)
-        setattr(self.blockchain, "_treasury_address", addr)
-        setattr(self.blockchain, "_treasury_private_key", sk)
-        self._treasury = DAOExecutor.TreasuryAccount(addr, sk)
+        # 系统金库在创世/重置时登记，这里只确保账户存在（兼容早于金库登记的世界状态）
+        self.blockchain.register_treasury_account()
+        treasury = self.blockchain.treasury
+        self._treasury = DAOExecutor.TreasuryAccount(treasury.address, treasury.private_key)
         return self._treasury
     
     def _create_and_submit_vote_transaction(self, agent: AgentWorkflow, 
@@ -349,19 +350,20 @@ class DAOExecutor(BaseRun):
         try:
             # 使用 ChainClient 创建并提交交易
             # 投票交易是轻量级操作，gas_limit 设为 5000
-            tx = self.chain_client.create_transaction(
-                tx_type="vote",
-                sender=agent.wallet_address,
-                data={
-                    "proposal_id": proposal_id,
-                    "vote_option": vote_option
-                },
-                private_key=agent.private_key,
-                gas_limit=200
-            )
-            
-            # 提交交易并出块
-            return self.chain_client.send_and_mine(tx)
+            with self.chain_client.sender_lock(agent.wallet_address):
+                tx = self.chain_client.create_transaction(
+                    tx_type="vote",
+                    sender=agent.wallet_address,
+                    data={
+                        "proposal_id": proposal_id,
+                        "vote_option": vote_option
+                    },
+                    private_key=agent.private_key,
+                    gas_limit=200
+                )
+                
+                # 提交交易并出块
+                return self.chain_client.send_and_mine(tx)
             
         except Exception as e:
             print(f"❌ 创建投票交易失败: {e}")
@@ -392,8 +394,8 @@ class DAOExecutor(BaseRun):
         tx_json = json.dumps(tx_dict, sort_keys=True, separators=(',', ':'))
         tx_hash = hashlib.sha256(tx_json.encode()).digest()
         
-        # 2. 使用私钥签名
-        signature = private_key.sign_digest(tx_hash, sigencode=sigencode_der)
+        # 2. 使用私钥签名(由密码学后端实现，输出DER编码)
+        signature = crypto.provider.sign_digest(private_key, tx_hash)
         
         # 3. 返回十六进制编码
         return signature.hex()
@@ -533,16 +535,17 @@ class DAOExecutor(BaseRun):
                 return False
             
             # 使用 ChainClient 创建质押交易
-            tx = self.chain_client.create_transaction(
-                tx_type="stake",
-                sender=agent.wallet_address,
-                data={"amount": amount},
-                private_key=agent.private_key,
-                gas_limit=200
-            )
-            
-            # 上链执行
-            return self.chain_client.send_and_mine(tx)
+            with self.chain_client.sender_lock(agent.wallet_address):
+                tx = self.chain_client.create_transaction(
+                    tx_type="stake",
+                    sender=agent.wallet_address,
+                    data={"amount": amount},
+                    private_key=agent.private_key,
+                    gas_limit=200
+                )
+                
+                # 上链执行
+                return self.chain_client.send_and_mine(tx)
             
         except Exception as e:
             print(f"❌ 质押失败: {e}")
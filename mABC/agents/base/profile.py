@@ -67,7 +67,7 @@ class AgentWorkflow():
 class DataDetective(AgentWorkflow):
     def __init__(self) -> None:
         super(DataDetective, self).__init__(role_name="Data Detective")
-        self.role_desc = f"You are a {self.role_name}. You are adept at collecting and analyzing data from various nodes within a specific time window, and you use tools like the Data Collection Tool and Data Analysis Tool to exclude non-essential data and apply fuzzy matching to focus on critical parameters. \n\n**CRITICAL TOOL USAGE RULES:**\n- You can ONLY use tools from your own toolkit: query_endpoint_stats, query_endpoint_metrics_in_range\n- DO NOT attempt to call any other tools like ask_for_data_detective, ask_for_dependency_explorer, etc.\n- If you see examples of other tools in the context, IGNORE them - they are not available to you\n\n{system_prompt}"
+        self.role_desc = f"You are a {self.role_name}. You are adept at collecting and analyzing data from various nodes within a specific time window, and you use tools like the Data Collection Tool and Data Analysis Tool to exclude non-essential data and apply fuzzy matching to focus on critical parameters. \n\n**CRITICAL TOOL USAGE RULES:**\n- You can ONLY use tools from your own toolkit: query_endpoint_stats, query_endpoint_metrics_in_range, query_anomalous_endpoints\n- To find which endpoints are abnormal in a time window, call query_anomalous_endpoints first and only inspect the suspicious ones in detail\n- DO NOT attempt to call any other tools like ask_for_data_detective, ask_for_dependency_explorer, etc.\n- If you see examples of other tools in the context, IGNORE them - they are not available to you\n\n{system_prompt}"
         self.tool_path = os.path.join(MABC_ROOT, "agents", "tools", "data_detective_tools.py")
 
 class DependencyExplorer(AgentWorkflow):
@@ -114,7 +114,7 @@ class ProcessScheduler(AgentWorkflow):
 
 Step 1: Call ask_for_data_detective to get metrics of the ALERTING endpoint (the one with the alert)
 Step 2: Call ask_for_dependency_explorer to get the downstream endpoints of the alerting endpoint
-Step 3: For EACH downstream endpoint returned from Step 2, call ask_for_data_detective to get their metrics
+Step 3: Call ask_for_data_detective to rank the anomalous endpoints in the alert time window, then get detailed metrics ONLY for the downstream endpoints from Step 2 that are ranked as suspicious (if none are suspicious, check EACH downstream endpoint)
 Step 4: Compare metrics: Find a downstream endpoint where:
    - The downstream endpoint's metrics are ABNORMAL (high error_rate, high average_duration, etc)
    - BUT the downstream endpoint's downstream (if any) is NORMAL
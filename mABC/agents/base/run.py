@@ -5,6 +5,7 @@ from utils.llm import llm_chat
 from utils.generate_tools import get_agent_tool_list_prompt
 from utils.act_eval import act_eval
 from agents.base.profile import AgentWorkflow
+from core.event_bus import MAX_OBSERVATION_LENGTH, AgentThought, FinalAnswer, Observation, ToolCall, event_bus
 
 STOP_WORDS_NONE = ""
 STOP_WORDS_REACT = "\nObservation"
@@ -310,6 +311,7 @@ class ReActTotRun(BaseRun):
                 # print(f"❌ ERROR: Reason循环超过最大次数({max_reason_loops})，强制退出")
                 final_answer = "Unable to determine root cause after multiple reasoning steps."
                 step_record += f"\nFinal Answer: {final_answer}"
+                event_bus.emit(FinalAnswer(agent=agent.role_name, answer=final_answer))
                 return REACT_STATUS_FINISH, step_record
             
             # 墙钟时间超时保护：防止长时间卡在第二阶段
@@ -318,6 +320,7 @@ class ReActTotRun(BaseRun):
                 print(f"⏱️ TIMEOUT: 超过墙钟时间上限({max_wall_clock}s)，生成保底结论并结束")
                 final_answer = "Timeout while analyzing. Provide preliminary root cause based on available data."
                 step_record += f"\nFinal Answer: {final_answer}"
+                event_bus.emit(FinalAnswer(agent=agent.role_name, answer=final_answer))
                 return REACT_STATUS_FINISH, step_record
             
             # 当在Reason状态时，将上一步的输出(如有)和历史记录累积作为新的输入
@@ -326,6 +329,8 @@ class ReActTotRun(BaseRun):
             status = result["status"]
             thought = result["thought"]
             step_record += f"\nThought: {thought}"  # 将这一步的输出Thought加入历史记录
+            if thought:
+                event_bus.emit(AgentThought(agent=agent.role_name, thought=thought))
             # print(f"🔍 DEBUG: Reason完成，返回状态: {status}")
             
         if status == REACT_STATUS_ACT:
@@ -335,7 +340,7 @@ class ReActTotRun(BaseRun):
             step_record += f"\nAction Tool Name: {action_tool_name}"
             step_record += f"\nAction Tool Input: {action_tool_input}"
             action = f"{action_tool_name}({action_tool_input})"
-            print(f"\n🔍 action: {action}")
+            event_bus.emit(ToolCall(agent=agent.role_name, tool=action_tool_name, tool_input=action_tool_input))
             
             # 检查是否重复执行相同的动作
             if action == previous_action:
@@ -345,6 +350,7 @@ class ReActTotRun(BaseRun):
                     print(f"❌ ERROR: 连续{consecutive_no_data}次执行相同动作且无结果，强制退出")
                     final_answer = "Unable to determine root cause - repeated queries returned no data. The required endpoint data is not available."
                     step_record += f"\nFinal Answer: {final_answer}"
+                    event_bus.emit(FinalAnswer(agent=agent.role_name, answer=final_answer))
                     return REACT_STATUS_FINISH, step_record
             else:
                 consecutive_no_data = 0  # 重置计数器
@@ -360,14 +366,19 @@ class ReActTotRun(BaseRun):
                     print(f"❌ ERROR: 连续{consecutive_no_data}次查询无数据，可能该端点在该时间段无活动")
                     final_answer = "Unable to determine root cause - the endpoint has no data at the specified time. Please verify the endpoint name or time period."
                     step_record += f"\nFinal Answer: {final_answer}"
+                    event_bus.emit(FinalAnswer(agent=agent.role_name, answer=final_answer))
                     return REACT_STATUS_FINISH, step_record
             else:
                 consecutive_no_data = 0  # 重置计数器
             
             step_record += f"\nObservation: the result of {action} is {step_output}"  # 将这一步的输出加入历史记录
+            event_bus.emit(Observation(
+                agent=agent.role_name, tool=action_tool_name, result=str(step_output)[:MAX_OBSERVATION_LENGTH]
+            ))
         elif status == REACT_STATUS_FINISH:
             final_answer = result["final_answer"]
             step_record += f"\nFinal Answer: {final_answer}"  # 记录最终答案到历史
+            event_bus.emit(FinalAnswer(agent=agent.role_name, answer=final_answer))
         return status, step_record
 
     # 进行推理, 返回状态和结果
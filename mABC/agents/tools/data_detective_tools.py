@@ -62,3 +62,25 @@ def query_endpoint_metrics_in_range(endpoint: str, minute: str) -> dict:
     """
     endpoint_data = explorer.query_endpoint_stats_in_range(endpoint, minute)
     return endpoint_data
+
+def query_anomalous_endpoints(minute: str, top_k: int = 10) -> list:
+    """
+    This function ranks all API endpoints by how anomalous their metrics are over a time range, so that only suspicious endpoints need to be examined in detail.
+    The time range is centered around the provided time, spanning from 15 minutes before to 5 minutes after.
+    Each endpoint is scored against its own baseline (median/MAD of the previous hour) or, when it has too little history, against all endpoints in the range.
+    
+    Parameters:
+    - minute (str): The central time point around which the endpoints are to be ranked, formatted as "YYYY-MM-DD HH:MM:SS". 
+    - top_k (int): The maximum number of endpoints to return, defaults to 10.
+    
+    Returns:
+    - list: A list of dictionaries sorted by anomaly score in descending order. Each dictionary includes the following keys:
+        - 'endpoint' (str): The unique identifier of the API endpoint.
+        - 'score' (float): The robust z-score of the most anomalous metric; larger means more abnormal.
+        - 'suspicious' (bool): True if the score is at least 3.0, otherwise the endpoint can be treated as healthy.
+        - 'metric' (str): The most anomalous metric, one of 'average_duration', 'error_rate', 'timeout_rate'.
+        - 'value' (float): The value of that metric at its peak minute.
+        - 'baseline' (float): The baseline median of that metric.
+        - 'peak_minute' (str): The minute at which the metric deviated the most, formatted as "YYYY-MM-DD HH:MM:SS".
+    """
+    return explorer.rank_anomalous_endpoints(minute, top_k)
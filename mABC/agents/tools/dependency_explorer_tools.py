@@ -1,8 +1,11 @@
 from handle.trace_collect import TraceExplorer
 
+# 模块级单例：复用已构建的邻接索引与调用链缓存
+traceExplorer = TraceExplorer()
+
 def get_endpoint_downstream(endpoint: str) -> list:
     """
-    This function retrieves the downstream endpoints of a given endpoint called by the given endpoint.
+    This function retrieves the downstream endpoints of a given endpoint called by the given endpoint, over the whole observed time span.
 
     Parameters:
     - endpoint (str): The unique identifier of the endpoint to be queried.
@@ -10,10 +13,9 @@ def get_endpoint_downstream(endpoint: str) -> list:
     Returns:
     - list: A list of strings, each representing a downstream endpoint called by the given endpoint.
     """
-    traceExplorer = TraceExplorer()
     return traceExplorer.get_endpoint_downstream(endpoint)
 
-def get_endpoint_downstream_in_range(endpoint: str, minute: str) -> list:
+def get_endpoint_downstream_in_range(endpoint: str, minute: str) -> dict:
     """
     This function retrieves the downstream endpoints of a given endpoint called by the given endpoint.
     The time range is centered around the provided time, spanning from 15 minutes before to 5 minutes after.
@@ -23,10 +25,10 @@ def get_endpoint_downstream_in_range(endpoint: str, minute: str) -> list:
     - minute (str): The central time point around which the statistics are to be queried, formatted as "YYYY-MM-DD HH:MM:SS". 
 
     Returns:
-    - dict: A dictionary containing a list downstream endpoint for the given endpoint over the specified time range. 
-    The dictionary consists of key-value pairs, where the key is the time point and the value is a list of downstream endpoints.
+    - dict: A dictionary of the distinct downstream endpoints called by the given endpoint within the time range.
+    The key is the downstream endpoint and the value is a dict with 'first_seen' and 'last_seen', the first and last minute (inside the time range) at which the call was observed.
+    An empty dict means the endpoint called nothing within the time range.
     """
-    traceExplorer = TraceExplorer()
     return traceExplorer.get_endpoint_downstream_in_range(endpoint, minute)
 
 
@@ -40,15 +42,16 @@ def get_endpoint_upstream(endpoint: str) -> list:
     Returns:
     - list: A list of strings, each representing an upstream endpoint which calls the given endpoint.
     """
-    traceExplorer = TraceExplorer()
     return traceExplorer.get_endpoint_upstream(endpoint)
 
-def get_call_chain_for_endpoint(endpoint: str) -> list:
+def get_call_chain_for_endpoint(endpoint: str, minute: str = None) -> dict:
     """
-    This function retrieves the call chain for a given endpoint, which consists of the upstream and downstream endpoints of the given endpoint.
+    This function retrieves the whole call chain for a given endpoint in one call, which consists of all the upstream and downstream endpoints of the given endpoint (multi-hop, not only the direct neighbors).
+    If minute is given, only the calls observed from 15 minutes before to 5 minutes after that time are considered.
 
     Parameters:
     - endpoint (str): The unique identifier of the endpoint to be queried.
+    - minute (str): Optional. The central time point, formatted as "YYYY-MM-DD HH:MM:SS". If omitted, the whole observed time span is used.
 
     Returns:
     - dict: A dictionary containing the call chain for the given endpoint.
@@ -56,7 +59,6 @@ def get_call_chain_for_endpoint(endpoint: str) -> list:
         - 'upstream' (list): A list of tuples, each representing an upstream endpoint which calls the given endpoint and the level distance from the given endpoint.
         - 'downstream' (list): A list of tuples, each representing a downstream endpoint which is called by the given endpoint and the level distance from the given endpoint.
     """
-    traceExplorer = TraceExplorer()
-    return traceExplorer.get_call_chain_for_endpoint(endpoint)
+    return traceExplorer.get_call_chain_for_endpoint(endpoint, minute)
 
 
@@ -20,7 +20,7 @@ from agents.base.run import BaseRun, ReActTotRun, ThreeHotCotRun
 
 def ask_for_data_detective(question: str) -> str:
     """
-    Ask for Data Detective Agent about endpoint metric in a endpoint. Data Detective Agent monitors and analyzes endpoint metric using functions like query_endpoint_metrics_in_range(endpoint, time). The endpoint metrics, including API call count, success rate, error rate, response time and timeout rate, are used to identify trends and issues in this endpoint.
+    Ask for Data Detective Agent about endpoint metric in a endpoint. Data Detective Agent monitors and analyzes endpoint metric using functions like query_endpoint_metrics_in_range(endpoint, time) and query_anomalous_endpoints(time), which ranks all endpoints by anomaly score in a time window. The endpoint metrics, including API call count, success rate, error rate, response time and timeout rate, are used to identify trends and issues in this endpoint.
     
     Parameters:
     - question (str): The question to ask the Data Detective Agent, you should describe the question in detail as much as possible including Endpoint and Time, because Data Detective Agent only know what you have told it.
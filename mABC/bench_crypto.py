@@ -0,0 +1,41 @@
+"""
+密码学后端微基准 (core/crypto.py)
+比较各可用后端的签名/验签吞吐量
+
+用法: python bench_crypto.py [次数]
+"""
+import sys
+import os
+import hashlib
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ecdsa import SigningKey, SECP256k1
+
+from core.crypto import BACKENDS
+
+
+def bench(rounds: int = 200) -> None:
+    sk = SigningKey.generate(curve=SECP256k1)
+    public_key_hex = sk.get_verifying_key().to_string().hex()
+    digest = hashlib.sha256(b"mABC benchmark").digest()
+
+    print(f"{'backend':<14}{'sign/s':>12}{'verify/s':>12}")
+    for name, backend in BACKENDS.items():
+        impl = backend()
+        impl.verify_digest(public_key_hex, impl.sign_digest(sk, digest), digest)  # 预热缓存
+
+        start = time.perf_counter()
+        signatures = [impl.sign_digest(sk, digest) for _ in range(rounds)]
+        sign_rate = rounds / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        assert all(impl.verify_digest(public_key_hex, signature, digest) for signature in signatures)
+        verify_rate = rounds / (time.perf_counter() - start)
+        print(f"{name:<14}{sign_rate:>12.0f}{verify_rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
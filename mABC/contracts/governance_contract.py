@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 from core.state import WorldState
 
 class GovernanceContract:
@@ -7,8 +7,16 @@ class GovernanceContract:
     负责共识投票
     """
     
-    def __init__(self, world_state: WorldState):
+    def __init__(self, world_state: WorldState, advance_sop: bool = True):
         self.world_state = world_state
+        # 达成共识时是否推进持有提案的 SOP 合约；从快照重放区块时为 False，
+        # SOP 合约是链外的内存状态，重放不能让它再次（或错误地）流转
+        self.advance_sop = advance_sop
+        # 执行过程中产生的事件（投票权重、共识结果），写入交易回执
+        self.logs: List[Dict[str, Any]] = []
+
+    def _emit(self, name: str, **fields) -> None:
+        self.logs.append({"name": name, **fields})
 
     def vote(self, tx_data: Dict[str, Any], sender: str, timestamp: int) -> bool:
         """
@@ -79,6 +87,8 @@ class GovernanceContract:
         
         # 更新提案的投票计数 (加权)
         proposal_data["votes"][vote_option] += weight
+        self._emit("vote", proposal_id=proposal_id, voter=sender, option=vote_option, weight=weight,
+                   total=proposal_data["votes"][vote_option])
         
         # 更新提案账户
         if proposal_account:
@@ -95,8 +105,6 @@ class GovernanceContract:
         检查是否达成共识
         逻辑：如果赞成票权重超过全网总权重的 50%，则通过；如果反对票超过 50%，则否决。
         """
-        from contracts.ops_contract import ops_sop_contract
-        
         votes_for = proposal_data["votes"]["for"]
         votes_against = proposal_data["votes"]["against"]
         
@@ -113,6 +121,20 @@ class GovernanceContract:
         PASS_THRESHOLD_RATIO = 0.5
         threshold = total_network_weight * PASS_THRESHOLD_RATIO
         
+        if votes_for <= threshold and votes_against <= threshold:
+            return
+        self._emit("consensus", proposal_id=proposal_id, passed=votes_for > threshold,
+                   votes_for=votes_for, votes_against=votes_against, total_weight=total_network_weight)
+
+        # 只推进持有该提案的 SOP 合约；找不到（如重启后的历史提案）或正在重放时跳过
+        if not self.advance_sop:
+            return
+        from contracts.ops_contract import get_contract_for_proposal
+        ops_sop_contract = get_contract_for_proposal(proposal_id)
+        if ops_sop_contract is None:
+            print(f"No SOP contract holds proposal {proposal_id}, skipping SOP transition")
+            return
+
         if votes_for > threshold:
             # 提案通过
             try:
@@ -13,6 +13,9 @@ from enum import Enum
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import hashlib
+import weakref
+
+from core.event_bus import event_bus
 
 
 class SOPState(str, Enum):
@@ -27,7 +30,8 @@ class SOPState(str, Enum):
 class OpsSOPContract:
     """
     运维 SOP 主合约（仅流程控制）
-    使用类级存储，所有实例共享（单例模式）
+    默认使用类级存储，所有实例共享（单例模式）；
+    isolated=True 时使用独立存储，供并发的诊断运行各自推进 SOP
     """
 
     # 类级存储（内存中全局唯一）
@@ -39,8 +43,17 @@ class OpsSOPContract:
         "events": []                            # 事件日志列表
     }
 
-    def __init__(self):
-        self.storage = OpsSOPContract._storage
+    def __init__(self, isolated: bool = False):
+        if isolated:
+            self.storage = {
+                "current_state": SOPState.Init.value,
+                "incident_data": {},
+                "proposals": {},
+                "current_proposal_id": None,
+                "events": [],
+            }
+        else:
+            self.storage = OpsSOPContract._storage
 
     def _emit_event(self, name: str, **kwargs):
         """发射事件（供前端和成员4监听）"""
@@ -53,6 +66,8 @@ class OpsSOPContract:
             **kwargs
         }
         self.storage["events"].append(event)
+        # 同时推送给事件总线的订阅者（/api/events/stream）
+        event_bus.publish({"type": "contract_event", **event})
 
     # ====================== 核心方法（Agent 可直接调用） ======================
 
@@ -94,6 +109,7 @@ class OpsSOPContract:
 
         self.storage["proposals"][proposal_id] = proposal
         self.storage["current_proposal_id"] = proposal_id
+        _contracts_by_proposal[proposal_id] = self
         self.storage["current_state"] = SOPState.Root_Cause_Proposed.value
 
         self._emit_event(
@@ -170,5 +186,14 @@ class OpsSOPContract:
         self.storage["events"] = []
 
 
+# 提案ID -> 持有该提案的合约实例（治理合约据此推进对应运行的 SOP）
+_contracts_by_proposal: "weakref.WeakValueDictionary[str, OpsSOPContract]" = weakref.WeakValueDictionary()
+
+
 # 全局单例实例（全项目统一使用）
-ops_sop_contract = OpsSOPContract()
\ No newline at end of file
+ops_sop_contract = OpsSOPContract()
+
+
+def get_contract_for_proposal(proposal_id: str) -> Optional[OpsSOPContract]:
+    """查找持有提案的合约实例（包括在全局单例上提出的提案），未找到时返回 None"""
+    return _contracts_by_proposal.get(proposal_id)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from core.state import WorldState
 
 class TokenContract:
@@ -7,8 +7,15 @@ class TokenContract:
     负责转账、质押和惩罚
     """
     
-    def __init__(self, world_state: WorldState):
+    def __init__(self, world_state: WorldState, treasury_address: Optional[str] = None):
         self.world_state = world_state
+        # 罚没金额转入的系统金库地址，为 None 时罚没金额直接销毁
+        self.treasury_address = treasury_address
+        # 执行过程中产生的事件（实际生效的金额与信誉变化），写入交易回执
+        self.logs: List[Dict[str, Any]] = []
+
+    def _emit(self, name: str, **fields) -> None:
+        self.logs.append({"name": name, **fields})
 
     def transfer(self, tx_data: Dict[str, Any], sender: str) -> bool:
         """
@@ -35,6 +42,7 @@ class TokenContract:
         
         self.world_state.update_account(from_account)
         self.world_state.update_account(to_account)
+        self._emit("transfer", **{"from": sender, "to": to_address, "amount": amount})
         return True
 
     def stake(self, tx_data: Dict[str, Any], sender: str) -> bool:
@@ -56,6 +64,7 @@ class TokenContract:
         account.stake += amount
         
         self.world_state.update_account(account)
+        self._emit("stake", account=sender, amount=amount, stake=account.stake)
         return True
 
     def slash(self, tx_data: Dict[str, Any], sender: str) -> bool:
@@ -82,6 +91,7 @@ class TokenContract:
         # 可以在这里将扣除的 Token 销毁或转入国库
         
         self.world_state.update_account(target_account)
+        self._emit("slash", target=target_address, amount=amount, stake=target_account.stake)
         return True
 
     def reward(self, tx_data: Dict[str, Any], sender: str) -> bool:
@@ -110,6 +120,7 @@ class TokenContract:
                 return False
             from_account.balance -= amount
             target_account.balance += amount
+        previous_reputation = target_account.reputation
         if reputation != 0:
             target_account.reputation += reputation
             # 限制信誉范围 0-100
@@ -117,6 +128,8 @@ class TokenContract:
         
         self.world_state.update_account(from_account)
         self.world_state.update_account(target_account)
+        self._emit("reward", **{"from": sender, "to": target_address, "amount": max(0, amount),
+                                "reputation": target_account.reputation - previous_reputation})
         return True
     
     def penalty(self, tx_data: Dict[str, Any], sender: str) -> bool:
@@ -139,24 +152,28 @@ class TokenContract:
         # 罚没金额不超过余额
         amount = min(amount, max(0, target_account.balance))
         
-        # 找到系统金库账户
-        try:
-            from core.vm import blockchain
-            treasury = blockchain._get_treasury_account()
-        except Exception:
-            treasury = None
-        
-        # 扣减余额并转入金库（若存在）
+        # 扣减余额并转入金库（未指定金库时销毁）
+        credited = False
         if amount > 0:
             target_account.balance -= amount
-            if treasury:
+            if self.treasury_address:
+                treasury = (self.world_state.get_account(self.treasury_address)
+                            or self.world_state.create_account(self.treasury_address))
                 treasury.balance = (treasury.balance or 0) + amount
                 self.world_state.update_account(treasury)
+                credited = True
         
         # 信誉调整
+        previous_reputation = target_account.reputation
         if reputation != 0:
             target_account.reputation += reputation
             target_account.reputation = max(0, min(100, target_account.reputation))
         
         self.world_state.update_account(target_account)
+        self._emit("penalty", target=target_address, amount=amount,
+                   reputation=target_account.reputation - previous_reputation)
+        if credited:
+            self._emit("treasury_credit", treasury=self.treasury_address, amount=amount)
+        elif amount > 0:
+            self._emit("burn", amount=amount)
         return True
@@ -0,0 +1,186 @@
+"""
+区块持久化存储
+- 区块以长度前缀 JSON 的形式追加写入分段文件 blocks-000000.seg、blocks-000001.seg ...
+- index.bin 为定长记录数组，第 i 条记录对应高度 i：(段号, 偏移, 长度, 区块哈希)
+- 启动时 mmap 索引文件，不回放区块；区块按需从磁盘读取，只在内存中保留少量最近读取的区块
+- 崩溃恢复：丢弃不完整的索引记录，并截断段文件中未被索引的尾部数据
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Dict, Optional, Tuple
+
+from .types import Block
+
+INDEX_RECORD = struct.Struct("<IQI32s")   # 段号, 偏移, 长度, 区块哈希
+LENGTH_PREFIX = struct.Struct("<I")
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024   # 单个段文件的大小上限（字节）
+DEFAULT_CACHE_SIZE = 256                  # 内存中缓存的区块数
+
+
+class BlockStore:
+    def __init__(self, directory: str, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.cache_size = cache_size
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[int, Block]" = OrderedDict()
+        self._readers: Dict[int, object] = {}
+        self._hash_index: Optional[Dict[bytes, int]] = None  # 首次按哈希查询时构建
+
+        self._index_path = os.path.join(directory, "index.bin")
+        self._index_file = open(self._index_path, "a+b")
+        self._count = 0
+        self._map: Optional[mmap.mmap] = None
+        self._recover()
+        self._remap()
+
+        self._segment_id = self._record(self._count - 1)[0] if self._count else 0
+        self._segment_file = open(self._segment_path(self._segment_id), "ab")
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"blocks-{segment_id:06d}.seg")
+
+    def _recover(self) -> None:
+        """丢弃不完整的记录，使索引与段文件一致"""
+        index_size = os.path.getsize(self._index_path)
+        count = index_size // INDEX_RECORD.size
+        with open(self._index_path, "rb") as f:
+            data = f.read(count * INDEX_RECORD.size)
+
+        last_segment, end = 0, 0
+        while count:
+            segment_id, offset, length, _ = INDEX_RECORD.unpack_from(data, (count - 1) * INDEX_RECORD.size)
+            path = self._segment_path(segment_id)
+            end = offset + LENGTH_PREFIX.size + length
+            if os.path.exists(path) and os.path.getsize(path) >= end:
+                last_segment = segment_id
+                break
+            count -= 1
+
+        if count * INDEX_RECORD.size != index_size:
+            self._index_file.truncate(count * INDEX_RECORD.size)
+        self._count = count
+
+        # 截断最后一个段中未被索引的数据，删除其后的孤立段
+        if count:
+            with open(self._segment_path(last_segment), "r+b") as f:
+                f.truncate(end)
+        for path in glob.glob(os.path.join(self.directory, "blocks-*.seg")):
+            segment_id = int(os.path.basename(path)[7:13])
+            if segment_id > last_segment or (not count and os.path.getsize(path)):
+                os.remove(path)
+
+    def _remap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._map = None
+        if self._count:
+            self._map = mmap.mmap(self._index_file.fileno(), self._count * INDEX_RECORD.size,
+                                  access=mmap.ACCESS_READ)
+
+    def _record(self, height: int) -> Tuple[int, int, int, bytes]:
+        return INDEX_RECORD.unpack_from(self._map, height * INDEX_RECORD.size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, block: Block) -> int:
+        """追加区块，返回其高度"""
+        payload = json.dumps(block.model_dump(), separators=(",", ":")).encode("utf-8")
+        block_hash = bytes.fromhex(block.hash) if block.hash else bytes(32)
+        with self._lock:
+            if self._segment_file.tell() and self._segment_file.tell() + len(payload) > self.segment_size:
+                self._segment_file.close()
+                self._segment_id += 1
+                self._segment_file = open(self._segment_path(self._segment_id), "ab")
+            offset = self._segment_file.tell()
+            self._segment_file.write(LENGTH_PREFIX.pack(len(payload)) + payload)
+            self._segment_file.flush()
+            # 先落盘区块数据再写索引，崩溃时最多留下未被索引的尾部数据
+            self._index_file.write(INDEX_RECORD.pack(self._segment_id, offset, len(payload), block_hash))
+            self._index_file.flush()
+
+            height = self._count
+            self._count += 1
+            self._remap()
+            if self._hash_index is not None:
+                self._hash_index[block_hash] = height
+            self._remember(height, block)
+            return height
+
+    def _remember(self, height: int, block: Block) -> None:
+        self._cache[height] = block
+        self._cache.move_to_end(height)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, height: int) -> Block:
+        """按高度读取区块"""
+        with self._lock:
+            if not 0 <= height < self._count:
+                raise IndexError(f"Block height out of range: {height}")
+            block = self._cache.get(height)
+            if block is not None:
+                self._cache.move_to_end(height)
+                return block
+
+            segment_id, offset, length, _ = self._record(height)
+            reader = self._readers.get(segment_id)
+            if reader is None:
+                reader = self._readers[segment_id] = open(self._segment_path(segment_id), "rb")
+            reader.seek(offset + LENGTH_PREFIX.size)
+            block = Block.model_validate(json.loads(reader.read(length)))
+            self._remember(height, block)
+            return block
+
+    def height_of(self, block_hash: str) -> Optional[int]:
+        """按区块哈希查询高度"""
+        with self._lock:
+            if self._hash_index is None:
+                self._hash_index = {self._record(height)[3]: height for height in range(self._count)}
+            return self._hash_index.get(bytes.fromhex(block_hash))
+
+    def get_by_hash(self, block_hash: str) -> Optional[Block]:
+        height = self.height_of(block_hash)
+        return self.get(height) if height is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._segment_file.close()
+            self._index_file.close()
+
+
+class PersistentChain(Sequence):
+    """以 BlockStore 为后端、与区块列表用法一致的链视图（支持 len、下标、切片、迭代、append）"""
+
+    def __init__(self, store: BlockStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.store.get(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self.store.get(index)
+
+    def append(self, block: Block) -> None:
+        self.store.append(block)
@@ -3,10 +3,10 @@
 实现区块链的主链维护逻辑，确保区块哈希链接的正确性
 """
 
-import json
 import time
 from typing import List, Optional
 from .types import Block, Transaction, Account, calculate_hash, get_merkle_root
+from .validator import ChainValidator, header_block_hash
 
 
 class PublicKeyRegistry:
@@ -45,6 +45,7 @@ class Blockchain:
     
     def __init__(self):
         self.chain: List[Block] = []
+        self.validator = ChainValidator(header_block_hash)
         self._create_genesis_block()
     
     def _create_genesis_block(self) -> None:
@@ -78,9 +79,7 @@ class Blockchain:
             str: 区块哈希值
         """
         # 将区块头转换为字符串进行哈希计算
-        header_dict = block.header.model_dump()
-        header_json = json.dumps(header_dict, sort_keys=True, separators=(',', ':'))
-        return calculate_hash(header_json)
+        return header_block_hash(block)
     
     def add_block(self, block: Block) -> bool:
         """
@@ -125,29 +124,9 @@ class Blockchain:
     def is_valid_chain(self) -> bool:
         """
         验证整个区块链的有效性
+        只校验上次校验通过之后新增的区块，区块哈希与Merkle根在进程池中并行重算
         
         Returns:
             bool: 验证通过返回True，否则返回False
         """
-        # 从第二个区块开始验证（跳过创世区块）
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
-            
-            # 验证区块哈希
-            if current_block.hash != self._calculate_block_hash(current_block):
-                print(f"Invalid hash at block {i}")
-                return False
-            
-            # 验证previous_hash链接
-            if current_block.header.previous_hash != previous_block.hash:
-                print(f"Invalid previous hash at block {i}")
-                return False
-            
-            # 验证Merkle根
-            calculated_merkle_root = get_merkle_root(current_block.transactions)
-            if current_block.header.merkle_root != calculated_merkle_root:
-                print(f"Invalid Merkle root at block {i}")
-                return False
-        
-        return True
\ No newline at end of file
+        return self.validator.validate(self.chain)["valid"]
@@ -5,11 +5,15 @@ ChainClient - 区块链客户端
 
 import json
 import hashlib
-from typing import Optional, Dict, Any, List
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 from ecdsa import SigningKey
-from ecdsa.util import sigencode_der
 
-from core.types import Transaction, Block
+from core import crypto
+from core.signature import transaction_digest
+from core.state_tree import SparseMerkleTree, account_key, account_value_hash
+from core.types import Account, Transaction, Block, MerkleTree, transaction_leaf_hash
 from core.state import world_state
 
 
@@ -19,6 +23,10 @@ class ChainClient:
     为 Agent 提供与区块链交互的高层接口
     """
     
+    # 按发送者串行化“取 nonce → 签名 → 入池”，所有客户端实例共享
+    _sender_locks: Dict[str, threading.RLock] = {}
+    _sender_locks_guard = threading.Lock()
+    
     def __init__(self, blockchain):
         """
         初始化区块链客户端
@@ -40,6 +48,70 @@ class ChainClient:
         """
         return self.blockchain.add_transaction(tx)
     
+    @classmethod
+    def sender_lock(cls, sender: str) -> threading.RLock:
+        """
+        获取发送者的交易锁
+        
+        同一发送者可能被多个线程同时使用（如并发运行的 DAO 共用金库），
+        持有该锁完成 create_transaction 与提交，才能保证两笔交易不会取到同一个 nonce
+        """
+        with cls._sender_locks_guard:
+            return cls._sender_locks.setdefault(sender, threading.RLock())
+    
+    def create_and_submit(self, tx_type: str, sender: str, data: Dict[str, Any], private_key: SigningKey,
+                          gas_price: int = 1, gas_limit: int = 200) -> Future:
+        """
+        创建、签名并提交交易（同一发送者的交易按顺序分配 nonce）
+        
+        Returns:
+            Future: 结果为交易回执（见 submit_transaction）
+        """
+        with self.sender_lock(sender):
+            tx = self.create_transaction(tx_type, sender, data, private_key, gas_price, gas_limit)
+            return self.submit_transaction(tx)
+    
+    def submit_transaction(self, tx: Transaction) -> Future:
+        """
+        提交交易并返回回执 Future
+        
+        区块链上有运行中的 BlockProducer 时由其按策略出块；否则立即出块，返回已完成的 Future
+        
+        Args:
+            tx: 已签名的交易对象
+        
+        Returns:
+            Future: 结果为交易回执（见 get_transaction_receipt）
+        """
+        producer = getattr(self.blockchain, "producer", None)
+        if producer is not None and producer.running:
+            return producer.submit(tx)
+        
+        future = Future()
+        tx_hash = transaction_digest(tx)
+        if self.send_transaction(tx):
+            self.mine_block()
+        future.set_result(self.get_transaction_receipt(tx_hash) or {
+            "tx_hash": tx_hash,
+            "block_number": None,
+            "block_hash": None,
+            "success": False
+        })
+        return future
+    
+    def send_transactions(self, txs: List[Transaction], processes: Optional[int] = None) -> List[bool]:
+        """
+        批量发送交易到区块链（签名在进程池中并行校验）
+        
+        Args:
+            txs: 已签名的交易列表
+            processes: 校验签名的进程数，默认 CPU 核数
+        
+        Returns:
+            List[bool]: 每笔交易是否成功添加到交易池
+        """
+        return self.blockchain.add_transactions(txs, processes)
+    
     def mine_block(self) -> Optional[Block]:
         """
         触发出块（打包当前交易池中的交易）
@@ -49,30 +121,52 @@ class ChainClient:
         """
         return self.blockchain.mine_block()
     
-    def send_and_mine(self, tx: Transaction, silent: bool = False) -> bool:
+    def send_and_mine(self, tx: Transaction, silent: bool = False, timeout: Optional[float] = 30) -> bool:
         """
         发送交易并立即触发出块（适用于测试/开发环境）
         
         Args:
             tx: 已签名的交易对象
+            timeout: 有后台出块器时等待出块的超时时间（秒）
         
         Returns:
-            bool: 交易是否成功上链
-        """
+            bool: 交易是否成功上链（等待超时或出块出错时为 False）
+        """
+        # 有后台出块器时等待交易随其他交易一起出块
+        producer = getattr(self.blockchain, "producer", None)
+        if producer is not None and producer.running:
+            try:
+                receipt = producer.submit(tx).result(timeout)
+            except FutureTimeoutError:
+                if not silent:
+                    print(f"❌ 等待出块超时: {tx.tx_type}")
+                return False
+            except Exception as e:
+                if not silent:
+                    print(f"❌ 出块失败: {e}")
+                return False
+            if not silent:
+                if receipt["success"]:
+                    print(f"✅ 交易已上链: Block #{receipt['block_number']}, TX: {tx.tx_type}")
+                else:
+                    print(f"❌ 交易上链失败: {tx.tx_type}")
+            return receipt["success"]
+        
         # 1. 提交交易到交易池
         if not self.send_transaction(tx):
             if not silent:
                 print(f"❌ 交易提交失败: {tx.tx_type}")
             return False
         
-        # 2. 立即触发出块
-        block = self.mine_block()
-        if block is None:
+        # 2. 立即触发出块（并发运行时交易可能已随其他线程的区块上链，以回执为准）
+        self.mine_block()
+        receipt = self.blockchain.get_receipt(transaction_digest(tx))
+        if receipt is None or not receipt.success:
             if not silent:
-                print("❌ 出块失败")
+                print("❌ 出块失败" if receipt is None else f"❌ 交易上链失败: {tx.tx_type}")
             return False
         if not silent:
-            print(f"✅ 交易已上链: Block #{block.header.index}, TX: {tx.tx_type}")
+            print(f"✅ 交易已上链: Block #{receipt.block_number}, TX: {tx.tx_type}")
         return True
     
     def get_account(self, address: str):
@@ -113,6 +207,95 @@ class ChainClient:
         account = self.get_account(address)
         return account.stake if account else 0
     
+    def get_account_proof(self, address: str) -> Dict[str, Any]:
+        """
+        获取账户状态证明（账户不存在时为非成员证明）
+        
+        Args:
+            address: 账户地址
+        
+        Returns:
+            Dict: address、account、state_root、siblings、leaf、block_number、block_state_root
+        """
+        return self.blockchain.get_account_proof(address)
+    
+    @staticmethod
+    def verify_account_proof(proof: Dict[str, Any], state_root: Optional[str] = None) -> bool:
+        """
+        校验账户状态证明
+        
+        Args:
+            proof: get_account_proof 的返回值
+            state_root: 信任的状态根（如区块头中的 state_root），默认使用证明中的 state_root
+        
+        Returns:
+            bool: 证明是否有效
+        """
+        account = proof.get("account")
+        value = account_value_hash(Account(**account)) if account else None
+        return SparseMerkleTree.verify_proof(
+            state_root or proof["state_root"], account_key(proof["address"]), value, proof
+        )
+    
+    def get_transaction_proofs(self, locations: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """
+        批量获取交易的Merkle证明（来自出块时缓存的Merkle树）
+        
+        Args:
+            locations: (区块高度, 交易序号) 列表
+        
+        Returns:
+            List[Dict]: block_index、tx_index、transaction_hash、merkle_root、proof_path
+        """
+        return self.blockchain.get_transaction_proofs(locations)
+    
+    @staticmethod
+    def verify_transaction_proof(proof: Dict[str, Any], merkle_root: Optional[str] = None,
+                                 tx: Optional[Transaction] = None) -> bool:
+        """
+        校验单笔交易的Merkle证明
+        
+        Args:
+            proof: get_transaction_proofs 或 /api/merkle-proof 返回的证明
+            merkle_root: 信任的Merkle根（如已核对过的区块头），默认使用证明中的 merkle_root
+            tx: 交易本身；提供时同时校验证明中的叶子确实是这笔交易
+        
+        Returns:
+            bool: 证明是否有效
+        """
+        return ChainClient.verify_transaction_proofs(
+            [proof], None if merkle_root is None else {proof["block_index"]: merkle_root},
+            None if tx is None else [tx],
+        )[0]
+    
+    @staticmethod
+    def verify_transaction_proofs(proofs: Sequence[Dict[str, Any]],
+                                  merkle_roots: Optional[Dict[int, str]] = None,
+                                  transactions: Optional[Sequence[Transaction]] = None) -> List[bool]:
+        """
+        批量校验交易的Merkle证明，各证明共同的上层节点只计算一次
+        （同一区块的 n 笔交易全部校验时约为 2n 次哈希，而不是 n·log n 次）
+        
+        Args:
+            proofs: get_transaction_proofs 或 POST /api/merkle-proofs 返回的证明列表
+            merkle_roots: 区块高度 -> 信任的Merkle根，未提供的区块使用证明中的 merkle_root
+            transactions: 与 proofs 一一对应的交易；提供时同时校验叶子哈希
+        
+        Returns:
+            List[bool]: 与 proofs 一一对应的校验结果
+        """
+        merkle_roots = merkle_roots or {}
+        cache: Dict[Tuple[str, str], str] = {}
+        results = []
+        for position, proof in enumerate(proofs):
+            leaf = proof["transaction_hash"]
+            if transactions is not None and transaction_leaf_hash(transactions[position]) != leaf:
+                results.append(False)
+                continue
+            root = merkle_roots.get(proof.get("block_index"), proof["merkle_root"])
+            results.append(MerkleTree.verify_proof(leaf, proof["proof_path"], root, cache))
+        return results
+    
     def get_block_height(self) -> int:
         """
         获取当前区块链高度
@@ -176,7 +359,7 @@ class ChainClient:
         tx_hash = calculate_hash(tx_json)
         
         # 2. 使用私钥签名（tx_hash 是十六进制字符串，需要转为字节）
-        signature = private_key.sign_digest(bytes.fromhex(tx_hash), sigencode=sigencode_der)
+        signature = crypto.provider.sign_digest(private_key, bytes.fromhex(tx_hash))
         
         # 3. 返回十六进制编码
         return signature.hex()
@@ -191,6 +374,9 @@ class ChainClient:
         """
         创建并签名一个交易
         
+        nonce 排在该发送者已入池的交易之后；多个线程共用同一发送者时，
+        须持有 sender_lock(sender) 直到交易入池（或直接使用 create_and_submit）
+        
         Args:
             tx_type: 交易类型（vote, stake, transfer等）
             sender: 发送者地址
@@ -202,16 +388,18 @@ class ChainClient:
         Returns:
             Transaction: 已签名的交易对象
         """
-        # 获取发送者账户的 nonce
+        # 获取发送者账户的 nonce（排在该发送者已入池的交易之后）
         account = self.get_account(sender)
         if account is None:
             raise ValueError(f"账户不存在: {sender}")
+        with self.blockchain.lock:
+            nonce = self.blockchain.mempool.next_nonce(sender, account.nonce)
         
         # 创建交易对象
         tx = Transaction(
             tx_type=tx_type,
             sender=sender,
-            nonce=account.nonce,
+            nonce=nonce,
             gas_price=gas_price,
             gas_limit=gas_limit,
             data=data,
@@ -225,27 +413,36 @@ class ChainClient:
     
     def wait_for_receipt(self, tx_hash: str, timeout: int = 30) -> Optional[Dict]:
         """
-        等待交易回执（用于异步场景）
+        等待交易回执
         
-        注意：当前实现是同步的，此方法主要用于API兼容性
+        有运行中的 BlockProducer 时等待交易出块；否则直接查询回执索引
         
         Args:
-            tx_hash: 交易哈希
+            tx_hash: 交易哈希（不含签名的交易哈希，见 core.signature.transaction_digest）
             timeout: 超时时间（秒）
         
         Returns:
-            Optional[Dict]: 交易回执
-        """
-        # TODO: 实现异步等待逻辑
-        # 当前版本由于是即时出块，可以直接返回最新区块信息
-        latest_block = self.get_latest_block()
-        if latest_block:
-            return {
-                "block_number": latest_block.header.index,
-                "block_hash": latest_block.hash,
-                "success": True
-            }
-        return None
+            Optional[Dict]: 交易回执，超时或未找到时返回 None
+        """
+        producer = getattr(self.blockchain, "producer", None)
+        if producer is not None:
+            receipt = producer.wait_for_receipt(tx_hash, timeout)
+            if receipt is not None:
+                return receipt
+        return self.get_transaction_receipt(tx_hash)
+    
+    def get_transaction_receipt(self, tx_hash: str) -> Optional[Dict]:
+        """
+        查询交易回执（按交易哈希 O(1) 查找，失败的交易同样有回执）
+        
+        Args:
+            tx_hash: 交易哈希（不含签名的交易哈希，见 core.signature.transaction_digest）
+        
+        Returns:
+            Optional[Dict]: 回执，包含 success、gas_used、block_number、logs、error 等字段；交易尚未出块时返回 None
+        """
+        receipt = self.blockchain.get_receipt(tx_hash)
+        return receipt.model_dump() if receipt else None
     
     def get_events(self, contract_name: str = "ops_contract", 
                    event_name: Optional[str] = None,
@@ -309,6 +506,7 @@ class ChainClient:
             "block_height": self.get_block_height(),
             "pending_transactions": len(self.get_pending_transactions()),
             "latest_block_hash": self.get_latest_block().hash if self.get_latest_block() else None,
+            "state_root": self.get_latest_block().header.state_root if self.get_latest_block() else None,
             "chain_id": "mABC-DAO-Chain"
         }
     
@@ -0,0 +1,140 @@
+"""
+密码学后端
+对签名、验签与地址推导做一层抽象，导入时选择可用的最快实现：
+- cryptography: 基于 OpenSSL 的 SECP256k1 实现
+- ecdsa: 纯 Python 实现(始终可用，作为兜底)
+
+两种后端均产生/接受 DER 编码的签名，与链上已有签名逐字节兼容；
+钱包私钥仍以 ecdsa.SigningKey(PEM) 形式保存，由后端按需转换。
+可通过环境变量 MABC_CRYPTO_BACKEND=ecdsa|cryptography 强制指定后端。
+各后端的签名/验签吞吐量可用 mABC 目录下的 bench_crypto.py 测量。
+"""
+
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from ecdsa import SigningKey, VerifyingKey, SECP256k1, BadSignatureError, ellipticcurve
+from ecdsa.util import sigencode_der, sigdecode_der
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+except ImportError:  # 可选依赖
+    ec = None
+
+
+class CryptoProvider(ABC):
+    """密码学后端接口，公钥统一使用 ecdsa 的 64 字节 raw 编码(x || y)的十六进制"""
+
+    name = "base"
+
+    @abstractmethod
+    def sign_digest(self, private_key: SigningKey, digest: bytes) -> bytes:
+        """对 32 字节摘要签名，返回 DER 编码的签名"""
+
+    @abstractmethod
+    def verify_digest(self, public_key_hex: str, signature: bytes, digest: bytes) -> bool:
+        """校验 DER 签名，签名无效时返回 False"""
+
+    def address_from_public_key(self, public_key: bytes) -> str:
+        """根据公钥生成账户地址：SHA256 后取前 20 个字节"""
+        return hashlib.sha256(public_key).digest()[:20].hex()
+
+
+class EcdsaProvider(CryptoProvider):
+    """纯 Python ecdsa 实现"""
+
+    name = "ecdsa"
+
+    def __init__(self):
+        # 公钥十六进制 -> 开启了预计算的 VerifyingKey
+        self._public_keys: Dict[str, VerifyingKey] = {}
+
+    def load_public_key(self, public_key_hex: str) -> VerifyingKey:
+        vk = self._public_keys.get(public_key_hex)
+        if vk is None:
+            point = VerifyingKey.from_string(bytes.fromhex(public_key_hex), curve=SECP256k1).pubkey.point
+            # from_string 得到的点不携带阶，无法建立预计算表，需带上曲线阶重新构造
+            vk = VerifyingKey.from_public_point(
+                ellipticcurve.Point(SECP256k1.curve, point.x(), point.y(), SECP256k1.order),
+                curve=SECP256k1,
+            )
+            vk.precompute()
+            self._public_keys[public_key_hex] = vk
+        return vk
+
+    def sign_digest(self, private_key: SigningKey, digest: bytes) -> bytes:
+        return private_key.sign_digest(digest, sigencode=sigencode_der)
+
+    def verify_digest(self, public_key_hex: str, signature: bytes, digest: bytes) -> bool:
+        try:
+            return self.load_public_key(public_key_hex).verify_digest(signature, digest, sigdecode=sigdecode_der)
+        except BadSignatureError:
+            return False
+
+
+class CryptographyProvider(CryptoProvider):
+    """基于 cryptography(OpenSSL) 的实现"""
+
+    name = "cryptography"
+
+    def __init__(self):
+        self._curve = ec.SECP256K1()
+        self._algorithm = ec.ECDSA(Prehashed(hashes.SHA256()))
+        self._public_keys: Dict[str, "ec.EllipticCurvePublicKey"] = {}
+        # 按公钥(raw 编码)缓存转换后的私钥，不以私钥秘密值作为字典键
+        self._private_keys: Dict[bytes, "ec.EllipticCurvePrivateKey"] = {}
+
+    def load_public_key(self, public_key_hex: str) -> "ec.EllipticCurvePublicKey":
+        public_key = self._public_keys.get(public_key_hex)
+        if public_key is None:
+            # ecdsa 的 raw 编码补上 0x04 前缀即为未压缩点编码
+            public_key = ec.EllipticCurvePublicKey.from_encoded_point(
+                self._curve, b"\x04" + bytes.fromhex(public_key_hex)
+            )
+            self._public_keys[public_key_hex] = public_key
+        return public_key
+
+    def _load_private_key(self, private_key: SigningKey) -> "ec.EllipticCurvePrivateKey":
+        public_key = private_key.get_verifying_key().to_string()
+        key = self._private_keys.get(public_key)
+        if key is None:
+            key = ec.derive_private_key(private_key.privkey.secret_multiplier, self._curve)
+            self._private_keys[public_key] = key
+        return key
+
+    def sign_digest(self, private_key: SigningKey, digest: bytes) -> bytes:
+        return self._load_private_key(private_key).sign(digest, self._algorithm)
+
+    def verify_digest(self, public_key_hex: str, signature: bytes, digest: bytes) -> bool:
+        try:
+            self.load_public_key(public_key_hex).verify(signature, digest, self._algorithm)
+            return True
+        except InvalidSignature:
+            return False
+
+
+BACKENDS = {EcdsaProvider.name: EcdsaProvider}
+if ec is not None:
+    BACKENDS[CryptographyProvider.name] = CryptographyProvider
+
+
+def get_provider(name: Optional[str] = None) -> CryptoProvider:
+    """按名称创建后端；未指定时优先使用 cryptography"""
+    name = name or os.getenv("MABC_CRYPTO_BACKEND")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown or unavailable crypto backend: {name}")
+        return BACKENDS[name]()
+    if CryptographyProvider.name in BACKENDS:
+        return CryptographyProvider()
+    return EcdsaProvider()
+
+
+# 导入时选定的全局后端
+provider = get_provider()
+
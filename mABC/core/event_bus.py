@@ -0,0 +1,230 @@
+"""
+进程内事件总线
+Agent 推理过程（ReActTotRun）、奖励发放（DAOExecutor）、出块（VM）和合约事件
+（OpsSOPContract._emit_event）直接发布到这里，不再从 stdout 中匹配关键字还原：
+- 每条事件带单调递增的序号 seq，推送通道（/api/events/stream）按 seq 续传
+- 全局与每次运行（run_id）各有一个有界环形缓冲区，查询时无需合并、排序
+- 控制台输出是总线的一个订阅者（console_printer）
+"""
+
+import threading
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, ClassVar, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+DEFAULT_CAPACITY = 1000      # 全局保留的最近事件数量
+DEFAULT_RUN_CAPACITY = 1000  # 每次运行保留的最近事件数量
+DEFAULT_MAX_RUNS = 20        # 保留最近多少次运行的事件
+MAX_OBSERVATION_LENGTH = 2000  # 工具返回结果在事件中保留的最大长度
+
+# 当前线程正在执行的运行（见 run_in_channel），发布的事件自动归入该运行
+current_run_id: ContextVar[Optional[str]] = ContextVar("current_run_id", default=None)
+
+
+class BusEvent(BaseModel):
+    """类型化事件基类，log_type 不为 None 的事件显示在控制台的实时日志流中"""
+    log_type: ClassVar[Optional[str]] = None
+
+    run_id: Optional[str] = None
+    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+
+    def content(self) -> str:
+        """单行文本，用于控制台输出与前端展示"""
+        return ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": type(self).__name__, "log_type": self.log_type, "content": self.content(), **self.model_dump()}
+
+
+class AgentThought(BusEvent):
+    log_type: ClassVar[Optional[str]] = "thought"
+    agent: str
+    thought: str
+
+    def content(self) -> str:
+        return f"Thought: {self.thought}"
+
+
+class ToolCall(BusEvent):
+    log_type: ClassVar[Optional[str]] = "action"
+    agent: str
+    tool: str
+    tool_input: str
+
+    def content(self) -> str:
+        return f"🔍 action: {self.tool}({self.tool_input})"
+
+
+class Observation(BusEvent):
+    log_type: ClassVar[Optional[str]] = "observation"
+    agent: str
+    tool: str
+    result: str
+
+    def content(self) -> str:
+        return f"Observation: {self.result}"
+
+
+class FinalAnswer(BusEvent):
+    log_type: ClassVar[Optional[str]] = "answer"
+    agent: str
+    answer: str
+
+    def content(self) -> str:
+        return f"Final Answer: {self.answer}"
+
+
+class RewardSent(BusEvent):
+    log_type: ClassVar[Optional[str]] = "reward"
+    to: str
+    amount: int
+    reputation: int
+    success: bool
+    block_number: Optional[int] = None
+    memo: str = ""
+    error: Optional[str] = None
+
+    def content(self) -> str:
+        short_addr = f"{self.to[:6]}...{self.to[-4:]}"
+        block = self.block_number if self.block_number is not None else "-"
+        error = f", error={self.error}" if self.error else ""
+        return (f"奖励发送: to={short_addr}, token={self.amount}, rep={self.reputation}, "
+                f"success={self.success}, onchain_block={block}{error}")
+
+
+class BlockMined(BusEvent):
+    block_number: int
+    block_hash: str
+    transactions: int
+
+    def content(self) -> str:
+        return f"New block mined: #{self.block_number} with {self.transactions} transactions"
+
+
+EVENT_TYPES = {cls.__name__ for cls in (AgentThought, ToolCall, Observation, FinalAnswer, RewardSent, BlockMined)}
+
+
+class EventBus:
+    """
+    线程安全的发布/订阅总线
+
+    Args:
+        capacity: 全局环形缓冲区大小，更早的事件被丢弃
+        run_capacity: 每次运行的环形缓冲区大小
+        max_runs: 保留事件的运行数量，更早的运行整体丢弃
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, run_capacity: int = DEFAULT_RUN_CAPACITY,
+                 max_runs: int = DEFAULT_MAX_RUNS):
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=capacity)
+        self._runs: "OrderedDict[str, deque]" = OrderedDict()
+        self.run_capacity = run_capacity
+        self.max_runs = max_runs
+        self._seq = 0
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    @property
+    def last_seq(self) -> int:
+        """最近一条事件的序号，尚无事件时为 0"""
+        return self._seq
+
+    def publish(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """发布事件，返回带 seq 的事件副本；未指定 run_id 时归入当前运行"""
+        with self._lock:
+            self._seq += 1
+            event = {**event, "seq": self._seq}
+            if event.get("run_id") is None:
+                event["run_id"] = current_run_id.get()
+            self._events.append(event)
+            run_id = event["run_id"]
+            if run_id is not None:
+                channel = self._runs.get(run_id)
+                if channel is None:
+                    channel = self._runs[run_id] = deque(maxlen=self.run_capacity)
+                    while len(self._runs) > self.max_runs:
+                        self._runs.popitem(last=False)
+                channel.append(event)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Event listener failed: {e}")
+        return event
+
+    def emit(self, event: BusEvent) -> Dict[str, Any]:
+        """发布类型化事件"""
+        return self.publish(event.to_dict())
+
+    def since(self, seq: int = 0, limit: Optional[int] = None, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        序号大于 seq 的事件（按发布顺序）
+
+        Args:
+            seq: 客户端已收到的最后一条事件序号
+            limit: 最多返回的事件数（取最早的 limit 条，便于分批续传）
+            run_id: 只返回该运行的事件
+        """
+        with self._lock:
+            if run_id is not None:
+                channel = self._runs.get(run_id, ())
+                # 单次运行的序号不连续，从尾部向前找到起点
+                start = len(channel)
+                while start > 0 and channel[start - 1]["seq"] > seq:
+                    start -= 1
+                events = channel
+            else:
+                if not self._events:
+                    return []
+                # 全局缓冲区中的序号连续，可直接定位起点
+                start = max(0, seq - self._events[0]["seq"] + 1)
+                events = self._events
+            end = len(events) if limit is None else min(len(events), start + limit)
+            return [events[i] for i in range(start, end)]
+
+    def recent(self, limit: int = 100, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """最近的 limit 条事件（按发布顺序）"""
+        with self._lock:
+            events = self._events if run_id is None else self._runs.get(run_id, ())
+            start = max(0, len(events) - limit)
+            return [events[i] for i in range(start, len(events))]
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """注册监听器，在发布线程中被调用，应尽快返回"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def clear(self) -> None:
+        """清空已保存的事件，序号继续递增，客户端续传不受影响"""
+        with self._lock:
+            self._events.clear()
+            self._runs.clear()
+
+
+def run_in_channel(run_id: str, fn: Callable, *args, **kwargs):
+    """在当前线程中以 run_id 执行 fn，其间发布的事件归入该运行的通道"""
+    token = current_run_id.set(run_id)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        current_run_id.reset(token)
+
+
+def console_printer(event: Dict[str, Any]) -> None:
+    """控制台订阅者：打印类型化事件"""
+    if event.get("type") in EVENT_TYPES:
+        print(event["content"])
+
+
+# 单例模式的事件总线实例
+event_bus = EventBus()
+event_bus.subscribe(console_printer)
@@ -0,0 +1,244 @@
+"""
+交易池(mempool)
+- 每个发送者维护一个按 nonce 连续排列的队列，允许同一发送者在一个区块内排队多笔交易
+- 不同发送者之间按 gas_price 排序(价格相同时先到先得)，出块时依次取出可执行交易
+- 同 nonce 的交易需提高足够的 gas_price 才能替换；完全相同的交易直接拒绝
+- 池满时淘汰价格最低的队尾交易，保证各发送者队列仍然连续
+
+插入与弹出均为 O(log n)：两个堆分别索引各发送者的队首(出块)与队尾(淘汰)，
+堆中的过期条目在弹出时惰性丢弃；队尾堆只在池满时弹出，过期条目多于有效条目时整体重建。
+"""
+
+import heapq
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .types import Transaction
+
+DEFAULT_MAX_SIZE = 4096          # 池内交易总数上限
+DEFAULT_MAX_PER_SENDER = 64      # 单个发送者排队交易上限
+REPLACE_PRICE_BUMP = 10          # 替换同 nonce 交易时 gas_price 至少提高的百分比
+
+
+class SenderQueue:
+    """单个发送者的交易队列，nonce 从 base 开始连续"""
+
+    def __init__(self, base: int):
+        self.base = base
+        self.entries: Dict[int, Tuple[int, Transaction]] = {}  # nonce -> (seq, tx)
+        self.cost = 0  # 队列内交易的 Gas 总额
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def next_nonce(self) -> int:
+        return self.base + len(self.entries)
+
+    @property
+    def tail_nonce(self) -> int:
+        return self.next_nonce - 1
+
+
+class Mempool:
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, max_per_sender: int = DEFAULT_MAX_PER_SENDER):
+        self.max_size = max_size
+        self.max_per_sender = max_per_sender
+        self._queues: Dict[str, SenderQueue] = {}
+        self._size = 0
+        self.total_gas = 0  # 池内交易 gas_limit 总和
+        self._seq = count()
+        # 队首堆: (-gas_price, seq, sender, nonce)，最高价优先
+        self._heads: List[Tuple[int, int, str, int]] = []
+        # 队尾堆: (gas_price, -seq, sender, nonce)，最低价且最晚到达的先淘汰
+        self._tails: List[Tuple[int, int, str, int]] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Transaction]:
+        """按发送者、nonce 顺序遍历池内交易(不改变交易池)"""
+        for queue in self._queues.values():
+            for nonce in range(queue.base, queue.next_nonce):
+                yield queue.entries[nonce][1]
+
+    def __contains__(self, tx: Transaction) -> bool:
+        queue = self._queues.get(tx.sender)
+        return queue is not None and tx.nonce in queue.entries and queue.entries[tx.nonce][1] == tx
+
+    def next_nonce(self, sender: str, account_nonce: int) -> int:
+        """发送者下一笔可排队交易的 nonce"""
+        queue = self._queues.get(sender)
+        return queue.next_nonce if queue else account_nonce
+
+    def pending_cost(self, sender: str) -> int:
+        """发送者已排队交易占用的 Gas 总额"""
+        queue = self._queues.get(sender)
+        return queue.cost if queue else 0
+
+    def _is_current(self, sender: str, nonce: int, seq: int) -> bool:
+        queue = self._queues.get(sender)
+        return queue is not None and nonce in queue.entries and queue.entries[nonce][0] == seq
+
+    def _push_head(self, sender: str, queue: SenderQueue) -> None:
+        seq, tx = queue.entries[queue.base]
+        heapq.heappush(self._heads, (-tx.gas_price, seq, sender, queue.base))
+
+    def _is_tail(self, sender: str, nonce: int, seq: int) -> bool:
+        return self._is_current(sender, nonce, seq) and nonce == self._queues[sender].tail_nonce
+
+    def _push_tail(self, sender: str, queue: SenderQueue) -> None:
+        seq, tx = queue.entries[queue.tail_nonce]
+        heapq.heappush(self._tails, (tx.gas_price, -seq, sender, queue.tail_nonce))
+        # 每个发送者只有一个有效队尾条目，过期条目过多时重建，均摊 O(1)
+        if len(self._tails) > 2 * len(self._queues):
+            self._tails = [entry for entry in self._tails if self._is_tail(entry[2], entry[3], -entry[1])]
+            heapq.heapify(self._tails)
+
+    def _remove(self, sender: str, nonce: int) -> Transaction:
+        queue = self._queues[sender]
+        _, tx = queue.entries.pop(nonce)
+        queue.cost -= tx.gas_price * tx.gas_limit
+        self._size -= 1
+        self.total_gas -= tx.gas_limit
+        if not queue.entries:
+            del self._queues[sender]
+            if not self._queues:
+                # 池已清空，堆中剩下的都是过期条目
+                self._heads.clear()
+                self._tails.clear()
+        return tx
+
+    def _evict_cheapest(self, min_price: int) -> bool:
+        """淘汰价格低于 min_price 的最便宜队尾交易，没有可淘汰的交易时返回 False"""
+        while self._tails:
+            price, neg_seq, sender, nonce = self._tails[0]
+            if not self._is_tail(sender, nonce, -neg_seq):
+                heapq.heappop(self._tails)
+                continue
+            if price >= min_price:
+                return False
+            heapq.heappop(self._tails)
+            self._remove(sender, nonce)
+            print(f"Evicted transaction from pool: {sender[:8]}... nonce {nonce}")
+            if sender in self._queues:
+                self._push_tail(sender, self._queues[sender])
+            return True
+        return False
+
+    def add(self, tx: Transaction, account_nonce: int) -> bool:
+        """
+        加入交易池
+
+        Args:
+            tx: 已通过签名/余额校验的交易
+            account_nonce: 发送者在世界状态中的当前 nonce
+
+        Returns:
+            bool: 是否加入(或替换)成功
+        """
+        sender = tx.sender
+        queue = self._queues.get(sender)
+
+        # 1. 替换已排队的同 nonce 交易
+        if queue and queue.base <= tx.nonce < queue.next_nonce:
+            seq, old_tx = queue.entries[tx.nonce]
+            if old_tx == tx:
+                print("Duplicate transaction")
+                return False
+            if tx.gas_price * 100 < old_tx.gas_price * (100 + REPLACE_PRICE_BUMP):
+                print(f"Replacement gas price too low. Need at least {REPLACE_PRICE_BUMP}% above {old_tx.gas_price}")
+                return False
+            new_seq = next(self._seq)
+            queue.entries[tx.nonce] = (new_seq, tx)
+            queue.cost += tx.gas_price * tx.gas_limit - old_tx.gas_price * old_tx.gas_limit
+            self.total_gas += tx.gas_limit - old_tx.gas_limit
+            if tx.nonce == queue.base:
+                self._push_head(sender, queue)
+            if tx.nonce == queue.tail_nonce:
+                self._push_tail(sender, queue)
+            return True
+
+        # 2. 追加到队尾，nonce 必须连续
+        expected = self.next_nonce(sender, account_nonce)
+        if tx.nonce != expected:
+            print(f"Invalid nonce. Expected {expected}, got {tx.nonce}")
+            return False
+        if queue and len(queue) >= self.max_per_sender:
+            print(f"Too many pending transactions for sender. Limit is {self.max_per_sender}")
+            return False
+        if self._size >= self.max_size and not self._evict_cheapest(tx.gas_price):
+            print("Transaction pool is full")
+            return False
+
+        queue = self._queues.get(sender)
+        if tx.nonce != self.next_nonce(sender, account_nonce):
+            # 被淘汰的恰好是该发送者自己的队尾，追加后会出现 nonce 断档
+            print(f"Invalid nonce after eviction. Expected {self.next_nonce(sender, account_nonce)}, got {tx.nonce}")
+            return False
+        if queue is None:
+            queue = self._queues[sender] = SenderQueue(tx.nonce)
+        queue.entries[tx.nonce] = (next(self._seq), tx)
+        queue.cost += tx.gas_price * tx.gas_limit
+        self._size += 1
+        self.total_gas += tx.gas_limit
+        if tx.nonce == queue.base:
+            self._push_head(sender, queue)
+        self._push_tail(sender, queue)
+        return True
+
+    def peek(self) -> Optional[Transaction]:
+        """查看当前价格最高的可执行交易，不取出"""
+        while self._heads:
+            _, seq, sender, nonce = self._heads[0]
+            if self._is_current(sender, nonce, seq) and nonce == self._queues[sender].base:
+                return self._queues[sender].entries[nonce][1]
+            heapq.heappop(self._heads)
+        return None
+
+    def pop(self) -> Optional[Transaction]:
+        """取出当前价格最高的可执行交易(各发送者的队首)"""
+        if self.peek() is None:
+            return None
+        _, _, sender, nonce = heapq.heappop(self._heads)
+        tx = self._remove(sender, nonce)
+        queue = self._queues.get(sender)
+        if queue:
+            queue.base += 1
+            self._push_head(sender, queue)
+        return tx
+
+    def pop_executable(self, limit: Optional[int] = None, max_gas: Optional[int] = None) -> List[Transaction]:
+        """
+        按优先级取出交易，同一发送者的交易保持 nonce 顺序
+
+        Args:
+            limit: 最多取出的交易数
+            max_gas: 取出交易的 gas_limit 总和上限；队首交易超出时停止
+        """
+        transactions = []
+        gas_used = 0
+        while limit is None or len(transactions) < limit:
+            tx = self.peek()
+            if tx is None:
+                break
+            if max_gas is not None and transactions and gas_used + tx.gas_limit > max_gas:
+                break
+            gas_used += tx.gas_limit
+            transactions.append(self.pop())
+        return transactions
+
+    def remove_sender(self, sender: str) -> List[Transaction]:
+        """移除发送者全部排队交易(例如其前序交易执行失败导致 nonce 断档)"""
+        queue = self._queues.get(sender)
+        if not queue:
+            return []
+        removed = [self._remove(sender, nonce) for nonce in range(queue.base, queue.next_nonce)]
+        return removed
+
+    def clear(self) -> None:
+        self._queues.clear()
+        self._heads.clear()
+        self._tails.clear()
+        self._size = 0
+        self.total_gas = 0
@@ -0,0 +1,191 @@
+"""
+出块器
+在后台线程中按策略出块，取代"每笔交易立即出块"(send_and_mine)：
+- 交易池内交易数达到 max_transactions
+- 交易池内 gas_limit 总和达到 max_gas
+- 最早一笔未出块交易已等待 max_latency 秒
+任一条件满足即出块，并在交易上链(或被丢弃)时完成提交方持有的 Future。
+出块出错(如 SQLite/快照/磁盘错误)时等待中的 Future 以该异常结束，出块线程稍后继续重试，不会退出。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .signature import transaction_digest
+from .types import Block, Transaction
+
+MAX_RECEIPTS = 10000  # 保留的最近回执数量
+
+
+class BlockPolicy(BaseModel):
+    """出块策略"""
+    max_transactions: int = 1000   # 每个区块最多打包的交易数
+    max_gas: int = 1000000         # 每个区块打包交易的 gas_limit 总和上限
+    max_latency: float = 0.5       # 交易最长等待出块时间（秒）
+
+
+class BlockProducer:
+    """
+    后台出块器
+
+    用法:
+        producer = BlockProducer(blockchain).start()
+        future = producer.submit(tx)
+        receipt = future.result(timeout=5)
+        producer.stop()
+    """
+
+    def __init__(self, blockchain, policy: Optional[BlockPolicy] = None):
+        self.blockchain = blockchain
+        self.policy = policy or BlockPolicy()
+        self._cond = threading.Condition()
+        self._waiting: Dict[str, Tuple[Transaction, Future]] = {}  # tx_hash -> (交易, Future)
+        self._receipts: "OrderedDict[str, Dict]" = OrderedDict()
+        self._oldest: Optional[float] = None  # 最早一笔未出块交易的提交时间
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> "BlockProducer":
+        """启动出块线程，并注册到区块链上供 ChainClient 使用"""
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="block-producer", daemon=True)
+        self._thread.start()
+        self.blockchain.producer = self
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """停止出块线程，交易池中剩余的交易会先全部出块"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.blockchain.producer is self:
+            self.blockchain.producer = None
+
+    def submit(self, tx: Transaction) -> Future:
+        """
+        提交交易
+
+        Returns:
+            Future: 交易上链后得到回执（TransactionReceipt 的字典形式，至少包含
+                    "tx_hash", "block_number", "block_hash", "success"）；
+                    交易未能进入交易池或执行失败时 success 为 False
+        """
+        tx_hash = transaction_digest(tx)
+        future = Future()
+        # 在区块链锁内入池并登记，保证出块线程不会错过这笔交易
+        with self.blockchain.lock:
+            if not self.blockchain.add_transaction(tx):
+                future.set_result(self._receipt(tx_hash, None, False))
+                return future
+            with self._cond:
+                self._waiting[tx_hash] = (tx, future)
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                self._cond.notify()
+        return future
+
+    def wait_for_receipt(self, tx_hash: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """等待交易回执，超时或交易未知时返回 None"""
+        with self._cond:
+            if tx_hash in self._receipts:
+                return self._receipts[tx_hash]
+            waiting = self._waiting.get(tx_hash)
+        if waiting is None:
+            return None
+        try:
+            return waiting[1].result(timeout)
+        except FutureTimeoutError:
+            return None
+
+    def _receipt(self, tx_hash: str, block: Optional[Block], success: bool) -> Dict:
+        return {
+            "tx_hash": tx_hash,
+            "block_number": block.header.index if block else None,
+            "block_hash": block.hash if block else None,
+            "success": success,
+        }
+
+    def _due_in(self) -> Optional[float]:
+        """距离下一次出块的秒数，0 表示应立即出块，None 表示交易池为空"""
+        mempool = self.blockchain.mempool
+        if not mempool:
+            return None
+        if len(mempool) >= self.policy.max_transactions or mempool.total_gas >= self.policy.max_gas:
+            return 0
+        if self._oldest is None:
+            # 绕过出块器直接进入交易池的交易，从现在开始计时
+            self._oldest = time.monotonic()
+        return max(0.0, self._oldest + self.policy.max_latency - time.monotonic())
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running:
+                    due_in = self._due_in()
+                    if due_in == 0:
+                        break
+                    self._cond.wait(due_in if due_in is not None else self.policy.max_latency)
+                if not self._running and not self.blockchain.mempool:
+                    break
+            try:
+                self._produce()
+            except Exception as e:
+                print(f"Block production failed: {e}")
+                self._fail(e)
+                with self._cond:
+                    if not self._running:
+                        break
+                    # 稍后重试，避免持续出错时空转
+                    self._cond.wait(self.policy.max_latency)
+        self._resolve(None)
+
+    def _produce(self) -> None:
+        with self.blockchain.lock:
+            block = self.blockchain.mine_block(self.policy.max_transactions, self.policy.max_gas)
+            self._resolve(block)
+
+    def _fail(self, error: Exception) -> None:
+        """出块失败：等待中的交易的 Future 以异常结束，提交方不会无限等待"""
+        with self._cond:
+            waiting, self._waiting = self._waiting, {}
+            self._oldest = None
+        for _, future in waiting.values():
+            future.set_exception(error)
+
+    def _resolve(self, block: Optional[Block]) -> None:
+        """完成已出块(成功)或已离开交易池(失败)的交易的 Future"""
+        mined = {transaction_digest(tx) for tx in block.transactions} if block else set()
+        mempool = self.blockchain.mempool
+        get_receipt = getattr(self.blockchain, "get_receipt", None)
+        with self._cond:
+            for tx_hash, (tx, future) in list(self._waiting.items()):
+                chain_receipt = get_receipt(tx_hash) if get_receipt else None
+                if chain_receipt is not None:
+                    receipt = chain_receipt.model_dump()
+                elif tx_hash in mined:
+                    receipt = self._receipt(tx_hash, block, True)
+                elif tx not in mempool:
+                    receipt = self._receipt(tx_hash, None, False)
+                else:
+                    continue
+                del self._waiting[tx_hash]
+                self._receipts[tx_hash] = receipt
+                if len(self._receipts) > MAX_RECEIPTS:
+                    self._receipts.popitem(last=False)
+                future.set_result(receipt)
+            self._oldest = self._oldest if mempool else None
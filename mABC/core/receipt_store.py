@@ -0,0 +1,87 @@
+"""
+交易回执存储
+- 出块时与区块一同写入该区块处理过的全部交易（含失败交易）的回执
+- 按交易哈希（不含签名的交易摘要）查询回执，按区块高度查询该区块的全部回执
+- 持久化时保存在区块目录下的 receipts.db（SQLite），重启后仍可查询历史回执；
+  否则保存在内存中。回执不再常驻 Blockchain 的字典中，内存占用不随链长增长
+
+本模块只依赖 types，不会初始化区块链/世界状态单例
+"""
+
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+from .types import TransactionReceipt
+
+RECEIPT_STORE_FILE = "receipts.db"
+
+
+class ReceiptStore:
+    """
+    交易回执的持久化存储，线程安全
+
+    Args:
+        db_path: SQLite 文件路径，默认只保存在内存中
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS receipts (
+                tx_hash TEXT PRIMARY KEY,
+                height INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                receipt TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_receipt_height ON receipts (height, position);
+        """)
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM receipts").fetchone()[0]
+
+    def add_block(self, height: int, receipts: Iterable[TransactionReceipt]) -> None:
+        """写入一个区块的回执（按区块内处理顺序）；同一交易哈希的旧回执被覆盖"""
+        rows = [(receipt.tx_hash, height, position, receipt.model_dump_json())
+                for position, receipt in enumerate(receipts)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO receipts (tx_hash, height, position, receipt) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def truncate(self, height: int) -> int:
+        """
+        删除高度不小于 height 的回执（如写入回执后、区块落盘前崩溃）
+
+        Returns:
+            int: 删除的回执数
+        """
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM receipts WHERE height >= ?", (height,)).rowcount
+            self._conn.commit()
+        return deleted
+
+    def get(self, tx_hash: str) -> Optional[TransactionReceipt]:
+        """按交易哈希查询回执，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT receipt FROM receipts WHERE tx_hash = ?", (tx_hash,)).fetchone()
+        return TransactionReceipt.model_validate_json(row[0]) if row else None
+
+    def block(self, height: int) -> List[TransactionReceipt]:
+        """查询一个区块处理过的全部交易的回执（按处理顺序）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT receipt FROM receipts WHERE height = ? ORDER BY position", (height,)
+            ).fetchall()
+        return [TransactionReceipt.model_validate_json(row[0]) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,68 @@
+"""
+交易签名校验
+1. 通过 crypto.provider 校验签名，后端内部按公钥缓存解析结果
+2. 提供基于进程池的批量校验，供一轮投票的大量交易一次性入池
+
+本模块只依赖 crypto 与 types，避免进程池子进程导入 vm 时重复初始化区块链/世界状态
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from . import crypto
+from .types import Transaction, calculate_hash
+
+# 交易数少于该值时直接在当前进程校验，进程池的启动与序列化开销不划算
+PARALLEL_THRESHOLD = 32
+
+
+def transaction_digest(tx: Transaction) -> str:
+    """计算交易哈希（不包含签名），与 ChainClient 签名时的序列化方式一致"""
+    tx_dict = tx.model_dump(exclude={"signature"})
+    tx_json = json.dumps(tx_dict, sort_keys=True, separators=(",", ":"))
+    return calculate_hash(tx_json)
+
+
+def verify_digest(public_key_hex: str, signature_hex: str, digest_hex: str) -> bool:
+    """校验签名（签名时用的是 sign_digest，因此这里使用 verify_digest）"""
+    try:
+        if crypto.provider.verify_digest(public_key_hex, bytes.fromhex(signature_hex), bytes.fromhex(digest_hex)):
+            return True
+        print("Signature verification failed: signature does not match")
+        return False
+    except Exception as e:
+        print(f"Signature verification failed: {e}")
+        return False
+
+
+def _verify_job(job: Tuple[str, str, str]) -> bool:
+    return verify_digest(*job)
+
+
+def verify_batch(jobs: Sequence[Tuple[str, str, str]], processes: Optional[int] = None) -> List[bool]:
+    """
+    批量校验签名
+
+    Args:
+        jobs: (公钥十六进制, 签名十六进制, 交易哈希) 列表
+        processes: 进程数，默认 CPU 核数；为 1 或任务过少时在当前进程串行校验
+
+    Returns:
+        list: 与 jobs 一一对应的校验结果
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(jobs) < PARALLEL_THRESHOLD:
+        return [verify_digest(*job) for job in jobs]
+
+    # 按公钥排序后分块，同一子进程内复用已解析的公钥
+    order = sorted(range(len(jobs)), key=lambda i: jobs[i][0])
+    chunksize = max(1, len(jobs) // (processes * 4))
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        sorted_results = list(pool.map(_verify_job, [jobs[i] for i in order], chunksize=chunksize))
+
+    results = [False] * len(jobs)
+    for i, result in zip(order, sorted_results):
+        results[i] = result
+    return results
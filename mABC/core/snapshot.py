@@ -0,0 +1,111 @@
+"""
+世界状态快照
+- 每隔若干区块把全部账户连同区块高度、区块哈希、状态根写入 snapshot-<高度>.json
+- 恢复时加载不高于链顶且区块哈希仍在链上的最近快照，只重放其后的区块，
+  恢复耗时与快照之后的区块数成正比，而与链的总长度无关
+
+本模块只依赖 types 与 state_tree，不会初始化区块链/世界状态单例
+"""
+
+import glob
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .state_tree import build_state_tree
+from .types import Account, Block
+
+DEFAULT_SNAPSHOT_INTERVAL = 100  # 每多少个区块保存一次快照
+DEFAULT_KEEP_SNAPSHOTS = 3       # 保留的快照数量
+
+
+def compute_state_root(accounts: Iterable[Account]) -> str:
+    """状态根：账户状态树（见 state_tree.py）的根，与区块头中的 state_root 一致"""
+    return build_state_tree(accounts).root()
+
+
+class StateSnapshot:
+    """一份已加载的快照"""
+
+    def __init__(self, height: int, block_hash: str, state_root: str, accounts: List[Account],
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.height = height
+        self.block_hash = block_hash
+        self.state_root = state_root
+        self.accounts = accounts
+        self.metadata = metadata or {}
+
+
+class SnapshotStore:
+    """
+    快照目录
+
+    Args:
+        directory: 快照保存目录
+        keep: 保留最近的快照数量，更早的快照在保存新快照时删除
+    """
+
+    def __init__(self, directory: str, keep: int = DEFAULT_KEEP_SNAPSHOTS):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, height: int) -> str:
+        return os.path.join(self.directory, f"snapshot-{height:010d}.json")
+
+    def heights(self) -> List[int]:
+        """已保存快照的区块高度（升序）"""
+        paths = glob.glob(os.path.join(self.directory, "snapshot-*.json"))
+        return sorted(int(os.path.basename(path)[9:19]) for path in paths)
+
+    def save(self, height: int, block_hash: str, accounts: Iterable[Account],
+             metadata: Optional[Dict[str, Any]] = None) -> str:
+        """保存快照，返回状态根；metadata 为重放区块时需要的额外信息（如金库地址）"""
+        accounts = sorted(accounts, key=lambda account: account.address)
+        state_root = compute_state_root(accounts)
+        payload = {
+            "height": height,
+            "block_hash": block_hash,
+            "state_root": state_root,
+            "timestamp": int(time.time()),
+            "metadata": metadata or {},
+            "accounts": [account.model_dump() for account in accounts],
+        }
+        # 先写临时文件再原子替换，崩溃时不会留下半个快照
+        path = self._path(height)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        for old_height in self.heights()[:-self.keep]:
+            os.remove(self._path(old_height))
+        return state_root
+
+    def load(self, height: int) -> Optional[StateSnapshot]:
+        """加载指定高度的快照，文件缺失、损坏或状态根不符时返回 None"""
+        try:
+            with open(self._path(height), "r", encoding="utf-8") as f:
+                payload: Dict[str, Any] = json.load(f)
+            accounts = [Account.model_validate(account) for account in payload["accounts"]]
+        except Exception as e:
+            print(f"Failed to load snapshot at height {height}: {e}")
+            return None
+        if compute_state_root(accounts) != payload["state_root"]:
+            print(f"Snapshot at height {height} does not match its state root")
+            return None
+        return StateSnapshot(payload["height"], payload["block_hash"], payload["state_root"], accounts,
+                             payload.get("metadata"))
+
+    def latest(self, chain: Sequence[Block]) -> Optional[StateSnapshot]:
+        """不高于链顶、且对应区块仍在链上的最近一份有效快照"""
+        for height in reversed(self.heights()):
+            if height >= len(chain):
+                continue
+            snapshot = self.load(height)
+            if snapshot and chain[height].hash == snapshot.block_hash:
+                return snapshot
+        return None
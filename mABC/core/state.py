@@ -7,8 +7,9 @@ import hashlib
 import json
 import sqlite3
 import os
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 from pydantic import BaseModel, Field
+from .state_tree import SparseMerkleTree, account_key, account_value_hash, build_state_tree
 from .types import Account
 from core.types import Transaction
 
@@ -18,6 +19,14 @@ class WorldState:
     def __init__(self, db_path: str = "state.db"):
         self.db_path = db_path
         self.state: Dict[str, Account] = {}
+        # 状态已应用到的区块高度，None 表示尚未与区块链关联
+        self.block_height: Optional[int] = None
+        # 账户状态树与自上次提交以来被修改过的地址，提交时只更新这些路径
+        self.state_tree = SparseMerkleTree()
+        self._dirty: Set[str] = set()
+        # 物化视图（core/views.py）尚未处理的修改；状态被整体替换后视图需要重建
+        self._view_dirty: Set[str] = set()
+        self._view_rebuild = True
         self._init_db()
         self._load_state()
     
@@ -46,6 +55,14 @@ class WorldState:
                     votes TEXT
                 )
             ''')
+
+            # 元数据表：记录状态对应的区块高度
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
             
             conn.commit()
             conn.close()
@@ -81,8 +98,13 @@ class WorldState:
                     votes=votes
                 )
                 self.state[address] = account
+
+            cursor.execute("SELECT value FROM meta WHERE key = 'block_height'")
+            row = cursor.fetchone()
+            self.block_height = int(row[0]) if row else None
             
             conn.close()
+            self._rebuild_state_tree()
             print(f"Loaded {len(self.state)} accounts from database")
         except Exception as e:
             print(f"Failed to load state from database: {e}")
@@ -100,6 +122,8 @@ class WorldState:
 
             # 插入或更新账户
             for account in target_accounts:
+                self._dirty.add(account.address)
+                self._view_dirty.add(account.address)
                 proposals_json = json.dumps(account.root_cause_proposals)
                 votes_json = json.dumps(account.votes)
                 
@@ -115,6 +139,88 @@ class WorldState:
         except Exception as e:
             print(f"Failed to save state to database: {e}")
     
+    def set_block_height(self, height: int):
+        """记录当前状态已应用到的区块高度"""
+        self.block_height = height
+        try:
+            conn = self._get_db_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('block_height', ?)", (str(height),)
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Failed to save block height: {e}")
+
+    def replace_state(self, accounts: List[Account], block_height: Optional[int] = None):
+        """用给定账户整体替换当前状态（从快照恢复时使用）"""
+        self.state = {account.address: account.model_copy(deep=True) for account in accounts}
+        try:
+            conn = self._get_db_connection()
+            conn.execute('DELETE FROM accounts')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Failed to clear state in database: {e}")
+        self._save_state()
+        self._rebuild_state_tree()
+        self._view_rebuild = True
+        if block_height is not None:
+            self.set_block_height(block_height)
+
+    def clear(self):
+        """清空内存中的状态（重置数据时使用）"""
+        self.state = {}
+        self.block_height = None
+        self._rebuild_state_tree()
+        self._view_rebuild = True
+
+    def take_view_changes(self) -> Tuple[bool, Set[str]]:
+        """
+        取出自上次调用以来修改过的账户地址（供物化视图增量更新）
+
+        Returns:
+            tuple: (是否需要重建视图, 修改过的地址)
+        """
+        rebuild, changed = self._view_rebuild, self._view_dirty
+        self._view_rebuild, self._view_dirty = False, set()
+        return rebuild, changed
+
+    def _rebuild_state_tree(self):
+        self.state_tree = build_state_tree(self.state.values())
+        self._dirty.clear()
+
+    def commit_state_root(self) -> str:
+        """把修改过的账户写入状态树（只重算这些账户的路径），返回状态根"""
+        for address in self._dirty:
+            account = self.state.get(address)
+            if account is None:
+                self.state_tree.delete(account_key(address))
+            else:
+                self.state_tree.update(account_key(address), account_value_hash(account))
+        self._dirty.clear()
+        return self.state_tree.root()
+
+    def state_root(self) -> str:
+        """当前状态的状态根"""
+        return self.commit_state_root()
+
+    def get_account_proof(self, address: str) -> Dict[str, Any]:
+        """
+        生成账户证明（账户不存在时为非成员证明）
+
+        Returns:
+            dict: address、account、state_root、siblings、leaf
+        """
+        state_root = self.commit_state_root()
+        account = self.state.get(address)
+        return {
+            "address": address,
+            "account": account.model_dump(exclude={"name"}) if account else None,
+            "state_root": state_root,
+            **self.state_tree.proof(account_key(address)),
+        }
+
     def get_account(self, address: str) -> Optional[Account]:
         """获取账户信息"""
         return self.state.get(address)
@@ -151,35 +257,51 @@ class WorldState:
 class StateProcessor:
     """状态处理器，用于应用交易更新世界状态"""
     
-    def __init__(self, world_state: WorldState):
+    def __init__(self, world_state: WorldState, treasury_address: Optional[str] = None):
         self.world_state = world_state
+        # 系统金库地址（罚没金额的去向），由区块链在创建金库后设置；从快照重放时为快照记录的金库
+        self.treasury_address = treasury_address
+        # 是否正在从快照重放区块（重放时不推进 SOP 合约）
+        self.replaying = False
+        # 最近一笔交易的执行结果，供出块时生成交易回执
+        self.last_error: Optional[str] = None
+        self.last_logs: List[Dict[str, Any]] = []
     
     def apply_transaction(self, tx: 'Transaction') -> bool:
         """
         应用交易到世界状态
+        执行后 last_error 记录失败原因，last_logs 记录合约实际产生的事件（如按余额截断后的罚没金额）
         """
+        self.last_error = None
+        self.last_logs = []
+        handlers = {
+            "propose_root_cause": self._apply_propose_root_cause,
+            "vote": self._apply_vote,
+            "transfer": self._apply_transfer,
+            "stake": self._apply_stake,
+            "slash": self._apply_slash,
+            "reward": self._apply_reward,
+            "penalty": self._apply_penalty,
+        }
         try:
             # 根据交易类型执行不同的操作
-            if tx.tx_type == "propose_root_cause":
-                return self._apply_propose_root_cause(tx)
-            elif tx.tx_type == "vote":
-                return self._apply_vote(tx)
-            elif tx.tx_type == "transfer":
-                return self._apply_transfer(tx)
-            elif tx.tx_type == "stake":
-                return self._apply_stake(tx)
-            elif tx.tx_type == "slash":
-                return self._apply_slash(tx)
-            elif tx.tx_type == "reward":
-                return self._apply_reward(tx)
-            elif tx.tx_type == "penalty":
-                return self._apply_penalty(tx)
-            else:
+            handler = handlers.get(tx.tx_type)
+            if handler is None:
                 print(f"Unknown transaction type: {tx.tx_type}")
+                self.last_error = f"Unknown transaction type: {tx.tx_type}"
                 return False
+            success = handler(tx)
         except Exception as e:
             print(f"Failed to apply transaction: {e}")
-            return False
+            success = False
+            self.last_error = str(e)
+
+        if not success:
+            # 失败交易的状态修改不生效，也不产生事件
+            self.last_logs = []
+            if self.last_error is None:
+                self.last_error = f"{tx.tx_type} rejected by contract"
+        return success
     
     def _apply_propose_root_cause(self, tx: 'Transaction') -> bool:
         """应用根因提案交易"""
@@ -208,9 +330,11 @@ class StateProcessor:
             
             account.root_cause_proposals[proposal_id] = proposal_data
             self.world_state.update_account(account)
+            self.last_logs = [{"name": "propose_root_cause", "proposal_id": proposal_id, "proposer": tx.sender}]
             return True
         except Exception as e:
             print(f"Failed to apply propose root cause transaction: {e}")
+            self.last_error = str(e)
             return False
     
     # 使用governance_contract处理投票
@@ -218,10 +342,13 @@ class StateProcessor:
         """应用投票交易"""
         try:
             from contracts.governance_contract import GovernanceContract
-            governance_contract = GovernanceContract(self.world_state)
-            return governance_contract.vote(tx.data, tx.sender, tx.timestamp)
+            governance_contract = GovernanceContract(self.world_state, advance_sop=not self.replaying)
+            success = governance_contract.vote(tx.data, tx.sender, tx.timestamp)
+            self.last_logs = governance_contract.logs
+            return success
         except Exception as e:
             print(f"Failed to apply vote transaction: {e}")
+            self.last_error = str(e)
             return False
     
     # 使用token_contract处理转账、质押和惩罚
@@ -229,49 +356,64 @@ class StateProcessor:
         """应用转账交易"""
         try:
             from contracts.token_contract import TokenContract
-            token_contract = TokenContract(self.world_state)
-            return token_contract.transfer(tx.data, tx.sender)
+            token_contract = TokenContract(self.world_state, self.treasury_address)
+            success = token_contract.transfer(tx.data, tx.sender)
+            self.last_logs = token_contract.logs
+            return success
         except Exception as e:
             print(f"Failed to apply transfer transaction: {e}")
+            self.last_error = str(e)
             return False
 
     def _apply_stake(self, tx: 'Transaction') -> bool:
         """应用质押交易"""
         try:
             from contracts.token_contract import TokenContract
-            token_contract = TokenContract(self.world_state)
-            return token_contract.stake(tx.data, tx.sender)
+            token_contract = TokenContract(self.world_state, self.treasury_address)
+            success = token_contract.stake(tx.data, tx.sender)
+            self.last_logs = token_contract.logs
+            return success
         except Exception as e:
             print(f"Failed to apply stake transaction: {e}")
+            self.last_error = str(e)
             return False
 
     def _apply_slash(self, tx: 'Transaction') -> bool:
         """应用惩罚交易"""
         try:
             from contracts.token_contract import TokenContract
-            token_contract = TokenContract(self.world_state)
-            return token_contract.slash(tx.data, tx.sender)
+            token_contract = TokenContract(self.world_state, self.treasury_address)
+            success = token_contract.slash(tx.data, tx.sender)
+            self.last_logs = token_contract.logs
+            return success
         except Exception as e:
             print(f"Failed to apply slash transaction: {e}")
+            self.last_error = str(e)
             return False
 
     def _apply_reward(self, tx: 'Transaction') -> bool:
         """应用奖励交易"""
         try:
             from contracts.token_contract import TokenContract
-            token_contract = TokenContract(self.world_state)
-            return token_contract.reward(tx.data, tx.sender)
+            token_contract = TokenContract(self.world_state, self.treasury_address)
+            success = token_contract.reward(tx.data, tx.sender)
+            self.last_logs = token_contract.logs
+            return success
         except Exception as e:
             print(f"Failed to apply reward transaction: {e}")
+            self.last_error = str(e)
             return False
     
     def _apply_penalty(self, tx: 'Transaction') -> bool:
         try:
             from contracts.token_contract import TokenContract
-            token_contract = TokenContract(self.world_state)
-            return token_contract.penalty(tx.data, tx.sender)
+            token_contract = TokenContract(self.world_state, self.treasury_address)
+            success = token_contract.penalty(tx.data, tx.sender)
+            self.last_logs = token_contract.logs
+            return success
         except Exception as e:
             print(f"Failed to apply penalty transaction: {e}")
+            self.last_error = str(e)
             return False
 
 
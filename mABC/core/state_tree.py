@@ -0,0 +1,190 @@
+"""
+账户状态树（压缩稀疏Merkle树）
+- 键为 sha256(地址) 的 256 位，按位从高到低决定左右分支
+- 只有一个叶子的子树直接用该叶子表示，树高约为 log2(账户数)
+- 叶子哈希与所在深度无关：H(0x00 || 键 || 值)，内部节点：H(0x01 || 左 || 右)，空子树为全零
+- 更新/删除只重算一条路径上的节点，账户证明为沿路径的兄弟节点哈希，长度 O(log n)
+
+本模块只依赖标准库与 types，不会初始化区块链/世界状态单例
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .types import Account
+
+EMPTY = bytes(32)  # 空子树的哈希
+
+
+def _leaf_hash(key: bytes, value: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + key + value).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _bit(key: bytes, depth: int) -> int:
+    return (key[depth >> 3] >> (7 - (depth & 7))) & 1
+
+
+def account_key(address: str) -> bytes:
+    """账户在状态树中的键"""
+    return hashlib.sha256(address.encode("utf-8")).digest()
+
+
+def account_value_hash(account: Account) -> bytes:
+    """账户在状态树中的值：持久化字段的规范化JSON哈希（name 只用于展示，不入库，不参与）"""
+    account_json = json.dumps(account.model_dump(exclude={"name"}), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(account_json.encode("utf-8")).digest()
+
+
+class _Leaf:
+    __slots__ = ("key", "value", "hash")
+
+    def __init__(self, key: bytes, value: bytes):
+        self.key = key
+        self.value = value
+        self.hash = _leaf_hash(key, value)
+
+
+class _Internal:
+    __slots__ = ("left", "right", "hash")
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.hash = _node_hash(_hash(left), _hash(right))
+
+
+def _hash(node) -> bytes:
+    return EMPTY if node is None else node.hash
+
+
+def _split(existing: _Leaf, new: _Leaf, depth: int) -> _Internal:
+    """两个叶子落在同一位置时，向下展开到二者键的第一个不同位"""
+    existing_bit, new_bit = _bit(existing.key, depth), _bit(new.key, depth)
+    if existing_bit == new_bit:
+        child = _split(existing, new, depth + 1)
+        return _Internal(child, None) if new_bit == 0 else _Internal(None, child)
+    return _Internal(existing, new) if existing_bit == 0 else _Internal(new, existing)
+
+
+class SparseMerkleTree:
+    """
+    压缩稀疏Merkle树
+
+    节点不可变，更新时复制路径，旧的根节点仍表示更新前的树
+    """
+
+    def __init__(self, items: Iterable[Tuple[bytes, bytes]] = ()):
+        self._root = None
+        self._size = 0
+        for key, value in items:
+            self.update(key, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def root(self) -> str:
+        return _hash(self._root).hex()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        node, depth = self._root, 0
+        while isinstance(node, _Internal):
+            node = node.right if _bit(key, depth) else node.left
+            depth += 1
+        return node.value if node is not None and node.key == key else None
+
+    def update(self, key: bytes, value: bytes) -> None:
+        """插入或更新叶子，只重算从该叶子到根的路径"""
+        self._root = self._insert(self._root, 0, _Leaf(key, value))
+
+    def _insert(self, node, depth: int, leaf: _Leaf):
+        if node is None:
+            self._size += 1
+            return leaf
+        if isinstance(node, _Leaf):
+            if node.key == leaf.key:
+                return leaf
+            self._size += 1
+            return _split(node, leaf, depth)
+        if _bit(leaf.key, depth):
+            return _Internal(node.left, self._insert(node.right, depth + 1, leaf))
+        return _Internal(self._insert(node.left, depth + 1, leaf), node.right)
+
+    def delete(self, key: bytes) -> None:
+        """删除叶子，只剩一个叶子的子树向上收缩"""
+        self._root = self._delete(self._root, 0, key)
+
+    def _delete(self, node, depth: int, key: bytes):
+        if node is None:
+            return None
+        if isinstance(node, _Leaf):
+            if node.key != key:
+                return node
+            self._size -= 1
+            return None
+        if _bit(key, depth):
+            left, right = node.left, self._delete(node.right, depth + 1, key)
+        else:
+            left, right = self._delete(node.left, depth + 1, key), node.right
+        if left is node.left and right is node.right:
+            return node
+        if left is None and (right is None or isinstance(right, _Leaf)):
+            return right
+        if right is None and isinstance(left, _Leaf):
+            return left
+        return _Internal(left, right)
+
+    def proof(self, key: bytes) -> Dict[str, Any]:
+        """
+        生成成员/非成员证明
+
+        Returns:
+            dict: siblings 为从根到叶的兄弟节点哈希；leaf 为路径终点的叶子 (键, 值)，
+                  终点为空子树时为 None
+        """
+        siblings: List[str] = []
+        node, depth = self._root, 0
+        while isinstance(node, _Internal):
+            if _bit(key, depth):
+                siblings.append(_hash(node.left).hex())
+                node = node.right
+            else:
+                siblings.append(_hash(node.right).hex())
+                node = node.left
+            depth += 1
+        leaf = {"key": node.key.hex(), "value": node.value.hex()} if node is not None else None
+        return {"siblings": siblings, "leaf": leaf}
+
+    @staticmethod
+    def verify_proof(root: str, key: bytes, value: Optional[bytes], proof: Dict[str, Any]) -> bool:
+        """
+        校验证明：value 不为 None 时证明 key 对应该值，为 None 时证明 key 不在树中
+        """
+        siblings = proof["siblings"]
+        leaf = proof.get("leaf")
+        if value is not None:
+            if not leaf or bytes.fromhex(leaf["key"]) != key or bytes.fromhex(leaf["value"]) != value:
+                return False
+            current = _leaf_hash(key, value)
+        elif leaf is None:
+            current = EMPTY
+        else:
+            # 路径终点是另一个叶子：它必须与 key 共享整条路径，且键不同
+            other = bytes.fromhex(leaf["key"])
+            if other == key or any(_bit(other, d) != _bit(key, d) for d in range(len(siblings))):
+                return False
+            current = _leaf_hash(other, bytes.fromhex(leaf["value"]))
+
+        for depth in range(len(siblings) - 1, -1, -1):
+            sibling = bytes.fromhex(siblings[depth])
+            current = _node_hash(sibling, current) if _bit(key, depth) else _node_hash(current, sibling)
+        return current.hex() == root
+
+
+def build_state_tree(accounts: Iterable[Account]) -> SparseMerkleTree:
+    """由账户集合构建状态树"""
+    return SparseMerkleTree((account_key(account.address), account_value_hash(account)) for account in accounts)
@@ -0,0 +1,60 @@
+"""
+系统金库账户
+- 金库是固定的系统账户：创世（或重置）时登记一次，之后始终按地址 O(1) 访问，不再“选余额最高的非 Agent 账户”
+- 私钥保存在区块目录下的 treasury.pem（仅所有者可读写，权限 0600），重启后金库地址不变
+- 未指定密钥文件（区块只保存在内存中）时使用临时密钥
+
+本模块只依赖 ecdsa、types 与公钥注册表，不会初始化区块链/世界状态单例
+"""
+
+import os
+from typing import Optional
+
+from ecdsa import SECP256k1, SigningKey
+
+from .blockchain import PublicKeyRegistry
+from .types import generate_address
+
+TREASURY_KEY_FILE = "treasury.pem"
+TREASURY_INITIAL_BALANCE = 200000  # 金库登记时的初始资金
+TREASURY_INITIAL_REPUTATION = 80
+
+
+class Treasury:
+    """
+    系统金库的地址与私钥
+
+    Args:
+        private_key: 金库私钥
+        key_path: 私钥文件路径（临时密钥为 None）
+    """
+
+    def __init__(self, private_key: SigningKey, key_path: Optional[str] = None):
+        self.private_key = private_key
+        self.key_path = key_path
+        public_key = private_key.get_verifying_key().to_string()
+        self.address = generate_address(public_key)
+        # 注册公钥，金库发出的奖励/罚没交易才能通过验签
+        PublicKeyRegistry.register_public_key(self.address, public_key.hex())
+
+    @classmethod
+    def load_or_create(cls, key_path: Optional[str] = None) -> "Treasury":
+        """从密钥文件加载金库，文件不存在时生成新密钥并以 0600 权限写入"""
+        if key_path is None:
+            return cls(SigningKey.generate(curve=SECP256k1))
+        if os.path.exists(key_path):
+            with open(key_path, "r", encoding="utf-8") as f:
+                return cls(SigningKey.from_pem(f.read()), key_path)
+
+        private_key = SigningKey.generate(curve=SECP256k1)
+        os.makedirs(os.path.dirname(key_path) or ".", exist_ok=True)
+        # 先写临时文件再原子替换，文件从创建起即只有所有者可读
+        tmp_path = key_path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(private_key.to_pem().decode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, key_path)
+        print(f"Created treasury key at {key_path}")
+        return cls(private_key, key_path)
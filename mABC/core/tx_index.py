@@ -0,0 +1,235 @@
+"""
+区块浏览器的交易索引
+- 每笔上链交易一行：(区块高度, 交易序号) -> 交易哈希、发送者、交易类型、提案ID、目标地址
+  交易哈希即Merkle树的叶子哈希（包含签名，见 types.transaction_leaf_hash），与回执使用的
+  不含签名的交易摘要不同
+- 出块时写入新区块的交易；按哈希、发送者、交易类型、提案ID（投票）、目标地址（奖励/罚没/转账）
+  查询均走二级索引，按 (高度, 序号) 倒序分页，不再逐笔扫描整条链
+- 持久化时保存在区块目录下的 tx_index.db（SQLite），否则保存在内存中；
+  sync() 补齐索引落后的区块（如升级前已存在的链），链顶哈希不一致（链被替换）时从头重建
+
+本模块只依赖 types，不会初始化区块链/世界状态单例
+"""
+
+import sqlite3
+import threading
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .types import Block, Transaction, transaction_leaf_hash
+
+TX_INDEX_FILE = "tx_index.db"
+DEFAULT_PAGE_SIZE = 50
+
+
+def transaction_keys(tx: Transaction) -> Dict[str, Optional[str]]:
+    """交易的二级索引键：投票按提案ID，奖励/惩罚/罚没按 target，转账按 to"""
+    data = tx.data or {}
+    proposal_id = data.get("proposal_id")
+    target = data.get("target") or data.get("to")
+    return {
+        "sender": tx.sender,
+        "tx_type": tx.tx_type,
+        "proposal_id": str(proposal_id) if proposal_id is not None else None,
+        "target": str(target) if target is not None else None,
+    }
+
+
+def format_cursor(height: int, position: int) -> str:
+    return f"{height}:{position}"
+
+
+def parse_cursor(cursor: str) -> Tuple[int, int]:
+    """解析分页游标 "高度:序号"，格式错误时抛出 ValueError"""
+    height, _, position = cursor.partition(":")
+    return int(height), int(position)
+
+
+class TransactionIndex:
+    """
+    交易的持久化二级索引，线程安全
+
+    Args:
+        db_path: SQLite 文件路径，默认只保存在内存中
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                height INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                tx_hash TEXT NOT NULL,
+                sender TEXT,
+                tx_type TEXT,
+                proposal_id TEXT,
+                target TEXT,
+                PRIMARY KEY (height, position)
+            );
+            CREATE INDEX IF NOT EXISTS idx_tx_hash ON transactions (tx_hash);
+            CREATE INDEX IF NOT EXISTS idx_tx_sender ON transactions (sender, height, position);
+            CREATE INDEX IF NOT EXISTS idx_tx_type ON transactions (tx_type, height, position);
+            CREATE INDEX IF NOT EXISTS idx_tx_proposal ON transactions (proposal_id, height, position);
+            CREATE INDEX IF NOT EXISTS idx_tx_target ON transactions (target, height, position);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._conn.commit()
+        self._height, self._tip_hash = self._load_meta()
+
+    def _load_meta(self) -> Tuple[int, Optional[str]]:
+        rows = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        return int(rows.get("height", 0)), rows.get("tip_hash") or None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    @property
+    def height(self) -> int:
+        """已索引的区块数"""
+        return self._height
+
+    # ====================== 写入 ======================
+
+    def add_block(self, block: Block) -> bool:
+        """
+        索引新区块（出块时调用）；区块不是紧接在已索引区块之后时不写入，由 sync() 补齐
+
+        Returns:
+            bool: 是否写入
+        """
+        with self._lock:
+            if block.header.index != self._height:
+                return False
+            self._insert_blocks([block])
+            self._conn.commit()
+            return True
+
+    def sync(self, chain: Sequence) -> int:
+        """
+        使索引与链一致：补齐落后的区块，链被替换时从头重建
+
+        Args:
+            chain: 区块序列（list 或 PersistentChain）
+
+        Returns:
+            int: 本次索引的区块数
+        """
+        with self._lock:
+            height = len(chain)
+            # 区块哈希链式相连，链顶哈希一致即说明已索引的区块都未被替换
+            if self._height and (self._height > height or chain[self._height - 1].hash != self._tip_hash):
+                self._conn.execute("DELETE FROM transactions")
+                self._height, self._tip_hash = 0, None
+                self._save_meta()
+            start = self._height
+            self._insert_blocks(chain[index] for index in range(start, height))
+            self._conn.commit()
+            return height - start
+
+    def _insert_blocks(self, blocks: Iterable[Block]) -> None:
+        for block in blocks:
+            rows = []
+            for position, tx in enumerate(block.transactions):
+                keys = transaction_keys(tx)
+                rows.append((block.header.index, position, transaction_leaf_hash(tx),
+                             keys["sender"], keys["tx_type"], keys["proposal_id"], keys["target"]))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO transactions "
+                "(height, position, tx_hash, sender, tx_type, proposal_id, target) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._height, self._tip_hash = block.header.index + 1, block.hash
+        self._save_meta()
+
+    def _save_meta(self) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("height", str(self._height)), ("tip_hash", self._tip_hash or "")],
+        )
+
+    # ====================== 查询 ======================
+
+    def lookup(self, tx_hash: str) -> Optional[Tuple[int, int]]:
+        """按交易哈希查找 (区块高度, 交易序号)，不在链上时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT height, position FROM transactions WHERE tx_hash = ? ORDER BY height DESC LIMIT 1",
+                (tx_hash,),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def query(
+        self,
+        sender: Optional[str] = None,
+        tx_type: Optional[Union[str, List[str]]] = None,
+        proposal_id: Optional[str] = None,
+        target: Optional[str] = None,
+        min_height: Optional[int] = None,
+        before: Optional[Tuple[int, int]] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        按条件分页查询交易引用（条件之间为“与”），按 (高度, 序号) 倒序
+
+        Args:
+            tx_type: 交易类型，可为列表（如 ["penalty", "slash"]）
+            min_height: 只返回高度不小于该值的区块中的交易
+            before: 游标 (高度, 序号)，只返回该位置之前的交易
+            limit: 每页条数
+
+        Returns:
+            dict: transactions（block_index、tx_index、tx_hash、sender、tx_type、proposal_id、target）
+                  与 next_cursor（没有更多时为 None）
+        """
+        clauses, params = [], []
+        for name, value in (("sender", sender), ("proposal_id", proposal_id), ("target", target)):
+            if value is not None:
+                clauses.append(f"{name} = ?")
+                params.append(value)
+        types = [tx_type] if isinstance(tx_type, str) else list(tx_type or [])
+        if types:
+            clauses.append(f"tx_type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+        if min_height is not None:
+            clauses.append("height >= ?")
+            params.append(min_height)
+        if before is not None:
+            clauses.append("(height < ? OR (height = ? AND position < ?))")
+            params.extend([before[0], before[0], before[1]])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            "SELECT height, position, tx_hash, sender, tx_type, proposal_id, target FROM transactions "
+            f"{where} ORDER BY height DESC, position DESC LIMIT ?"
+        )
+        # 多取一条判断是否还有下一页
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit + 1]).fetchall()
+
+        refs = [
+            {
+                "block_index": height,
+                "tx_index": position,
+                "tx_hash": tx_hash,
+                "sender": sender_,
+                "tx_type": tx_type_,
+                "proposal_id": proposal_id_,
+                "target": target_,
+            }
+            for height, position, tx_hash, sender_, tx_type_, proposal_id_, target_ in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit and refs:
+            next_cursor = format_cursor(refs[-1]["block_index"], refs[-1]["tx_index"])
+        return {"transactions": refs, "next_cursor": next_cursor}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -5,7 +5,7 @@
 
 import time
 import hashlib
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pydantic import BaseModel, Field
 
 
@@ -37,6 +37,7 @@ class BlockHeader(BaseModel):
     previous_hash: str
     merkle_root: str
     nonce: int = 0
+    state_root: str = ""    # 出块后账户状态树的根（见 core/state_tree.py），旧区块为空
 
 
 class Block(BaseModel):
@@ -46,6 +47,19 @@ class Block(BaseModel):
     hash: Optional[str] = None
 
 
+class TransactionReceipt(BaseModel):
+    """交易回执"""
+    tx_hash: str  # 不含签名的交易哈希
+    tx_type: str
+    sender: str
+    success: bool
+    gas_used: int = 0  # 实际扣除的Gas（失败退还或奖励交易为0）
+    block_number: Optional[int] = None
+    block_hash: Optional[str] = None
+    logs: List[Dict[str, Any]] = Field(default_factory=list)  # 执行过程中产生的事件
+    error: Optional[str] = None  # 失败原因
+
+
 class Account(BaseModel):
     """账户模型"""
     address: str
@@ -71,6 +85,112 @@ def calculate_hash(data: str) -> str:
     return hashlib.sha256(data.encode()).hexdigest()
 
 
+def transaction_leaf_hash(tx: Transaction) -> str:
+    """Merkle树叶子节点：交易（含签名）的哈希"""
+    tx_dict = tx.model_dump()
+    tx_json = str(sorted(tx_dict.items()))
+    return calculate_hash(tx_json)
+
+
+class MerkleTree:
+    """
+    保存各层哈希的Merkle树
+    奇数个节点时复制最后一个节点与自身配对，与历史区块的Merkle根计算方式一致。
+    构建一次后 root() 为 O(1)，proof(i) 为 O(log n)，append 只重算最右侧路径 O(log n)。
+    """
+
+    def __init__(self, leaves: Optional[List[str]] = None):
+        self.levels: List[List[str]] = [list(leaves or [])]
+        level = self.levels[0]
+        while len(level) > 1:
+            level = [
+                calculate_hash(level[i] + (level[i + 1] if i + 1 < len(level) else level[i]))
+                for i in range(0, len(level), 2)
+            ]
+            self.levels.append(level)
+
+    @classmethod
+    def from_transactions(cls, transactions: List[Transaction]) -> "MerkleTree":
+        return cls([transaction_leaf_hash(tx) for tx in transactions])
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def leaf(self, index: int) -> str:
+        return self.levels[0][index]
+
+    def root(self) -> str:
+        """Merkle根，空树返回空字符串的哈希"""
+        if not self.levels[0]:
+            return calculate_hash("")
+        return self.levels[-1][0]
+
+    def append(self, leaf: str) -> None:
+        """追加叶子节点并沿最右侧路径更新父节点"""
+        self.levels[0].append(leaf)
+        index = len(self.levels[0]) - 1
+        level = 0
+        while len(self.levels[level]) > 1:
+            nodes = self.levels[level]
+            parent = index // 2
+            left = nodes[parent * 2]
+            right = nodes[parent * 2 + 1] if parent * 2 + 1 < len(nodes) else left
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            upper = self.levels[level + 1]
+            if parent < len(upper):
+                upper[parent] = calculate_hash(left + right)
+            else:
+                upper.append(calculate_hash(left + right))
+            index = parent
+            level += 1
+
+    def proof(self, index: int) -> List[Dict[str, str]]:
+        """
+        生成第 index 个叶子的Merkle证明
+
+        Returns:
+            list: 自底向上的兄弟节点 {"position": "left"|"right", "hash": ...}
+        """
+        if index < 0 or index >= len(self.levels[0]):
+            raise IndexError(f"Leaf index out of range: {index}")
+        path = []
+        for nodes in self.levels[:-1]:
+            if index % 2 == 0:
+                # 奇数个节点时最后一个节点与自身配对
+                sibling = nodes[index + 1] if index + 1 < len(nodes) else nodes[index]
+                path.append({"position": "right", "hash": sibling})
+            else:
+                path.append({"position": "left", "hash": nodes[index - 1]})
+            index //= 2
+        return path
+
+    def proofs(self, indices: List[int]) -> Dict[int, List[Dict[str, str]]]:
+        """批量生成同一棵树中多个叶子的Merkle证明"""
+        return {index: self.proof(index) for index in indices}
+
+    @staticmethod
+    def verify_proof(leaf: str, proof: List[Dict[str, str]], root: str,
+                     cache: Optional[Dict[Tuple[str, str], str]] = None) -> bool:
+        """
+        沿证明路径重算根哈希并与 root 比较
+
+        Args:
+            cache: (左, 右) -> 父节点哈希；批量校验同一区块的多个证明时共用，
+                   共同的上层节点只计算一次
+        """
+        current = leaf
+        for step in proof:
+            pair = (step["hash"], current) if step["position"] == "left" else (current, step["hash"])
+            parent = cache.get(pair) if cache is not None else None
+            if parent is None:
+                parent = calculate_hash(pair[0] + pair[1])
+                if cache is not None:
+                    cache[pair] = parent
+            current = parent
+        return current == root
+
+
 def get_merkle_root(transactions: List[Transaction]) -> str:
     """
     计算交易列表的Merkle树根哈希
@@ -81,34 +201,7 @@ def get_merkle_root(transactions: List[Transaction]) -> str:
     Returns:
         str: Merkle树根哈希值
     """
-    if not transactions:
-        return calculate_hash("")
-    
-    # 计算每笔交易的哈希值
-    transaction_hashes = []
-    for tx in transactions:
-        # 将交易转换为字符串进行哈希计算
-        tx_dict = tx.model_dump()
-        tx_json = str(sorted(tx_dict.items()))
-        transaction_hashes.append(calculate_hash(tx_json))
-    
-    # 构建Merkle树
-    merkle_tree = transaction_hashes[:]
-    
-    while len(merkle_tree) > 1:
-        # 如果是奇数个节点，在末尾复制最后一个节点
-        if len(merkle_tree) % 2 == 1:
-            merkle_tree.append(merkle_tree[-1])
-        
-        # 计算上一层节点
-        new_level = []
-        for i in range(0, len(merkle_tree), 2):
-            # 将相邻两个节点的哈希值拼接后计算哈希
-            combined = merkle_tree[i] + merkle_tree[i + 1]
-            new_level.append(calculate_hash(combined))
-        merkle_tree = new_level
-    
-    return merkle_tree[0]
+    return MerkleTree.from_transactions(transactions).root()
 
 
 def generate_address(public_key: bytes) -> str:
@@ -121,8 +214,6 @@ def generate_address(public_key: bytes) -> str:
     Returns:
         str: 账户地址
     """
-    # 使用SHA256哈希公钥，然后取前20个字节作为地址
-    sha256_hash = hashlib.sha256(public_key).digest()
-    # 取前20个字节并转换为十六进制字符串
-    address = sha256_hash[:20].hex()
-    return address
\ No newline at end of file
+    # 使用SHA256哈希公钥，然后取前20个字节作为地址(由密码学后端实现)
+    from .crypto import provider
+    return provider.address_from_public_key(public_key)
\ No newline at end of file
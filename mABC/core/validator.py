@@ -0,0 +1,193 @@
+"""
+全链校验
+1. 记录已校验的高度与哈希(检查点)，之后的校验只检查新增区块；
+   检查点可保存在区块目录下，重启后仍只校验检查点之后的区块
+2. 区块哈希与Merkle根的重算按块分组交给进程池并行完成
+3. previous_hash 链接检查开销很小，在当前进程按高度逐块读取区块、组装任务时顺带完成；
+   同时在途的任务数有上限，持久化的链不会被整条读入内存
+
+本模块只依赖 types，进程池子进程导入时不会初始化区块链/世界状态
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .types import Block, MerkleTree, calculate_hash
+
+DEFAULT_CHUNK_SIZE = 256  # 每个校验任务包含的区块数
+VALIDATOR_CHECKPOINT_FILE = "validator_checkpoint.json"
+
+
+def _header_dict(block: Block) -> Dict[str, Any]:
+    # 没有状态根的旧区块不序列化该字段，保持其哈希不变
+    return block.header.model_dump(exclude=None if block.header.state_root else {"state_root"})
+
+
+def header_block_hash(block: Block) -> str:
+    """区块哈希：只对区块头做哈希（core.blockchain.Blockchain 使用）"""
+    header_json = json.dumps(_header_dict(block), sort_keys=True, separators=(',', ':'))
+    return calculate_hash(header_json)
+
+
+def full_block_hash(block: Block) -> str:
+    """区块哈希：对除 hash 外的整个区块做哈希（core.vm.Blockchain 使用）"""
+    block_dict = block.model_dump(exclude={"hash"})
+    block_dict["header"] = _header_dict(block)
+    block_json = json.dumps(block_dict, sort_keys=True, separators=(",", ":"))
+    return calculate_hash(block_json)
+
+
+def _verify_blocks(args: Tuple[List[Block], Callable[[Block], str]]) -> Optional[Tuple[int, str]]:
+    """校验一组区块的Merkle根与区块哈希，返回第一个错误 (高度, 原因)"""
+    blocks, block_hasher = args
+    for block in blocks:
+        if block.header.merkle_root != MerkleTree.from_transactions(block.transactions).root():
+            return block.header.index, "Invalid Merkle root"
+        if block.hash != block_hasher(block):
+            return block.header.index, "Invalid hash"
+    return None
+
+
+class ChainValidator:
+    """
+    增量、并行的全链校验器
+
+    Args:
+        block_hasher: 区块哈希函数（需为模块级函数，以便传给子进程）
+        processes: 进程数，默认 CPU 核数；为 1 时在当前进程串行校验
+        chunk_size: 每个校验任务包含的区块数
+        checkpoint_path: 检查点文件路径，默认只保存在内存中
+    """
+
+    def __init__(self, block_hasher: Callable[[Block], str] = header_block_hash,
+                 processes: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 checkpoint_path: Optional[str] = None):
+        self.block_hasher = block_hasher
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.verified_height = -1       # 已校验的最高区块高度（检查点）
+        self.verified_hash: Optional[str] = None
+        self._load_checkpoint()
+
+    def _load_checkpoint(self) -> None:
+        """读取保存的检查点，文件缺失或损坏时从头校验"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                payload: Dict[str, Any] = json.load(f)
+            self.verified_height, self.verified_hash = int(payload["height"]), str(payload["hash"])
+        except Exception as e:
+            print(f"Failed to load validator checkpoint: {e}")
+            self.reset()
+
+    def _save_checkpoint(self) -> None:
+        # 先写临时文件再原子替换；检查点丢失只会导致下次从头校验，无需 fsync
+        if not self.checkpoint_path:
+            return
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"height": self.verified_height, "hash": self.verified_hash}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reset(self) -> None:
+        """清除检查点，下次从头校验"""
+        self.verified_height = -1
+        self.verified_hash = None
+
+    def _start_height(self, chain: Sequence[Block]) -> int:
+        """检查点仍在链上且哈希未变时从其后开始，否则从头开始（跳过创世区块）"""
+        if 0 <= self.verified_height < len(chain) and chain[self.verified_height].hash == self.verified_hash:
+            return self.verified_height + 1
+        self.reset()
+        return 1
+
+    def _chunks(self, chain: Sequence[Block], start: int, end: int,
+                link_errors: List[Tuple[int, str]]) -> Iterator[List[Block]]:
+        """按高度逐块读取 [start, end) 的区块并分组，顺带检查 previous_hash 链接；发现链接错误后不再读取更高的区块"""
+        previous_hash = chain[start - 1].hash if start < end else None
+        for low in range(start, end, self.chunk_size):
+            chunk = []
+            for height in range(low, min(low + self.chunk_size, end)):
+                block = chain[height]
+                if not link_errors and block.header.previous_hash != previous_hash:
+                    link_errors.append((block.header.index, "Invalid previous hash"))
+                previous_hash = block.hash
+                chunk.append(block)
+            yield chunk
+            if link_errors:
+                return
+
+    def _verify_contents(self, chunks: Iterator[List[Block]], parallel: bool) -> Optional[Tuple[int, str]]:
+        if not parallel:
+            results = (_verify_blocks((chunk, self.block_hasher)) for chunk in chunks)
+            return next((error for error in results if error), None)
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            # 按提交顺序取结果，第一个错误即为高度最低的错误；在途任务数有上限
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_verify_blocks, (chunk, self.block_hasher)))
+                if len(pending) >= self.processes * 2:
+                    error = pending.popleft().result()
+                    if error:
+                        for future in pending:
+                            future.cancel()
+                        return error
+            while pending:
+                error = pending.popleft().result()
+                if error:
+                    for future in pending:
+                        future.cancel()
+                    return error
+        return None
+
+    def validate(self, chain: Sequence[Block]) -> Dict[str, Any]:
+        """
+        校验区块链，通过后推进检查点
+
+        Args:
+            chain: 区块序列（list 或 PersistentChain），按高度逐块读取
+
+        Returns:
+            dict: valid、checked_blocks、start_height、end_height、elapsed、blocks_per_second，
+                  校验失败时还包含 error 与 error_height
+        """
+        start_time = time.perf_counter()
+        # 校验不持有区块链锁：只校验开始时已有的区块，检查点也只推进到这里，校验期间新出的区块留到下次
+        end = len(chain)
+        end_hash = chain[end - 1].hash if end else None
+        start = self._start_height(chain)
+        checked = max(0, end - start)
+        report: Dict[str, Any] = {
+            "valid": True,
+            "checked_blocks": checked,
+            "start_height": start,
+            "end_height": end - 1,
+        }
+
+        # 1. 读取区块时顺序检查 previous_hash 链接
+        # 2. 并行重算Merkle根与区块哈希，取高度最低的错误
+        link_errors: List[Tuple[int, str]] = []
+        parallel = self.processes > 1 and checked > self.chunk_size
+        error = self._verify_contents(self._chunks(chain, start, end, link_errors), parallel)
+        if link_errors and (error is None or link_errors[0][0] < error[0]):
+            error = link_errors[0]
+
+        if error:
+            report["valid"] = False
+            report["error_height"], report["error"] = error
+            print(f"{error[1]} at block {error[0]}")
+        elif end and (end - 1, end_hash) != (self.verified_height, self.verified_hash):
+            self.verified_height = end - 1
+            self.verified_hash = end_hash
+            self._save_checkpoint()
+
+        elapsed = time.perf_counter() - start_time
+        report["elapsed"] = round(elapsed, 4)
+        report["blocks_per_second"] = round(checked / elapsed, 1) if elapsed > 0 else None
+        return report
@@ -0,0 +1,201 @@
+"""
+世界状态的物化视图
+经济看板、Agent 排行与投票统计不再在每次请求时扫描全部账户：
+- 出块后（以及读取前）只用修改过的账户增量更新视图，见 WorldState.take_view_changes
+- Agent 排行与非 Agent 账户各维护一个按 (余额, 质押, 信誉) 倒序的有序索引，分页读取 O(页大小)
+- 全网投票权重、各提案的投票记录与提案所在账户随账户更新增减，投票统计无需扫描
+- 每次更新后 version 加一，接口据此生成 ETag
+
+本模块只依赖 types，不会初始化区块链/世界状态单例
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .types import Account
+
+
+def voting_weight(account: Account) -> float:
+    """投票权重，与治理合约一致：1 + 信誉加成 + 质押加成"""
+    rep_bonus = max(0.0, (account.reputation - 50) / 10.0)
+    stake_bonus = account.stake / 1000.0
+    return 1.0 + rep_bonus + stake_bonus
+
+
+def _rank_key(account: Account) -> Tuple:
+    return (-(account.balance or 0), -(account.stake or 0), -(account.reputation or 0), account.address)
+
+
+class AccountIndex:
+    """按排序键升序保存的账户地址，插入/删除为一次二分查找加列表移动"""
+
+    def __init__(self):
+        self._entries: List[Tuple] = []
+        self._keys: Dict[str, Tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert(self, address: str, key: Tuple) -> None:
+        self.remove(address)
+        bisect.insort(self._entries, key)
+        self._keys[address] = key
+
+    def remove(self, address: str) -> None:
+        key = self._keys.pop(address, None)
+        if key is not None:
+            del self._entries[bisect.bisect_left(self._entries, key)]
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        end = len(self._entries) if limit is None else offset + limit
+        return [entry[-1] for entry in self._entries[offset:end]]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys.clear()
+
+
+class _Row:
+    """视图中保存的账户副本（只保留视图需要的字段）"""
+    __slots__ = ("address", "name", "balance", "stake", "reputation", "weight", "proposals", "votes")
+
+    def __init__(self, account: Account):
+        self.address = account.address
+        self.name = account.name
+        self.balance = account.balance
+        self.stake = account.stake
+        self.reputation = account.reputation
+        self.weight = voting_weight(account)
+        # 提案ID -> 加权票数（复制，账户之后被原地修改不影响视图）
+        self.proposals = {pid: dict(data.get("votes", {})) for pid, data in account.root_cause_proposals.items()}
+        self.votes = {pid: {"option": vote.get("vote_option"), "weight": vote.get("weight", self.weight)}
+                      for pid, vote in account.votes.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "balance": self.balance,
+            "name": self.name,
+            "stake": self.stake,
+            "reputation": self.reputation,
+        }
+
+
+class StateViews:
+    """
+    世界状态的物化视图
+
+    refresh() 在持有区块链锁时调用，读取方法只持有视图自身的锁，
+    返回的数据均为副本，耗时与返回的条数成正比
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.block_height: Optional[int] = None
+        self.agent_addresses: frozenset = frozenset()
+        self._rows: Dict[str, _Row] = {}
+        self._agents = AccountIndex()   # 核心 Agent 排行
+        self._others = AccountIndex()   # 非 Agent 账户
+        self._total_weight = 0.0
+        self._proposal_holders: Dict[str, str] = {}        # 提案ID -> 提案所在账户
+        self._proposal_votes: Dict[str, Dict[str, Dict[str, Any]]] = {}  # 提案ID -> 投票者 -> 投票
+
+    def refresh(self, world_state, agent_addresses: Iterable[str] = (), block_height: Optional[int] = None) -> int:
+        """
+        用修改过的账户更新视图，返回更新后的版本号；没有修改时不做任何事
+
+        Args:
+            world_state: 世界状态（提供 state 与 take_view_changes）
+            agent_addresses: 核心 Agent 地址，名单变化时重建视图
+            block_height: 视图对应的区块高度
+        """
+        rebuild, changed = world_state.take_view_changes()
+        agents = frozenset(agent_addresses)
+        with self._lock:
+            if agents != self.agent_addresses:
+                self.agent_addresses = agents
+                rebuild = True
+            if rebuild:
+                self._clear()
+                changed = set(world_state.state)
+            if not changed and block_height == self.block_height and not rebuild:
+                return self.version
+            for address in changed:
+                self._apply(address, world_state.state.get(address))
+            self.block_height = block_height
+            self.version += 1
+            return self.version
+
+    def _clear(self) -> None:
+        self._rows.clear()
+        self._agents.clear()
+        self._others.clear()
+        self._total_weight = 0.0
+        self._proposal_holders.clear()
+        self._proposal_votes.clear()
+
+    def _apply(self, address: str, account: Optional[Account]) -> None:
+        old = self._rows.pop(address, None)
+        if old is not None:
+            self._total_weight -= old.weight
+            for pid in old.proposals:
+                if self._proposal_holders.get(pid) == address:
+                    del self._proposal_holders[pid]
+            for pid in old.votes:
+                voters = self._proposal_votes.get(pid)
+                if voters is not None:
+                    voters.pop(address, None)
+                    if not voters:
+                        del self._proposal_votes[pid]
+            (self._agents if address in self.agent_addresses else self._others).remove(address)
+        if account is None:
+            return
+
+        row = self._rows[address] = _Row(account)
+        self._total_weight += row.weight
+        for pid in row.proposals:
+            self._proposal_holders.setdefault(pid, address)
+        for pid, vote in row.votes.items():
+            self._proposal_votes.setdefault(pid, {})[address] = vote
+        (self._agents if address in self.agent_addresses else self._others).upsert(address, _rank_key(account))
+
+    # ====================== 读取接口 ======================
+
+    def leaderboard(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Agent 排行（未设置 Agent 名单时为全部账户）"""
+        with self._lock:
+            index = self._agents if self.agent_addresses else self._others
+            return {
+                "version": self.version,
+                "block_height": self.block_height,
+                "total": len(index),
+                "accounts": [self._rows[address].to_dict() for address in index.page(offset, limit)],
+            }
+
+    def account(self, address: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._rows.get(address)
+            return row.to_dict() if row else None
+
+    def proposal_tally(self, proposal_id: str) -> Dict[str, Any]:
+        """
+        提案的投票统计
+
+        Returns:
+            dict: holder_address、votes（for/against/abstain 加权票数）、voters（投票列表）、
+                  total_network_weight、account_count
+        """
+        with self._lock:
+            holder = self._proposal_holders.get(proposal_id)
+            tally = self._rows[holder].proposals[proposal_id] if holder else {}
+            voters = self._proposal_votes.get(proposal_id, {})
+            return {
+                "holder_address": holder,
+                "votes": {option: tally.get(option, 0) for option in ("for", "against", "abstain")},
+                "voters": [{"address": address, "option": vote["option"], "weight": vote["weight"]}
+                           for address, vote in voters.items()],
+                "total_network_weight": self._total_weight,
+                "account_count": len(self._rows),
+            }
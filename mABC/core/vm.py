@@ -4,14 +4,54 @@
 """
 
 import hashlib
-import json
+import os
+import threading
 import time
-from typing import Dict, Any, Optional, List
-from ecdsa import SigningKey, VerifyingKey, SECP256k1
-from ecdsa.util import sigdecode_der
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from pydantic import BaseModel, Field
+from .block_store import BlockStore, PersistentChain
+from .event_bus import BlockMined, event_bus
+from .mempool import Mempool
+from .receipt_store import RECEIPT_STORE_FILE, ReceiptStore
+from .signature import transaction_digest, verify_batch, verify_digest
+from .snapshot import DEFAULT_SNAPSHOT_INTERVAL, SnapshotStore
 from .state import world_state, state_processor
-from .types import Transaction, Block, BlockHeader, get_merkle_root
+from .treasury import TREASURY_INITIAL_BALANCE, TREASURY_INITIAL_REPUTATION, TREASURY_KEY_FILE, Treasury
+from .tx_index import TX_INDEX_FILE, TransactionIndex
+from .validator import VALIDATOR_CHECKPOINT_FILE, ChainValidator, full_block_hash
+from .views import StateViews
+from .types import Transaction, TransactionReceipt, Block, BlockHeader, MerkleTree, get_merkle_root
+
+
+MERKLE_TREE_CACHE_SIZE = 1024      # 内存中缓存的区块Merkle树数量
+BLOCK_SUMMARY_CACHE_SIZE = 10000   # 内存中缓存的区块摘要数量
+
+
+class _LRUCache:
+    """线程安全的LRU缓存，超出容量时淘汰最久未使用的条目"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
 
 
 class TransactionType:
@@ -28,63 +68,120 @@ class TransactionType:
 class Blockchain:
     """区块链类，负责交易池管理和挖矿出块"""
 
-    def __init__(self):
-        self.pending_transactions: List[Transaction] = []
-        self.chain: List[Block] = []
+    def __init__(self, data_dir: Optional[str] = None, snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL):
+        """
+        Args:
+            data_dir: 区块持久化目录；为 None 时区块只保存在内存中
+            snapshot_interval: 每多少个区块保存一次世界状态快照（需指定 data_dir，0 表示不自动保存）
+        """
+        self.mempool = Mempool()
+        self.max_block_transactions = 1000  # 每个区块最多打包的交易数
+        self.producer = None  # 运行中的 BlockProducer（见 core/producer.py）
+        # 区块高度 -> 出块时构建的Merkle树，供根哈希校验与证明生成复用（只缓存最近使用的区块）
+        self.merkle_trees = _LRUCache(MERKLE_TREE_CACHE_SIZE)
+        # 区块高度 -> 区块摘要（区块头字段、哈希、交易数），区块封装后不再变化，列表页无需读取完整区块
+        self.block_summaries = _LRUCache(BLOCK_SUMMARY_CACHE_SIZE)
+        # 出块线程与提交交易的线程共享交易池和世界状态
+        self.lock = threading.RLock()
+        # 持久化时为 PersistentChain（按需从磁盘读取区块），否则为内存列表
+        self.chain = PersistentChain(BlockStore(data_dir)) if data_dir else []
+        # 全链校验的检查点保存在区块目录下，重启后只校验之后写入的区块
+        self.validator = ChainValidator(
+            full_block_hash,
+            checkpoint_path=os.path.join(data_dir, VALIDATOR_CHECKPOINT_FILE) if data_dir else None,
+        )
+        # 世界状态快照，保存在区块目录下
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = SnapshotStore(os.path.join(data_dir, "snapshots")) if data_dir else None
         self.gas_price = 1  # 每单位Gas的价格
         self.min_gas_limit = 200  # 最小Gas限制（盈利友好：降低交易成本）
-        self._treasury_address: Optional[str] = None
-        self._treasury_private_key: Optional[SigningKey] = None
+        # 系统金库：私钥保存在区块目录下，重启后地址不变（未持久化时为临时密钥）
+        self.treasury = Treasury.load_or_create(os.path.join(data_dir, TREASURY_KEY_FILE) if data_dir else None)
+        state_processor.treasury_address = self.treasury.address
         self.agent_addresses = set()  # 核心Agent地址集合
-        # 创建创世区块
-        self._create_genesis_block()
+        # 账户排行与投票统计的物化视图，出块后增量更新
+        self.views = StateViews()
+        # 交易二级索引（按哈希、发送者、类型、提案、目标地址查询），出块时写入，保存在区块目录下
+        self.tx_index = TransactionIndex(os.path.join(data_dir, TX_INDEX_FILE) if data_dir else ":memory:")
+        # 交易回执与区块一同写入，保存在区块目录下的 receipts.db（见 core/receipt_store.py）
+        self.receipts = ReceiptStore(os.path.join(data_dir, RECEIPT_STORE_FILE) if data_dir else ":memory:")
+        # 创建创世区块（已有持久化区块时直接复用）
+        if len(self.chain):
+            print(f"Loaded {len(self.chain)} blocks from {data_dir}")
+            # 启动时增量校验从磁盘读取的区块
+            if not self.validate_chain()["valid"]:
+                print(f"Warning: blocks loaded from {data_dir} failed validation")
+            # 丢弃已写入回执、但区块未能落盘的交易回执
+            self.receipts.truncate(len(self.chain))
+            # 世界状态记录的高度与链顶不一致（如出块中途崩溃）时，从快照恢复
+            tip = len(self.chain) - 1
+            if world_state.block_height is not None and world_state.block_height != tip:
+                self.restore_state()
+        else:
+            self._create_genesis_block()
+        # 补齐索引落后的区块（如索引文件创建之前已有的链）
+        indexed = self.tx_index.sync(self.chain)
+        if indexed > 1:
+            print(f"Indexed transactions of {indexed} blocks")
+
+    @property
+    def pending_transactions(self) -> List[Transaction]:
+        """交易池快照（按发送者、nonce 顺序）"""
+        with self.lock:
+            return list(self.mempool)
 
     def _create_genesis_block(self):
         """创建创世区块"""
+        # 金库账户在创世时登记，包含在创世区块的状态根中
+        self.register_treasury_account()
         # 使用成员1提供的数据结构创建创世区块
         genesis_header = BlockHeader(
             index=0,
             timestamp=int(time.time()),
             previous_hash="0" * 64,
             merkle_root=get_merkle_root([]),
+            state_root=world_state.commit_state_root(),
         )
         genesis_block = Block(header=genesis_header, transactions=[])
         genesis_block.hash = self._calculate_block_hash(genesis_block)
         self.chain.append(genesis_block)
+        self.block_summaries.put(0, self._summarize(genesis_block))
         print("Genesis block created")
 
     def _calculate_block_hash(self, block: Block) -> str:
         """计算区块哈希"""
-        # 使用成员1提供的方法计算区块哈希
-        from .types import calculate_hash
-
-        block_dict = block.model_dump(exclude={"hash"})
-        block_json = json.dumps(block_dict, sort_keys=True, separators=(",", ":"))
-        return calculate_hash(block_json)
+        return full_block_hash(block)
 
     def _get_treasury_account(self):
-        """选择系统金库账户（当前实现：选择余额最高的非Agent账户）"""
-        if not world_state.state:
-            return None
-        # 缓存地址提高性能
-        if self._treasury_address and self._treasury_address in world_state.state:
-            # 确保缓存的地址不是Agent地址
-            if self._treasury_address not in self.agent_addresses:
-                return world_state.get_account(self._treasury_address)
-            else:
-                self._treasury_address = None  # 清除无效缓存
-
-        # 选择余额最高的非Agent账户作为金库
-        max_acc = None
-        for acc in world_state.state.values():
-            if acc.address in self.agent_addresses:
-                continue
-            if max_acc is None or (acc.balance or 0) > (max_acc.balance or 0):
-                max_acc = acc
-
-        if max_acc:
-            self._treasury_address = max_acc.address
-        return max_acc
+        """系统金库账户（按固定地址直接读取）"""
+        return world_state.get_account(self.treasury.address)
+
+    def register_treasury_account(self):
+        """登记系统金库账户并注入初始资金（创世或重置时调用），账户已存在时保持不变"""
+        with self.lock:
+            account = world_state.get_account(self.treasury.address)
+            if account is None:
+                account = world_state.create_account(self.treasury.address)
+                account.name = "Treasury"
+                account.balance = TREASURY_INITIAL_BALANCE
+                account.reputation = TREASURY_INITIAL_REPUTATION
+                world_state.update_account(account)
+            return account
+
+    def _credit_treasury(self, amount: int, address: Optional[str] = None) -> None:
+        """把一个区块收取的Gas费用一次性记入金库（address 默认为当前金库）"""
+        if amount <= 0:
+            return
+        address = address or self.treasury.address
+        account = world_state.get_account(address) or world_state.create_account(address)
+        account.balance = (account.balance or 0) + amount
+        world_state.update_account(account)
+
+    def refresh_views(self) -> StateViews:
+        """把修改过的账户同步到物化视图（只处理修改过的账户），返回视图"""
+        with self.lock:
+            self.views.refresh(world_state, self.agent_addresses, world_state.block_height)
+        return self.views
 
     def add_transaction(self, tx: Transaction) -> bool:
         """
@@ -96,11 +193,53 @@ class Blockchain:
             print("Invalid transaction signature")
             return False
 
-        # 2. 检查Nonce防止重放
+        with self.lock:
+            return self._admit_transaction(tx)
+
+    def add_transactions(self, txs: List[Transaction], processes: Optional[int] = None) -> List[bool]:
+        """
+        批量添加交易到交易池
+        签名校验在进程池中并行完成，其余校验与入池仍按顺序在当前进程执行
+
+        Args:
+            txs: 交易列表
+            processes: 校验签名的进程数，默认 CPU 核数
+
+        Returns:
+            list: 与 txs 一一对应的入池结果
+        """
+        from .blockchain import PublicKeyRegistry
+
+        jobs = []
+        job_index = []
+        for i, tx in enumerate(txs):
+            public_key_hex = PublicKeyRegistry.get_public_key(tx.sender)
+            if not tx.signature:
+                continue
+            if not public_key_hex:
+                print(f"Public key not found for address: {tx.sender}")
+                continue
+            jobs.append((public_key_hex, tx.signature, transaction_digest(tx)))
+            job_index.append(i)
+
+        signature_ok = [False] * len(txs)
+        for i, result in zip(job_index, verify_batch(jobs, processes)):
+            signature_ok[i] = result
+
+        results = []
+        with self.lock:
+            for tx, ok in zip(txs, signature_ok):
+                if not ok:
+                    print("Invalid transaction signature")
+                    results.append(False)
+                else:
+                    results.append(self._admit_transaction(tx))
+        return results
+
+    def _admit_transaction(self, tx: Transaction) -> bool:
+        """签名校验通过后的 Nonce/Gas/余额校验，通过则加入交易池"""
+        # 2. 检查Nonce防止重放（允许在已排队交易之后继续排队，由交易池校验连续性）
         account = world_state.get_account(tx.sender)
-        if account and tx.nonce != account.nonce:
-            print(f"Invalid nonce. Expected {account.nonce}, got {tx.nonce}")
-            return False
 
         # 3. 检查Gas限制（奖励交易免校验）
         if tx.tx_type != TransactionType.REWARD:
@@ -108,9 +247,9 @@ class Blockchain:
                 print(f"Gas limit too low. Minimum is {self.min_gas_limit}")
                 return False
 
-        # 4. 检查发送者余额（奖励交易免Gas）
+        # 4. 检查发送者余额（奖励交易免Gas；需覆盖已排队交易的Gas）
         if tx.tx_type != TransactionType.REWARD:
-            required_gas = tx.gas_price * tx.gas_limit
+            required_gas = tx.gas_price * tx.gas_limit + self.mempool.pending_cost(tx.sender)
             if account and account.balance < required_gas:
                 print(
                     f"Insufficient balance. Required {required_gas}, available {account.balance}"
@@ -118,30 +257,39 @@ class Blockchain:
                 return False
 
         # 交易验证通过，加入待打包交易池
-        self.pending_transactions.append(tx)
+        account_nonce = account.nonce if account else tx.nonce
+        if not self.mempool.add(tx, account_nonce):
+            return False
         print(f"Transaction added to pending pool: {tx.tx_type}")
         return True
 
-    def mine_block(self) -> Optional[Block]:
+    def mine_block(self, max_transactions: Optional[int] = None, max_gas: Optional[int] = None) -> Optional[Block]:
         """
         挖矿/出块
         根据接口文档要求实现
+
+        Args:
+            max_transactions: 本区块最多打包的交易数（默认 max_block_transactions）
+            max_gas: 本区块打包交易的 gas_limit 总和上限（默认不限制）
         """
-        if not self.pending_transactions:
+        with self.lock:
+            return self._mine_block(max_transactions or self.max_block_transactions, max_gas)
+
+    def _mine_block(self, max_transactions: int, max_gas: Optional[int]) -> Optional[Block]:
+        if not self.mempool:
             print("No pending transactions to mine")
             return None
 
-        # 从池中取出交易
-        transactions_to_mine = self.pending_transactions.copy()
-        self.pending_transactions.clear()
+        # 从池中按优先级取出可执行交易（同一发送者保持nonce顺序）
+        transactions_to_mine = self.mempool.pop_executable(max_transactions, max_gas)
 
-        # 创建新区块头
+        # 创建新区块头（Merkle根在交易执行完成、区块封装时计算）
         previous_block = self.chain[-1]
         new_header = BlockHeader(
             index=previous_block.header.index + 1,
             timestamp=int(time.time()),
             previous_hash=previous_block.hash or "",
-            merkle_root=get_merkle_root(transactions_to_mine),
+            merkle_root="",
         )
 
         # 创建新区块
@@ -149,106 +297,322 @@ class Blockchain:
 
         # 调用StateProcessor执行交易
         successful_transactions = []
+        receipts: List[TransactionReceipt] = []
+        failed_senders = set()
+        fees = 0  # 本区块收取的Gas费用，区块结束时一次性记入金库
         for tx in transactions_to_mine:
-            # 执行交易前先扣除Gas费用（奖励交易免Gas）
-            gas_fee = tx.gas_price * tx.gas_limit
-            account = world_state.get_account(tx.sender)
-            if not account:
-                account = world_state.create_account(tx.sender)
-
-            if tx.tx_type == TransactionType.REWARD:
-                # 奖励交易不扣Gas
-                pass
-            elif account.balance >= gas_fee:
-                account.balance -= gas_fee
-                world_state.update_account(account)
-                # 将Gas费用计入系统金库
-                treasury = self._get_treasury_account()
-                if treasury:
-                    treasury.balance = (treasury.balance or 0) + gas_fee
-                    world_state.update_account(treasury)
-            else:
-                print(f"Insufficient balance for gas fee: {tx.sender}")
+            receipt = TransactionReceipt(
+                tx_hash=transaction_digest(tx), tx_type=tx.tx_type, sender=tx.sender, success=False
+            )
+            receipts.append(receipt)
 
-            # 调用StateProcessor应用交易
-            if state_processor.apply_transaction(tx):
+            # 前序交易失败后nonce断档，该发送者后续交易全部丢弃
+            if tx.sender in failed_senders:
+                print(f"Dropped transaction after failed nonce: {tx.tx_type}")
+                receipt.error = "Dropped: a previous transaction from this sender failed"
+                continue
+
+            success, gas_charged = self._execute_transaction(tx)
+            if success:
                 successful_transactions.append(tx)
-                # 增加nonce
-                world_state.increment_nonce(tx.sender)
+                receipt.success = True
+                receipt.gas_used = tx.gas_limit if gas_charged else 0
+                receipt.logs = state_processor.last_logs
+                if gas_charged:
+                    fees += tx.gas_price * tx.gas_limit
             else:
                 print(f"Failed to apply transaction: {tx.tx_type}")
-                # 退还Gas费用（非奖励交易）
-                if tx.tx_type != TransactionType.REWARD:
-                    account.balance += gas_fee
-                    world_state.update_account(account)
-                    # 从金库扣回已记账的Gas
-                    treasury = self._get_treasury_account()
-                    if treasury and (treasury.balance or 0) >= gas_fee:
-                        treasury.balance -= gas_fee
-                        world_state.update_account(treasury)
+                receipt.error = state_processor.last_error
+                failed_senders.add(tx.sender)
+                self.mempool.remove_sender(tx.sender)
 
         # 更新区块的交易列表为成功执行的交易
         new_block.transactions = successful_transactions
+        self._credit_treasury(fees)
 
-        # 更新Merkle根
-        new_block.header.merkle_root = get_merkle_root(successful_transactions)
+        # 构建Merkle树（只构建一次并缓存），更新Merkle根
+        merkle_tree = MerkleTree.from_transactions(successful_transactions)
+        self.merkle_trees.put(new_block.header.index, merkle_tree)
+        new_block.header.merkle_root = merkle_tree.root()
+        # 只更新本区块修改过的账户路径，得到新的状态根
+        new_block.header.state_root = world_state.commit_state_root()
 
         # 计算区块哈希
         new_block.hash = self._calculate_block_hash(new_block)
 
-        # 将合法区块追加到链上
+        # 先写入本区块的回执（含失败交易），再将合法区块追加到链上
+        for receipt in receipts:
+            receipt.block_number = new_block.header.index
+            receipt.block_hash = new_block.hash
+        self.receipts.add_block(new_block.header.index, receipts)
         self.chain.append(new_block)
-        print(
-            f"New block mined: #{new_block.header.index} with {len(successful_transactions)} transactions"
-        )
+        self.block_summaries.put(new_block.header.index, self._summarize(new_block))
+        self.tx_index.add_block(new_block)
+        world_state.set_block_height(new_block.header.index)
+        self.refresh_views()
+        if self.snapshots and self.snapshot_interval and new_block.header.index % self.snapshot_interval == 0:
+            self.take_snapshot()
+        event_bus.emit(BlockMined(
+            block_number=new_block.header.index,
+            block_hash=new_block.hash,
+            transactions=len(successful_transactions),
+        ))
 
         return new_block
 
+    def _execute_transaction(self, tx: Transaction) -> Tuple[bool, bool]:
+        """
+        执行单笔交易：扣除Gas、应用交易、增加nonce，失败时退还Gas
+        成功交易的Gas费用由调用方按区块汇总后记入金库（见 _credit_treasury）
+        出块与从快照重放区块共用，保证两者对世界状态的影响一致
+
+        Returns:
+            tuple: (是否执行成功, 是否扣除了Gas)
+        """
+        # 执行交易前先扣除Gas费用（奖励交易免Gas）
+        gas_fee = tx.gas_price * tx.gas_limit
+        gas_charged = False
+        account = world_state.get_account(tx.sender)
+        if not account:
+            account = world_state.create_account(tx.sender)
+
+        if tx.tx_type == TransactionType.REWARD:
+            # 奖励交易不扣Gas
+            pass
+        elif account.balance >= gas_fee:
+            account.balance -= gas_fee
+            gas_charged = True
+            world_state.update_account(account)
+        else:
+            print(f"Insufficient balance for gas fee: {tx.sender}")
+
+        # 调用StateProcessor应用交易
+        if state_processor.apply_transaction(tx):
+            # 增加nonce
+            world_state.increment_nonce(tx.sender)
+            return True, gas_charged
+
+        # 退还Gas费用（仅退还实际扣除的部分）
+        if gas_charged:
+            account.balance += gas_fee
+            world_state.update_account(account)
+        return False, gas_charged
+
+    def take_snapshot(self) -> Optional[str]:
+        """
+        在链顶保存世界状态快照（如在链外初始化账户资金之后调用）
+
+        Returns:
+            str: 快照的状态根；未启用持久化时返回 None
+        """
+        if not self.snapshots:
+            return None
+        with self.lock:
+            tip = self.chain[-1]
+            world_state.set_block_height(tip.header.index)
+            # 金库地址决定Gas费用的去向，随快照保存以便重放时记入同一账户
+            metadata = {"treasury_address": self.treasury.address}
+            state_root = self.snapshots.save(tip.header.index, tip.hash or "", world_state.state.values(), metadata)
+            print(f"State snapshot saved at block #{tip.header.index}: {state_root}")
+            return state_root
+
+    def restore_state(self) -> Dict[str, Any]:
+        """
+        从最近的快照恢复世界状态，并通过与出块相同的执行路径重放其后的区块
+
+        Returns:
+            dict: success、snapshot_height、replayed_blocks、state_root、elapsed，
+                  失败时还包含 error
+        """
+        start_time = time.perf_counter()
+        with self.lock:
+            snapshot = self.snapshots.latest(self.chain) if self.snapshots else None
+            if snapshot is None:
+                print("No usable state snapshot, keeping current world state")
+                return {"success": False, "error": "No usable state snapshot"}
+
+            world_state.replace_state(snapshot.accounts, snapshot.height)
+            treasury_address = snapshot.metadata.get("treasury_address") or self.treasury.address
+            report: Dict[str, Any] = {"success": True, "snapshot_height": snapshot.height}
+            replayed = 0
+            # 重放期间罚没金额与Gas费用一样记入快照记录的金库，且不推进 SOP 合约
+            state_processor.treasury_address = treasury_address
+            state_processor.replaying = True
+            try:
+                for height in range(snapshot.height + 1, len(self.chain)):
+                    block = self.chain[height]
+                    fees = 0
+                    for tx in block.transactions:
+                        success, gas_charged = self._execute_transaction(tx)
+                        if not success:
+                            report["success"] = False
+                            report["error"] = f"Transaction {transaction_digest(tx)} failed on replay at block {height}"
+                            break
+                        if gas_charged:
+                            fees += tx.gas_price * tx.gas_limit
+                    if not report["success"]:
+                        break
+                    self._credit_treasury(fees, treasury_address)
+                    world_state.set_block_height(height)
+                    replayed += 1
+                    # 状态根不符说明快照之后有链外修改（如直接初始化账户资金），无法通过重放还原
+                    if (block.header.state_root and "state_root_mismatch" not in report
+                            and world_state.state_root() != block.header.state_root):
+                        report["state_root_mismatch"] = height
+                        print(f"Warning: state root differs from block #{height} after replay")
+            finally:
+                state_processor.treasury_address = self.treasury.address
+                state_processor.replaying = False
+
+            self.refresh_views()
+            report["replayed_blocks"] = replayed
+            report["state_root"] = world_state.state_root()
+            report["elapsed"] = round(time.perf_counter() - start_time, 4)
+            print(
+                f"State restored from snapshot #{snapshot.height}, replayed {replayed} blocks"
+                + ("" if report["success"] else f": {report['error']}")
+            )
+            return report
+
+    def verify_state(self) -> Dict[str, Any]:
+        """
+        检查世界状态是否与链顶区块头中的状态根一致
+
+        Returns:
+            dict: matches、block_number、state_root、block_state_root
+        """
+        with self.lock:
+            tip = self.chain[-1]
+            state_root = world_state.commit_state_root()
+            return {
+                "matches": state_root == tip.header.state_root,
+                "block_number": tip.header.index,
+                "state_root": state_root,
+                "block_state_root": tip.header.state_root,
+            }
+
+    def get_account_proof(self, address: str) -> Dict[str, Any]:
+        """
+        生成账户在当前状态树中的证明，O(log n) 个兄弟节点哈希
+
+        Returns:
+            dict: address、account、state_root、siblings、leaf，以及链顶的 block_number 与
+                  block_state_root（状态在链顶之后未被链外修改时二者与 state_root 一致）
+        """
+        with self.lock:
+            proof = world_state.get_account_proof(address)
+            tip = self.chain[-1]
+            proof["block_number"] = tip.header.index
+            proof["block_state_root"] = tip.header.state_root
+            return proof
+
+    def validate_chain(self) -> Dict[str, Any]:
+        """增量校验区块链（只检查上次校验之后的新区块），返回校验报告与吞吐量"""
+        return self.validator.validate(self.chain)
+
+    def is_valid_chain(self) -> bool:
+        return self.validate_chain()["valid"]
+
+    def get_merkle_tree(self, block_index: int) -> MerkleTree:
+        """获取区块的Merkle树，未缓存时（如创世区块）按需构建"""
+        tree = self.merkle_trees.get(block_index)
+        if tree is None:
+            tree = MerkleTree.from_transactions(self.chain[block_index].transactions)
+            self.merkle_trees.put(block_index, tree)
+        return tree
+
+    def get_transaction_proofs(self, locations: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """
+        批量生成交易的Merkle证明，同一区块的交易共用出块时缓存的Merkle树
+
+        Args:
+            locations: (区块高度, 交易序号) 列表
+
+        Returns:
+            list: 与 locations 一一对应的 block_index、tx_index、transaction_hash、
+                  merkle_root（区块头中的Merkle根）、proof_path
+
+        Raises:
+            IndexError: 区块或交易不存在
+        """
+        height = len(self.chain)
+        proofs = []
+        for block_index, tx_index in locations:
+            if block_index < 0 or block_index >= height:
+                raise IndexError(f"Block not found: {block_index}")
+            tree = self.get_merkle_tree(block_index)
+            if tx_index < 0 or tx_index >= len(tree):
+                raise IndexError(f"Transaction not found: {block_index}/{tx_index}")
+            proofs.append({
+                "block_index": block_index,
+                "tx_index": tx_index,
+                "transaction_hash": tree.leaf(tx_index),
+                "merkle_root": self.get_block_summary(block_index)["merkle_root"],
+                "proof_path": tree.proof(tx_index),
+            })
+        return proofs
+
+    @staticmethod
+    def _summarize(block: Block) -> Dict[str, Any]:
+        return {
+            "index": block.header.index,
+            "hash": block.hash or "",
+            "previous_hash": block.header.previous_hash,
+            "timestamp": block.header.timestamp,
+            "merkle_root": block.header.merkle_root,
+            "state_root": block.header.state_root,
+            "transaction_count": len(block.transactions),
+        }
+
+    def get_block_summary(self, height: int) -> Dict[str, Any]:
+        """获取区块摘要，未缓存时（如从磁盘加载的区块）读取一次区块并缓存"""
+        summary = self.block_summaries.get(height)
+        if summary is None:
+            summary = self._summarize(self.chain[height])
+            self.block_summaries.put(height, summary)
+        return summary
+
+    def get_block_summaries(self, before: Optional[int] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        按高度倒序分页获取区块摘要
+
+        Args:
+            before: 游标，只返回高度小于该值的区块（默认从链顶开始）
+            limit: 最多返回的区块数
+        """
+        height = len(self.chain)
+        end = height if before is None else max(0, min(before, height))
+        return [self.get_block_summary(index) for index in range(end - 1, max(0, end - limit) - 1, -1)]
+
+    def get_receipt(self, tx_hash: str) -> Optional[TransactionReceipt]:
+        """按交易哈希查询回执，交易尚未出块时返回 None"""
+        return self.receipts.get(tx_hash)
+
+    def get_block_receipts(self, height: int) -> List[TransactionReceipt]:
+        """查询区块处理过的全部交易（含失败交易）的回执"""
+        return self.receipts.block(height)
+
     def _verify_transaction_signature(self, tx: Transaction) -> bool:
         """验证交易签名"""
         if not tx.signature:
             return False
 
-        try:
-            # 使用成员1提供的公钥查找接口
-            from .blockchain import PublicKeyRegistry
-
-            public_key_hex = PublicKeyRegistry.get_public_key(tx.sender)
-
-            # 如果公钥查找失败，则签名验证失败
-            if not public_key_hex:
-                print(f"Public key not found for address: {tx.sender}")
-                return False
+        # 使用成员1提供的公钥查找接口
+        from .blockchain import PublicKeyRegistry
 
-            # 使用公钥进行签名验证
-            vk = VerifyingKey.from_string(
-                bytes.fromhex(public_key_hex), curve=SECP256k1
-            )
+        public_key_hex = PublicKeyRegistry.get_public_key(tx.sender)
 
-            # 计算交易哈希（不包含签名）
-            tx_dict = tx.model_dump(exclude={"signature"})
-            tx_json = json.dumps(tx_dict, sort_keys=True, separators=(",", ":"))
-            # 使用成员1提供的哈希函数
-            from .types import calculate_hash
+        # 如果公钥查找失败，则签名验证失败
+        if not public_key_hex:
+            print(f"Public key not found for address: {tx.sender}")
+            return False
 
-            tx_hash = calculate_hash(tx_json)
+        # 解析后的公钥按公钥内容缓存，地址重新注册公钥后自然失效
+        return verify_digest(public_key_hex, tx.signature, transaction_digest(tx))
 
-            # 生产环境使用ECDSA签名验证
-            try:
-                # 验证签名（使用 verify_digest，因为签名时用的是 sign_digest）
-                result = vk.verify_digest(
-                    bytes.fromhex(tx.signature),
-                    bytes.fromhex(tx_hash),
-                    sigdecode=sigdecode_der,
-                )
-                return result
-            except Exception as verify_error:
-                print(f"Signature verification failed: {verify_error}")
-                return False
-        except Exception as e:
-            print(f"Signature verification failed: {e}")
-            return False
 
+# 区块持久化目录（与 state.db 一样相对于工作目录），使链与世界状态一同保存
+CHAIN_DATA_DIR = "chain_data"
 
 # 单例模式的区块链实例
-blockchain = Blockchain()
+blockchain = Blockchain(data_dir=CHAIN_DATA_DIR)
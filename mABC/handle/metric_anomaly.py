@@ -0,0 +1,125 @@
+"""
+指标异常预筛选索引
+将 endpoints_stat.json 转为 (端点 x 分钟 x 指标) 的矩阵，基于中位数/MAD 的稳健 z-score
+对全部端点一次性(向量化)打分，供 Agent 只针对可疑端点做进一步查询。
+
+基线选择：
+- 端点在窗口开始前 baseline_minutes 分钟内有足够历史数据时，使用自身滚动基线
+- 否则退化为窗口内全部端点的同侪基线
+"""
+
+import warnings
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from handle.topology_store import int_to_minute, minute_to_int
+
+ANOMALY_METRICS = ('average_duration', 'error_rate', 'timeout_rate')
+# 各指标的最小尺度，避免 MAD 为 0 时微小波动被放大
+MIN_SCALE = np.array([5.0, 0.5, 0.5])
+MAD_TO_SIGMA = 1.4826
+MIN_BASELINE_POINTS = 5
+DEFAULT_BASELINE_MINUTES = 60
+SUSPICIOUS_SCORE = 3.0
+
+
+class AnomalyIndex:
+    def __init__(self, aggregated_stats: Dict[str, Dict[str, dict]],
+                 baseline_minutes: int = DEFAULT_BASELINE_MINUTES):
+        self.baseline_minutes = baseline_minutes
+        self.endpoints: List[str] = sorted(aggregated_stats)
+        minutes = sorted({minute_to_int(m) for per_minute in aggregated_stats.values() for m in per_minute})
+        self.minutes: List[int] = minutes
+        column = {m: i for i, m in enumerate(minutes)}
+
+        # values[e, t, k]: 端点 e 在第 t 分钟的第 k 个指标，无数据为 NaN
+        self.values = np.full((len(self.endpoints), len(minutes), len(ANOMALY_METRICS)), np.nan)
+        for row, endpoint in enumerate(self.endpoints):
+            for minute, stats in aggregated_stats[endpoint].items():
+                t = column[minute_to_int(minute)]
+                self.values[row, t] = [stats.get(metric, 0) or 0 for metric in ANOMALY_METRICS]
+
+        # (start_col, end_col) -> (median, scale, count)，同一窗口起点的基线只计算一次
+        self._baseline_cache: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def _columns(self, lo: int, hi: int) -> Tuple[int, int]:
+        """[lo, hi] 分钟区间对应的列切片"""
+        return bisect_left(self.minutes, lo), bisect_right(self.minutes, hi)
+
+    @staticmethod
+    def _median_scale(samples: np.ndarray, axis: int) -> Tuple[np.ndarray, np.ndarray]:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)  # 全 NaN 切片
+            median = np.nanmedian(samples, axis=axis)
+            mad = np.nanmedian(np.abs(samples - np.expand_dims(median, axis)), axis=axis)
+        scale = np.maximum(MAD_TO_SIGMA * np.nan_to_num(mad), MIN_SCALE)
+        return median, scale
+
+    def _baseline(self, start_col: int, end_col: int):
+        key = (start_col, end_col)
+        if key not in self._baseline_cache:
+            history = self.values[:, start_col:end_col, :]
+            median, scale = self._median_scale(history, axis=1)
+            count = np.sum(~np.isnan(history), axis=1)
+            self._baseline_cache[key] = (median, scale, count)
+        return self._baseline_cache[key]
+
+    def score_window(self, time_minute: str, before: int = 15, after: int = 5):
+        """
+        对全部端点在 [t-before, t+after] 内打分
+
+        Returns:
+            (scores[E], metric_index[E], peak_col[E], median[E, K], window_start_col)
+        """
+        center = minute_to_int(time_minute)
+        w0, w1 = self._columns(center - before, center + after)
+        if w0 >= w1 or not self.endpoints:
+            return None
+        window = self.values[:, w0:w1, :]
+
+        b0, _ = self._columns(center - before - self.baseline_minutes, center - before)
+        median, scale, count = self._baseline(b0, w0)
+
+        # 历史不足的端点使用同侪基线(窗口内全部端点)
+        peer_median, peer_scale = self._median_scale(window.reshape(-1, window.shape[2]), axis=0)
+        use_peer = count < MIN_BASELINE_POINTS
+        median = np.where(use_peer, peer_median, median)
+        scale = np.where(use_peer, peer_scale, scale)
+
+        # 三项指标均为越大越差，只关注向上偏离
+        z = (window - median[:, None, :]) / scale[:, None, :]
+        z = np.where(np.isnan(z), -np.inf, z)
+        flat = z.reshape(z.shape[0], -1)
+        best = np.argmax(flat, axis=1)
+        scores = flat[np.arange(flat.shape[0]), best]
+        peak_col, metric_index = np.divmod(best, z.shape[2])
+        return scores, metric_index, peak_col, median, w0
+
+    def rank(self, time_minute: str, top_k: Optional[int] = 10, before: int = 15, after: int = 5) -> List[dict]:
+        """按异常分数降序返回窗口内有数据的端点"""
+        scored = self.score_window(time_minute, before, after)
+        if scored is None:
+            return []
+        scores, metric_index, peak_col, median, w0 = scored
+        order = np.argsort(-scores, kind="stable")
+        result = []
+        for row in order:
+            score = scores[row]
+            if not np.isfinite(score):
+                continue
+            k = metric_index[row]
+            t = w0 + peak_col[row]
+            result.append({
+                "endpoint": self.endpoints[row],
+                "score": round(float(score), 2),
+                "suspicious": bool(score >= SUSPICIOUS_SCORE),
+                "metric": ANOMALY_METRICS[k],
+                "value": round(float(self.values[row, t, k]), 2),
+                "baseline": round(float(median[row, k]), 2),
+                "peak_minute": int_to_minute(self.minutes[t]),
+            })
+            if top_k and len(result) >= top_k:
+                break
+        return result
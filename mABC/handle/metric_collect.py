@@ -2,6 +2,8 @@ import json
 from datetime import datetime, timedelta
 import os
 
+from handle.metric_anomaly import AnomalyIndex
+
 class MetricExplorer:
     def __init__(self):
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -11,6 +13,14 @@ class MetricExplorer:
         # ../.. = project_root
         stats_file = os.path.join(script_dir, '..', '..', 'data', 'topology', 'endpoints_stat.json')
         self.aggregated_stats = self.load_data(stats_file)
+        self._anomaly_index = None
+
+    @property
+    def anomaly_index(self):
+        # 首次使用时构建，避免只做单点查询时的额外开销
+        if self._anomaly_index is None:
+            self._anomaly_index = AnomalyIndex(self.aggregated_stats)
+        return self._anomaly_index
 
     def load_data(self, filename):
         with open(filename, 'r') as f:
@@ -36,6 +46,10 @@ class MetricExplorer:
             current_time += timedelta(minutes=1)
         return range_stats
 
+    def rank_anomalous_endpoints(self, time_minute, top_k=10):
+        """窗口 [t-15, t+5] 内按异常分数排序的端点"""
+        return self.anomaly_index.rank(time_minute, top_k=top_k)
+
 if __name__ == '__main__':
     explorer = MetricExplorer()
 
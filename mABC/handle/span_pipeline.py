@@ -0,0 +1,369 @@
+"""
+单遍流式 span 处理流水线
+合并 handle/code/view.py(records_2/3/5)、get_tree.py(records_4)、label.py(records_6)
+以及 metric_generate.py / trace_generate.py 的处理逻辑：
+
+    span 源 -> 字段补全 -> 按 traceId 外排序(唯一落盘点) -> 按 trace 解析父节点/超时
+            -> 构建调用树 -> 展平(附 parent_endpoint_name) -> 指标/拓扑 sink
+
+各阶段都是生成器，可在同一进程内串联；也可通过 run_pipeline(processes=True)
+将 "读取+排序"、"建树+展平" 放到独立进程，经有界队列连接，由主进程驱动 sink。
+子进程中的阶段出错时把异常堆栈沿队列传给主进程，子进程异常退出时主进程同样抛出 PipelineError，
+不会被当作正常的数据结束。
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import traceback
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from handle.span_tree import (
+    DEFAULT_CHUNK_SIZE,
+    build_trace_trees,
+    external_sort,
+    group_by_trace,
+    iter_jsonl,
+    parent_span_id_of,
+    span_id_of,
+    trace_id_of,
+)
+from handle.topology_store import TopologyStore, minute_to_int
+
+TIMEOUT_THRESHOLD_MS = 100   # 与 view.py 中实际生效的阈值保持一致
+DEFAULT_QUEUE_SIZE = 64      # 进程间队列容量(批)
+DEFAULT_BATCH_SIZE = 256     # 每批 trace / span 数量
+ROOT_PARENT = "-1"           # 无父节点
+MISSING_PARENT = "-2"        # 父节点不在当前 trace 中
+POLL_INTERVAL = 1.0          # 主进程等待数据时检查子进程存活的间隔(秒)
+
+
+class PipelineError(RuntimeError):
+    """多进程流水线中的某个阶段失败"""
+
+
+# ====================== 生成器阶段 ======================
+
+def normalize_spans(spans: Iterable[dict]) -> Iterator[dict]:
+    """补全 new_span_id / new_parent_span_id / duration (对应 view.py 的 records_2)"""
+    for span in spans:
+        span["new_span_id"] = span_id_of(span)
+        span["new_parent_span_id"] = parent_span_id_of(span)
+        span["duration"] = span["endTime"] - span["startTime"]
+        yield span
+
+
+def resolve_trace(spans: List[dict], threshold: int = TIMEOUT_THRESHOLD_MS) -> Tuple[List[dict], set]:
+    """
+    在单个 trace 内完成 view.py 的父节点解析与超时判定
+
+    Returns:
+        (去重后的 span 列表, 根因超时 span 的 new_span_id 集合)
+    """
+    unique = {}
+    for span in spans:
+        unique.setdefault(span["new_span_id"], span)
+    spans = list(unique.values())
+
+    endpoint_by_id = {span["new_span_id"]: span["endpointName"] for span in spans}
+    timeout_parents = set()  # 当前 trace 中有超时子调用的端点
+    for span in spans:
+        parent_id = span["new_parent_span_id"]
+        if '--1' in parent_id:
+            span["parent_endpoint_name"] = ROOT_PARENT
+        else:
+            span["parent_endpoint_name"] = endpoint_by_id.get(parent_id, MISSING_PARENT)
+        span["timeout"] = span["duration"] >= threshold
+        if span["timeout"] and span["parent_endpoint_name"] != ROOT_PARENT:
+            timeout_parents.add(span["parent_endpoint_name"])
+
+    # 当前端点超时且其下游均未超时，才认为是根因超时 (records_3)
+    cause_ids = {
+        span["new_span_id"]
+        for span in spans
+        if span["timeout"] and span["endpointName"] not in timeout_parents
+    }
+    return spans, cause_ids
+
+
+def flatten_tree(root: dict) -> Iterator[dict]:
+    """
+    先序展平调用树 (对应 label.py 的 _dfs)
+    endpointName 加上 serviceCode 前缀，parent_endpoint_name 为父 span 的新 endpointName，根为 None
+    """
+    stack = [(root, None)]
+    while stack:
+        span, parent_endpoint_name = stack.pop()
+        span["parent_endpoint_name"] = parent_endpoint_name
+        span["endpointName"] = span["serviceCode"] + "-" + span["endpointName"]
+        children = span.pop("children")
+        for child in reversed(children):
+            stack.append((child, span["endpointName"]))
+        yield span
+
+
+def process_trace(spans: List[dict], threshold: int = TIMEOUT_THRESHOLD_MS) -> Iterator[dict]:
+    """单个 trace：父节点解析 -> 建树 -> 展平"""
+    spans, cause_ids = resolve_trace(spans, threshold)
+    for root in build_trace_trees(spans, cause_ids, warn=False):
+        yield from flatten_tree(root)
+
+
+def sorted_traces(source_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  tmp_dir: Optional[str] = None) -> Iterator[List[dict]]:
+    """span 源 -> 字段补全 -> 外排序 -> 按 trace 分组"""
+    spans = normalize_spans(iter_jsonl(source_path))
+    for _, trace_spans in group_by_trace(external_sort(spans, trace_id_of, chunk_size, tmp_dir)):
+        yield trace_spans
+
+
+def flattened_spans(traces: Iterable[List[dict]], threshold: int = TIMEOUT_THRESHOLD_MS) -> Iterator[dict]:
+    for trace_spans in traces:
+        yield from process_trace(trace_spans, threshold)
+
+
+# ====================== Sink ======================
+
+def _minute_of(span: dict) -> str:
+    return datetime.fromtimestamp(span["startTime"] // 1000).strftime('%Y-%m-%d %H:%M:00')
+
+
+class MetricSink:
+    """按端点、分钟聚合指标 (对应 metric_generate.py)"""
+
+    def __init__(self):
+        self.endpoint_stats = defaultdict(lambda: defaultdict(lambda: {'calls': 0, 'errors': 0, 'total_time': 0, 'timeout': 0}))
+
+    def consume(self, span: dict) -> None:
+        stats = self.endpoint_stats[span['endpointName']][_minute_of(span)]
+        stats['calls'] += 1
+        stats['total_time'] += span['endTime'] - span['startTime']
+        if span['isError']:
+            stats['errors'] += 1
+        if span['timeout']:
+            stats['timeout'] += 1
+
+    def result(self) -> Dict[str, Dict[str, dict]]:
+        aggregated_stats = {}
+        for endpoint, minute_data in self.endpoint_stats.items():
+            for minute, stats in minute_data.items():
+                calls = stats['calls']
+                aggregated_stats.setdefault(endpoint, {})[minute] = {
+                    'calls': calls,
+                    'success_rate': (1 - stats['errors'] / calls) * 100 if calls > 0 else 0,
+                    'error_rate': (stats['errors'] / calls) * 100 if calls > 0 else 0,
+                    'average_duration': stats['total_time'] / calls if calls > 0 else 0,
+                    'timeout_rate': (stats['timeout'] / calls) * 100 if calls > 0 else 0,
+                }
+        return aggregated_stats
+
+    def write(self, out_dir: str) -> str:
+        path = os.path.join(out_dir, 'endpoints_stat.json')
+        with open(path, 'w') as f:
+            json.dump(self.result(), f, indent=4)
+        return path
+
+
+class TopologySink:
+    """按分钟记录上游 -> 下游调用关系 (对应 trace_generate.py)，同时维护区间编码的拓扑存储"""
+
+    def __init__(self):
+        self.endpoint_maps = defaultdict(lambda: defaultdict(set))
+        self.topology_store = TopologyStore()
+
+    def consume(self, span: dict) -> None:
+        parent = str(span['parent_endpoint_name'])
+        minute = _minute_of(span)
+        self.endpoint_maps[parent][minute].add(span['endpointName'])
+        self.topology_store.add_edge_minute(parent, span['endpointName'], minute_to_int(minute))
+
+    def result(self) -> Dict[str, Dict[str, List[str]]]:
+        return {
+            parent: {minute: sorted(children) for minute, children in minutes.items()}
+            for parent, minutes in self.endpoint_maps.items()
+        }
+
+    def write(self, out_dir: str) -> str:
+        path = os.path.join(out_dir, 'endpoint_maps.json')
+        with open(path, 'w') as f:
+            json.dump(self.result(), f, indent=4)
+        return path
+
+
+class JsonlSink:
+    """将展平后的 span 写出 (对应 records_6.jsonl)，仅在需要中间结果时使用"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def consume(self, span: dict) -> None:
+        self._file.write(f"{json.dumps(span, ensure_ascii=False)}\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# ====================== 多进程执行 ======================
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _StageError:
+    """沿队列向下游传递的错误标记，携带出错阶段与异常堆栈"""
+
+    def __init__(self, stage: str, trace: str):
+        self.stage = stage
+        self.trace = trace
+
+
+def _source_worker(source_path, chunk_size, tmp_dir, batch_size, trace_queue, workers):
+    try:
+        for batch in _batched(sorted_traces(source_path, chunk_size, tmp_dir), batch_size):
+            trace_queue.put(batch)
+    except Exception:
+        trace_queue.put(_StageError("source", traceback.format_exc()))
+    finally:
+        for _ in range(workers):
+            trace_queue.put(None)
+
+
+def _tree_worker(threshold, batch_size, trace_queue, span_queue):
+    try:
+        while True:
+            traces = trace_queue.get()
+            if traces is None:
+                break
+            if isinstance(traces, _StageError):
+                # 上游出错：转发给主进程后结束
+                span_queue.put(traces)
+                break
+            for batch in _batched(flattened_spans(traces, threshold), batch_size):
+                span_queue.put(batch)
+    except Exception:
+        span_queue.put(_StageError("tree", traceback.format_exc()))
+    finally:
+        span_queue.put(None)
+
+
+def _check_exit(processes) -> None:
+    """子进程异常退出（如被信号终止，来不及发送错误标记）时抛出 PipelineError"""
+    for process in processes:
+        if process.exitcode not in (None, 0):
+            raise PipelineError(f"Pipeline process {process.name} exited with code {process.exitcode}")
+
+
+def _iter_process_pipeline(source_path, chunk_size, tmp_dir, threshold, workers, queue_size, batch_size):
+    ctx = mp.get_context()
+    trace_queue = ctx.Queue(maxsize=queue_size)
+    span_queue = ctx.Queue(maxsize=queue_size)
+    processes = [ctx.Process(target=_source_worker,
+                             args=(source_path, chunk_size, tmp_dir, batch_size, trace_queue, workers),
+                             name="span-source", daemon=True)]
+    processes += [ctx.Process(target=_tree_worker,
+                              args=(threshold, batch_size, trace_queue, span_queue),
+                              name=f"span-tree-{i}", daemon=True)
+                  for i in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        finished = 0
+        while finished < workers:
+            try:
+                batch = span_queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                _check_exit(processes)
+                continue
+            if batch is None:
+                finished += 1
+                continue
+            if isinstance(batch, _StageError):
+                raise PipelineError(f"Pipeline stage '{batch.stage}' failed:\n{batch.trace}")
+            yield from batch
+        for process in processes:
+            process.join(timeout=POLL_INTERVAL)
+        _check_exit(processes)
+    finally:
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+
+def run_pipeline(source_path: str, sinks: List, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 tmp_dir: Optional[str] = None, threshold: int = TIMEOUT_THRESHOLD_MS,
+                 processes: bool = False, workers: int = 1,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    单遍执行整条流水线，将展平后的 span 依次交给各个 sink
+
+    Args:
+        source_path: 原始 span 文件(jsonl)
+        sinks: 实现 consume(span) 的对象列表
+        chunk_size / tmp_dir: 外排序参数
+        threshold: 超时阈值(毫秒)
+        processes: 是否将排序、建树阶段放到独立进程
+        workers: 建树进程数(processes=True 时生效，trace 之间相互独立)
+        queue_size: 进程间有界队列容量(批)，用于反压
+        batch_size: 每批传输的 trace/span 数量
+
+    Returns:
+        int: 处理的 span 数量
+
+    Raises:
+        PipelineError: processes=True 时某个阶段出错或子进程异常退出
+    """
+    if processes:
+        spans = _iter_process_pipeline(source_path, chunk_size, tmp_dir, threshold,
+                                       max(1, workers), queue_size, batch_size)
+    else:
+        spans = flattened_spans(sorted_traces(source_path, chunk_size, tmp_dir), threshold)
+
+    count = 0
+    for span in spans:
+        for sink in sinks:
+            sink.consume(span)
+        count += 1
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="单遍生成 endpoints_stat.json 与 endpoint_maps.json")
+    parser.add_argument("--spans", required=True, help="原始 span 文件(span_info.jsonl)")
+    parser.add_argument("--out-dir", required=True, help="输出目录")
+    parser.add_argument("--records-6", default=None, help="可选：同时输出展平后的 span(records_6.jsonl)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--tmp-dir", default=None)
+    parser.add_argument("--threshold", type=int, default=TIMEOUT_THRESHOLD_MS)
+    parser.add_argument("--processes", action="store_true", help="多进程执行")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    metric_sink = MetricSink()
+    topology_sink = TopologySink()
+    sinks = [metric_sink, topology_sink]
+    records_sink = JsonlSink(args.records_6) if args.records_6 else None
+    if records_sink:
+        sinks.append(records_sink)
+    try:
+        total = run_pipeline(args.spans, sinks, args.chunk_size, args.tmp_dir, args.threshold,
+                             processes=args.processes, workers=args.workers)
+    finally:
+        if records_sink:
+            records_sink.close()
+    print(f"spans processed: {total}")
+    print(f"metric written: {metric_sink.write(args.out_dir)}")
+    print(f"topology written: {topology_sink.write(args.out_dir)}")
@@ -0,0 +1,175 @@
+"""
+Span 外排序与调用树构建
+1. 按 traceId 分块排序并落盘(external sort)，再用堆做 k 路归并
+2. 流式读取归并结果，逐个 trace 构建调用树
+3. 迭代式后序遍历传播 timeout 标记(子节点超时 => 父节点超时)，避免深层 trace 递归溢出
+"""
+
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_CHUNK_SIZE = 500000  # 每个排序块的 span 数量
+
+trace_id_of = itemgetter("traceId")
+
+
+def iter_jsonl(path: str) -> Iterator[dict]:
+    """逐行读取 jsonl 文件"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_jsonl(records: Iterable[dict], path: str) -> int:
+    """逐条写出 jsonl 文件，返回写出的条数"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as output:
+        for record in records:
+            output.write(f"{json.dumps(record, ensure_ascii=False)}\n")
+            count += 1
+    return count
+
+
+def _spill_chunk(chunk: List[dict], key: Callable, tmp_dir: str) -> str:
+    chunk.sort(key=key)
+    fd, path = tempfile.mkstemp(prefix="spans_sorted_part_", suffix=".jsonl", dir=tmp_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as output:
+        for record in chunk:
+            output.write(f"{json.dumps(record, ensure_ascii=False)}\n")
+    return path
+
+
+def external_sort(records: Iterable[dict], key: Callable = trace_id_of,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, tmp_dir: Optional[str] = None) -> Iterator[dict]:
+    """
+    外排序
+    数据量不超过 chunk_size 时直接内存排序；否则分块排序落盘，再用堆做 k 路归并(每条记录 O(log k))
+
+    Args:
+        records: 任意可迭代的记录流
+        key: 排序键
+        chunk_size: 每个排序块的记录数
+        tmp_dir: 临时文件目录(默认系统临时目录)，归并结束后自动清理
+    """
+    chunk = []
+    work_dir = None
+    part_paths = []
+    try:
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                if work_dir is None:
+                    work_dir = tempfile.mkdtemp(prefix="span_sort_", dir=tmp_dir)
+                part_paths.append(_spill_chunk(chunk, key, work_dir))
+                chunk = []
+
+        if not part_paths:
+            chunk.sort(key=key)
+            yield from chunk
+            return
+
+        if chunk:
+            part_paths.append(_spill_chunk(chunk, key, work_dir))
+            chunk = []
+        yield from heapq.merge(*(iter_jsonl(path) for path in part_paths), key=key)
+    finally:
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def group_by_trace(sorted_spans: Iterable[dict]) -> Iterator[Tuple[str, List[dict]]]:
+    """将按 traceId 排好序的 span 流切分为 (traceId, spans)"""
+    for trace_id, spans in groupby(sorted_spans, key=trace_id_of):
+        yield trace_id, list(spans)
+
+
+def span_id_of(span: dict) -> str:
+    return f"{span['segmentId']}-{span['spanId']}"
+
+
+def parent_span_id_of(span: dict) -> str:
+    """跨 segment 的入口 span 通过 refs 找到父 span"""
+    if span["parentSpanId"] == -1 and len(span.get("refs") or []):
+        ref = span["refs"][0]
+        return f"{ref['parentSegmentId']}-{ref['parentSpanId']}"
+    return f"{span['segmentId']}-{span['parentSpanId']}"
+
+
+def mark_timeout(root: dict) -> None:
+    """迭代式后序遍历：任一子节点超时则父节点也标记为超时"""
+    stack = [(root, False)]
+    while stack:
+        span, children_done = stack.pop()
+        if children_done:
+            if any(child["timeout"] for child in span["children"]):
+                span["timeout"] = True
+            continue
+        stack.append((span, True))
+        for child in span["children"]:
+            stack.append((child, False))
+
+
+def build_trace_trees(span_list: List[dict], timeout_span_ids: Optional[Set[str]] = None,
+                      warn: bool = True) -> List[dict]:
+    """
+    在一个 traceId 下构建调用树并标记 timeout
+    直接在传入的 span 上添加 children/timeout 字段(不做深拷贝)，调用方不应再复用 span_list
+
+    Returns:
+        list: 根 span 列表(父 span 不存在的 span 也视为根)
+    """
+    timeout_span_ids = timeout_span_ids or set()
+    span_by_id: Dict[str, dict] = {}
+    for span in span_list:
+        span["children"] = []
+        new_span_id = span_id_of(span)
+        span["timeout"] = new_span_id in timeout_span_ids
+        span_by_id[new_span_id] = span
+
+    root_spans = []
+    for span in span_list:
+        new_parent_span_id = parent_span_id_of(span)
+        if '--1' in new_parent_span_id:
+            root_spans.append(span)
+        elif new_parent_span_id not in span_by_id:
+            if warn:
+                print(f"warn: nonexist parent seg span id {new_parent_span_id}")
+            root_spans.append(span)
+        else:
+            span_by_id[new_parent_span_id]["children"].append(span)
+
+    for root_span in root_spans:
+        mark_timeout(root_span)
+    return root_spans
+
+
+def iter_trace_trees(sorted_spans: Iterable[dict], timeout_span_ids: Optional[Set[str]] = None,
+                     warn: bool = True) -> Iterator[dict]:
+    """流式地逐个 trace 产出调用树的根 span"""
+    for _, spans in group_by_trace(sorted_spans):
+        yield from build_trace_trees(spans, timeout_span_ids, warn)
+
+
+def load_timeout_span_ids(path: str) -> Set[str]:
+    """读取超时 span(view.py 输出的 records_3.jsonl) 的 new_span_id 集合"""
+    return {span["new_span_id"] for span in iter_jsonl(path)}
+
+
+def build_trees_file(records_path: str, output_path: str, timeout_path: Optional[str] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, tmp_dir: Optional[str] = None) -> int:
+    """
+    records(jsonl) -> 外排序 -> 逐 trace 建树 -> output(jsonl，每行一棵树)
+
+    Returns:
+        int: 写出的树的数量
+    """
+    timeout_span_ids = load_timeout_span_ids(timeout_path) if timeout_path else set()
+    sorted_spans = external_sort(iter_jsonl(records_path), trace_id_of, chunk_size, tmp_dir)
+    return write_jsonl(iter_trace_trees(sorted_spans, timeout_span_ids), output_path)
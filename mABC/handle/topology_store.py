@@ -0,0 +1,240 @@
+"""
+时间窗口拓扑存储
+将每条调用边 (parent -> child) 出现过的分钟做游程编码，压缩为若干活跃区间 [start, end]，
+并以区间树索引，支持 "在 [t-15, t+5] 内任意时刻活跃过的边" 这类查询，
+返回去重后的边集合以及窗口内的首次/末次出现时间。
+分钟字符串与整数分钟之间按 UTC 换算，结果与运行环境的时区（及夏令时）无关。
+"""
+
+import calendar
+import math
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def minute_to_int(time_minute: str) -> int:
+    """将 "YYYY-MM-DD HH:MM:SS" 按 UTC 转为自纪元起的分钟数"""
+    if len(time_minute) == 16:  # "YYYY-MM-DD HH:MM" 格式
+        time_minute = time_minute + ":00"
+    return calendar.timegm(time.strptime(time_minute, TIME_FORMAT)) // 60
+
+
+def int_to_minute(minute: int) -> str:
+    """minute_to_int 的逆运算"""
+    return time.strftime(TIME_FORMAT, time.gmtime(minute * 60))
+
+
+def encode_runs(minutes: List[int]) -> List[Tuple[int, int]]:
+    """
+    游程编码：将分钟列表压缩为连续区间
+    例如 [1, 2, 3, 7, 8] -> [(1, 3), (7, 8)]
+    """
+    runs = []
+    for minute in sorted(set(minutes)):
+        if runs and minute == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], minute)
+        else:
+            runs.append((minute, minute))
+    return runs
+
+
+class _IntervalNode:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center, by_start, by_end, left, right):
+        self.center = center
+        self.by_start = by_start  # 覆盖 center 的区间，按 start 升序
+        self.by_end = by_end      # 覆盖 center 的区间，按 end 降序
+        self.left = left
+        self.right = right
+
+
+class IntervalTree:
+    """
+    静态中心区间树
+    构建 O(n log n)，区间重叠查询 O(log n + k)
+    每个区间为 (start, end, payload)，端点均为闭区间
+    """
+
+    def __init__(self, intervals: List[Tuple[int, int, object]]):
+        self.size = len(intervals)
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        points = sorted(p for start, end, _ in intervals for p in (start, end))
+        center = points[len(points) // 2]
+        left, right, overlap = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                overlap.append(interval)
+        return _IntervalNode(
+            center,
+            sorted(overlap, key=lambda i: i[0]),
+            sorted(overlap, key=lambda i: i[1], reverse=True),
+            self._build(left),
+            self._build(right),
+        )
+
+    def query(self, lo: int, hi: int) -> List[Tuple[int, int, object]]:
+        """返回与 [lo, hi] 有交集的全部区间"""
+        result = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if hi < node.center:
+                # 查询区间整体在 center 左侧：覆盖 center 的区间中 start <= hi 的相交
+                for interval in node.by_start:
+                    if interval[0] > hi:
+                        break
+                    result.append(interval)
+                stack.append(node.left)
+            elif lo > node.center:
+                # 查询区间整体在 center 右侧：覆盖 center 的区间中 end >= lo 的相交
+                for interval in node.by_end:
+                    if interval[1] < lo:
+                        break
+                    result.append(interval)
+                stack.append(node.right)
+            else:
+                # 查询区间包含 center：覆盖 center 的区间全部相交
+                result.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        return result
+
+
+class TopologyStore:
+    """
+    调用边活跃区间存储
+    edge_runs: {(parent, child): [(start_minute, end_minute), ...]}
+    """
+
+    def __init__(self):
+        self.edge_runs: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        self._tree: Optional[IntervalTree] = None
+        self._parent_trees: Dict[str, IntervalTree] = {}
+        self._child_trees: Dict[str, IntervalTree] = {}
+
+    @classmethod
+    def from_endpoint_maps(cls, endpoint_maps: Dict[str, Dict[str, List[str]]]) -> "TopologyStore":
+        """从 trace_generate.py 生成的 {parent: {minute: [children]}} 构建"""
+        edge_minutes: Dict[Tuple[str, str], List[int]] = {}
+        for parent, minutes in endpoint_maps.items():
+            for minute, children in minutes.items():
+                m = minute_to_int(minute)
+                for child in children:
+                    edge_minutes.setdefault((parent, child), []).append(m)
+        store = cls()
+        for edge, minutes in edge_minutes.items():
+            store.edge_runs[edge] = encode_runs(minutes)
+        store.build()
+        return store
+
+    def add_edge_minute(self, parent: str, child: str, minute: int) -> None:
+        """追加一次调用观测(分钟为整数)，调用 build() 后生效"""
+        runs = self.edge_runs.setdefault((parent, child), [])
+        if runs and runs[-1][0] <= minute <= runs[-1][1]:
+            return
+        if runs and minute == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], minute)
+        elif not runs or minute > runs[-1][1]:
+            runs.append((minute, minute))
+        else:
+            # 乱序到达，重新编码
+            self.edge_runs[(parent, child)] = encode_runs(
+                [m for start, end in runs for m in range(start, end + 1)] + [minute]
+            )
+        self._tree = None
+
+    def build(self) -> None:
+        """(重新)构建全局及按 parent、child 划分的区间树"""
+        intervals = []
+        by_parent: Dict[str, list] = {}
+        by_child: Dict[str, list] = {}
+        for edge, runs in self.edge_runs.items():
+            for start, end in runs:
+                interval = (start, end, edge)
+                intervals.append(interval)
+                by_parent.setdefault(edge[0], []).append(interval)
+                by_child.setdefault(edge[1], []).append(interval)
+        self._tree = IntervalTree(intervals)
+        self._parent_trees = {parent: IntervalTree(items) for parent, items in by_parent.items()}
+        self._child_trees = {child: IntervalTree(items) for child, items in by_child.items()}
+
+    def interval_count(self) -> int:
+        return sum(len(runs) for runs in self.edge_runs.values())
+
+    def active_edges(self, lo: int, hi: int, parent: Optional[str] = None) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """
+        查询 [lo, hi] 内任意时刻活跃过的边(去重)
+
+        Returns:
+            {(parent, child): (first_seen, last_seen)}，时间已截断到查询窗口内
+        """
+        if self._tree is None:
+            self.build()
+        if parent is None:
+            tree = self._tree
+        else:
+            tree = self._parent_trees.get(parent)
+            if tree is None:
+                return {}
+        result = {}
+        for start, end, edge in tree.query(lo, hi):
+            first_seen, last_seen = max(start, lo), min(end, hi)
+            if edge in result:
+                first_seen = min(first_seen, result[edge][0])
+                last_seen = max(last_seen, result[edge][1])
+            result[edge] = (first_seen, last_seen)
+        return result
+
+    def neighbors(self, endpoint: str, lo: Optional[int] = None, hi: Optional[int] = None,
+                  direction: str = "downstream") -> Set[str]:
+        """
+        查询 endpoint 在 [lo, hi] 内任意时刻调用过(downstream)或被其调用过(upstream)的端点
+
+        Args:
+            lo / hi: 窗口端点(整数分钟)，为 None 时不限制
+        """
+        if self._tree is None:
+            self.build()
+        trees = self._parent_trees if direction == "downstream" else self._child_trees
+        tree = trees.get(endpoint)
+        if tree is None:
+            return set()
+        lo = -math.inf if lo is None else lo
+        hi = math.inf if hi is None else hi
+        side = 1 if direction == "downstream" else 0
+        return {edge[side] for _, _, edge in tree.query(lo, hi)}
+
+    def active_edges_around(self, time_minute: str, before: int = 15, after: int = 5,
+                            parent: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        以 time_minute 为中心，查询 [t-before, t+after] 内活跃过的边
+
+        Returns:
+            list: [{"parent", "child", "first_seen", "last_seen"}, ...]，按 first_seen 排序
+        """
+        center = minute_to_int(time_minute)
+        edges = self.active_edges(center - before, center + after, parent)
+        rows = [
+            {
+                "parent": edge[0],
+                "child": edge[1],
+                "first_seen": int_to_minute(first_seen),
+                "last_seen": int_to_minute(last_seen),
+            }
+            for edge, (first_seen, last_seen) in edges.items()
+        ]
+        rows.sort(key=lambda r: (r["first_seen"], r["parent"], r["child"]))
+        return rows
@@ -1,6 +1,12 @@
 import json
 import os
-from datetime import datetime, timedelta
+from collections import deque
+from handle.topology_store import TopologyStore, minute_to_int
+
+# 拓扑中的虚拟入口节点(顶层 span 的 parent_endpoint_name)，不作为真实端点返回
+ROOT_ENDPOINTS = {"None", "-1", "-2"}
+# 调用链遍历的默认最大层数
+DEFAULT_MAX_DEPTH = 10
 
 class TraceExplorer:
     def __init__(self):
@@ -9,27 +15,106 @@ class TraceExplorer:
         # Point to project_root/data/topology/endpoint_maps.json
         files = os.path.join(base_dir, '..', 'data', 'topology', 'endpoint_maps.json')
         self.endpoint_maps = self.load_data(files)
+        # 调用边活跃区间(游程编码 + 区间树)，单点、窗口与全时段的上下游查询共用这一份索引
+        self.topology_store = TopologyStore.from_endpoint_maps(self.endpoint_maps)
+        # (endpoint, direction, window, max_depth) -> BFS 结果
+        self._traverse_cache = {}
 
     def load_data(self, filename):
         with open(filename, 'r') as f:
             return json.load(f)
 
-    def get_endpoint_downstream(self, endpoint, time_minute):
-        t = self.endpoint_maps.get(endpoint, {})
-        return t.get(time_minute, {})
+    @staticmethod
+    def _get_window(time_minute, before=15, after=5):
+        """以 time_minute 为中心的时间窗口 [t-before, t+after](整数分钟)，time_minute 为空时返回 None(全时段)"""
+        if not time_minute:
+            return None
+        center = minute_to_int(time_minute)
+        return center - before, center + after
+
+    def _neighbors(self, direction, endpoint, window):
+        """返回 endpoint 在时间窗口内出现过的下游/上游端点集合"""
+        lo, hi = window if window is not None else (None, None)
+        return self.topology_store.neighbors(endpoint, lo, hi, direction)
+
+    def get_endpoint_downstream(self, endpoint, time_minute=None):
+        """查询下游端点；time_minute 为空时返回全时段内出现过的下游端点"""
+        window = None
+        if time_minute is not None:
+            minute = minute_to_int(time_minute)
+            window = (minute, minute)
+        return sorted(self._neighbors("downstream", endpoint, window))
+
+    def get_endpoint_upstream(self, endpoint, time_minute=None):
+        """查询上游端点(调用了 endpoint 的端点)；time_minute 为空时返回全时段结果"""
+        window = None
+        if time_minute is not None:
+            minute = minute_to_int(time_minute)
+            window = (minute, minute)
+        upstream = self._neighbors("upstream", endpoint, window)
+        return sorted(upstream - ROOT_ENDPOINTS)
+
+    def traverse(self, endpoint, direction="downstream", window=None, max_depth=DEFAULT_MAX_DEPTH):
+        """
+        在时间窗口内按 BFS 遍历调用图
+
+        Args:
+            endpoint: 起始端点
+            direction: "downstream" 或 "upstream"
+            window: (start, end) 整数分钟(见 topology_store.minute_to_int)，None 表示全时段
+            max_depth: 最大层数
+
+        Returns:
+            list: [(endpoint, level), ...]，level 为与起始端点的层级距离，按 BFS 顺序
+        """
+        key = (endpoint, direction, window, max_depth)
+        if key in self._traverse_cache:
+            return self._traverse_cache[key]
+
+        visited = {endpoint}
+        result = []
+        queue = deque([(endpoint, 0)])
+        while queue:
+            current, level = queue.popleft()
+            if level >= max_depth:
+                continue
+            for neighbor in sorted(self._neighbors(direction, current, window)):
+                if neighbor in visited or neighbor in ROOT_ENDPOINTS:
+                    continue
+                visited.add(neighbor)
+                result.append((neighbor, level + 1))
+                queue.append((neighbor, level + 1))
+
+        self._traverse_cache[key] = result
+        return result
+
+    def get_call_chain_for_endpoint(self, endpoint, time_minute=None, max_depth=DEFAULT_MAX_DEPTH):
+        """
+        查询端点的完整调用链(上游 + 下游，多跳)
+        time_minute 不为空时仅统计 [t-15, t+5] 分钟窗口内出现的调用关系
+        """
+        window = self._get_window(time_minute)
+        return {
+            'upstream': self.traverse(endpoint, "upstream", window, max_depth),
+            'downstream': self.traverse(endpoint, "downstream", window, max_depth),
+        }
 
     def get_endpoint_downstream_in_range(self, endpoint, time_minute):
-        range_stats = {}
-        example_time_minute = datetime.strptime(time_minute, '%Y-%m-%d %H:%M:%S')
-        start_time = example_time_minute - timedelta(minutes=15)
-        end_time = example_time_minute + timedelta(minutes=5)
-        current_time = start_time
-        while current_time <= end_time:
-            time_minute_str = current_time.strftime('%Y-%m-%d %H:%M:%S')
-            if endpoint in self.endpoint_maps:
-                range_stats[time_minute_str] = self.endpoint_maps[endpoint].get(time_minute_str, [])
-            current_time += timedelta(minutes=1)
-        return range_stats
+        """
+        查询 [t-15, t+5] 窗口内 endpoint 调用过的下游端点(去重)
+
+        Returns:
+            dict: {downstream_endpoint: {"first_seen": str, "last_seen": str}}
+        """
+        edges = self.topology_store.active_edges_around(time_minute, parent=endpoint)
+        return {
+            edge["child"]: {"first_seen": edge["first_seen"], "last_seen": edge["last_seen"]}
+            for edge in edges
+        }
+
+    def get_active_edges_in_range(self, time_minute):
+        """查询 [t-15, t+5] 窗口内活跃过的全部调用边(去重，附首次/末次出现时间)"""
+        return self.topology_store.active_edges_around(time_minute)
 
 if __name__ == '__main__':
     explorer = TraceExplorer()
@@ -45,6 +130,8 @@ if __name__ == '__main__':
 
     stats_in_range = explorer.get_endpoint_downstream_in_range(E, T)
     print(stats_in_range)
+
+    print(explorer.get_call_chain_for_endpoint(E, T))
     # print(f"Stats for {E} around {T} (15 time_minutes before and 5 time_minutes after):")
     # for time_minute, stats in stats_in_range.items():
-    #     print(f"At {time_minute}: {stats}")
\ No newline at end of file
+    #     print(f"At {time_minute}: {stats}")
@@ -14,8 +14,10 @@ from agents.base.profile import DataDetective, DependencyExplorer, ProbabilityOr
 from agents.base.run import ReActTotRun, ThreeHotCotRun, BaseRun
 from agents.base.dao_run import DAOExecutor
 from agents.tools import process_scheduler_tools, alert_receiver_tools, solution_engineer_tools
-from core.vm import Blockchain
+from core.vm import blockchain
 from core.state import world_state
+from core.producer import BlockPolicy, BlockProducer
+from settings import BLOCK_MAX_GAS, BLOCK_MAX_LATENCY, BLOCK_MAX_TRANSACTIONS
 import json
 
 def extract_final_answer(text):
@@ -27,9 +29,8 @@ if __name__ == "__main__":
     i = 0
     results = []
     
-    # 初始化区块链
-    print("正在初始化区块链...")
-    blockchain = Blockchain()
+    # 区块链使用 core.vm 中的持久化单例，与 state.db 中的世界状态保持一致
+    print(f"区块链已加载，当前高度 {len(blockchain.chain)}")
     
     # 初始化所有Agent的账户
     print("正在初始化Agent账户...")
@@ -53,6 +54,16 @@ if __name__ == "__main__":
         account.reputation = 100
         world_state.update_account(account)
         print(f"✅ {agent.role_name}: 余额={account.balance} Token")
+
+    # 账户资金在链外初始化，保存快照使其可随区块一同恢复
+    blockchain.take_snapshot()
+    
+    # 启动后台出块器，投票/奖励交易按出块策略批量打包
+    producer = BlockProducer(blockchain, BlockPolicy(
+        max_transactions=BLOCK_MAX_TRANSACTIONS,
+        max_gas=BLOCK_MAX_GAS,
+        max_latency=BLOCK_MAX_LATENCY,
+    )).start()
     
     # 创建DAO执行器（使用区块链投票）
     # alpha=-1, beta=-1 表示禁用投票机制，直接通过
@@ -184,6 +195,8 @@ Format: Root Cause Endpoint: XXX, Root Cause Reason: XXX
     finally:
         sys.stdout = original_stdout
         log_file.close()
+        # 打包交易池中剩余的交易后停止出块器
+        producer.stop()
         
     for result in results:
         try:
@@ -27,6 +27,17 @@ OPENAI_REQUEST_TIMEOUT = 15
 REACT_PROCESS_SCHEDULER_MAX_SECONDS = 30
 REACT_DEFAULT_MAX_SECONDS = 12
 
+# 同时执行的根因分析运行数上限（/api/run-agents），超出的运行排队等待
+RUN_AGENTS_MAX_CONCURRENCY = int(os.getenv("RUN_AGENTS_MAX_CONCURRENCY", "2"))
+
+# API 服务中执行 CPU 密集/需要等待区块链锁的请求处理的线程数
+API_MAX_WORKERS = int(os.getenv("API_MAX_WORKERS", "4"))
+
+# 出块策略（core/producer.py 的 BlockPolicy）：交易数、gas_limit 总和、最早交易等待时间（秒）任一达到即出块
+BLOCK_MAX_TRANSACTIONS = int(os.getenv("BLOCK_MAX_TRANSACTIONS", "1000"))
+BLOCK_MAX_GAS = int(os.getenv("BLOCK_MAX_GAS", "1000000"))
+BLOCK_MAX_LATENCY = float(os.getenv("BLOCK_MAX_LATENCY", "0.5"))
+
 # AGENT_STATUS_START = "Start"
 # AGENT_STATUS_RE = "Reason"
 # AGENT_STATUS_ACT = "Act"
@@ -0,0 +1,295 @@
+"""
+测试 API 服务器 (frontend/api_server.py) 的响应压缩、JSON 序列化与区块分页
+验证 Accept-Encoding 解析（q=0）、小响应与流式响应原样透传、已编码的响应不重复压缩、Vary 合并，
+以及区块列表的高度游标与 ETag/304、交易列表的分页参数校验
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend")
+
+
+# 导入 api_server 会创建区块链/世界状态单例，只在独立进程中导入
+_ENCODINGS = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from api_server import FastJSONResponse, _accepted_encodings
+
+headers = ["gzip, br", "gzip;q=0, br", "br;q=0.0, gzip;q=0.5", "GZIP ; q=1", "gzip;q=abc, identity", ""]
+print(json.dumps({
+    "encodings": {header: sorted(_accepted_encodings(header)) for header in headers},
+    "body": FastJSONResponse({1: "a", "b": [1.5, None]}).body.decode(),
+    "media_type": FastJSONResponse({}).media_type,
+}))
+"""
+
+# 用只发送固定响应的 ASGI 应用驱动 CompressionMiddleware，记录发出的消息
+_COMPRESSION = """
+import asyncio, gzip, json, sys
+sys.path.insert(0, sys.argv[1])
+from api_server import CompressionMiddleware
+
+BIG = "x" * 4096
+
+
+def run(chunks, headers=(), accept="gzip, deflate"):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": list(headers)})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept.encode())]}
+    asyncio.run(CompressionMiddleware(app)(scope, receive, send))
+    response_headers = [[key.decode(), value.decode()] for key, value in sent[0]["headers"]]
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    if ["content-encoding", "gzip"] in response_headers:
+        body = gzip.decompress(body)
+    return {"headers": response_headers, "messages": len(sent) - 1, "body": body.decode()}
+
+
+print(json.dumps({
+    "compressed": run([BIG.encode()], [(b"content-length", b"4096")]),
+    "q_zero": run([BIG.encode()], accept="gzip;q=0"),
+    "small": run([b"x" * 1023]),
+    "streaming": run([b"data: 1\\n\\n", b"data: 2\\n\\n", BIG.encode()], [(b"content-type", b"text/event-stream")]),
+    "encoded": run([gzip.compress(BIG.encode())], [(b"content-encoding", b"gzip")]),
+    "vary": run([BIG.encode()], [(b"vary", b"Origin")]),
+}))
+"""
+
+
+# 出块 4 次后按高度游标翻页，并用 ETag 重新验证
+_BLOCKS = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from fastapi.testclient import TestClient
+from api_server import app, blockchain
+from core.client import ChainClient
+
+chain_client = ChainClient(blockchain)
+treasury = blockchain.treasury
+
+
+def mine():
+    tx = chain_client.create_transaction("penalty", treasury.address, {"target": treasury.address, "amount": 0},
+                                         treasury.private_key)
+    assert chain_client.send_and_mine(tx, silent=True)
+
+
+for _ in range(4):
+    mine()
+client = TestClient(app)
+pages, before = [], None
+while True:
+    params = {"limit": 2} if before is None else {"limit": 2, "before": before}
+    page = client.get("/api/blocks", params=params).json()
+    pages.append([block["index"] for block in page["blocks"]])
+    before = page["next_cursor"]
+    if before is None:
+        break
+
+first = client.get("/api/blocks", params={"limit": 2})
+etag = first.headers["etag"]
+revalidated = client.get("/api/blocks", params={"limit": 2}, headers={"If-None-Match": "W/" + etag})
+with_transactions = client.get("/api/blocks", params={"limit": 2, "include": "transactions"},
+                               headers={"If-None-Match": etag})
+block = client.get("/api/block/1")
+block_revalidated = client.get("/api/block/1", headers={"If-None-Match": block.headers["etag"]})
+mine()
+after_mining = client.get("/api/blocks", params={"limit": 2}, headers={"If-None-Match": etag})
+print(json.dumps({
+    "pages": pages,
+    "summaries": {
+        "past_tip": [s["index"] for s in blockchain.get_block_summaries(99, 2)],
+        "genesis": [s["index"] for s in blockchain.get_block_summaries(1, 5)],
+        "empty": blockchain.get_block_summaries(0, 5),
+    },
+    "first": [first.status_code, first.headers["cache-control"], len(first.json()["blocks"][0].get("transactions", []))],
+    "revalidated": [revalidated.status_code, revalidated.headers["etag"] == etag, revalidated.content.decode()],
+    "with_transactions": [with_transactions.status_code, len(with_transactions.json()["blocks"][0]["transactions"])],
+    "block": [block.status_code, block_revalidated.status_code, block.headers["etag"] == etag],
+    "after_mining": [after_mining.status_code, after_mining.headers["etag"] != etag,
+                     [b["index"] for b in after_mining.json()["blocks"]]],
+}))
+"""
+
+
+# 交易列表：非法的 last_blocks / limit / 游标返回 400
+_TRANSACTIONS = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from fastapi.testclient import TestClient
+from api_server import app, blockchain
+from core.client import ChainClient
+
+chain_client = ChainClient(blockchain)
+treasury = blockchain.treasury
+for _ in range(3):
+    tx = chain_client.create_transaction("penalty", treasury.address, {"target": treasury.address, "amount": 0},
+                                         treasury.private_key)
+    assert chain_client.send_and_mine(tx, silent=True)
+
+client = TestClient(app)
+queries = {
+    "last_blocks_zero": {"last_blocks": 0},
+    "last_blocks_negative": {"last_blocks": -2},
+    "limit_zero": {"limit": 0},
+    "limit_negative": {"limit": -5},
+    "bad_cursor": {"before": "abc"},
+    "last_blocks_one": {"last_blocks": 1},
+    "limit_two": {"limit": 2},
+    "limit_huge": {"limit": 10 ** 6},
+}
+result = {}
+for name, params in queries.items():
+    response = client.get("/api/transactions", params=params)
+    body = response.json()
+    result[name] = [response.status_code, len(body["transactions"]) if response.status_code == 200 else body["detail"]]
+print(json.dumps(result))
+"""
+
+
+def _run_in(directory, script, *args):
+    """在独立进程中运行脚本（区块链与世界状态单例创建在 directory 下），返回最后一行输出的 JSON"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)), OPENAI_API_KEY="x")
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=directory, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_accept_encoding_and_json():
+    """测试 Accept-Encoding 解析与 orjson 序列化"""
+    print("=" * 60)
+    print("测试 1: Accept-Encoding 解析与 JSON 序列化")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = _run_in(directory, _ENCODINGS, FRONTEND_DIR)
+    assert result["encodings"] == {
+        "gzip, br": ["br", "gzip"],
+        "gzip;q=0, br": ["br"],
+        "br;q=0.0, gzip;q=0.5": ["gzip"],
+        "GZIP ; q=1": ["gzip"],
+        "gzip;q=abc, identity": ["identity"],
+        "": [],
+    }
+    assert json.loads(result["body"]) == {"1": "a", "b": [1.5, None]}
+    assert result["media_type"] == "application/json"
+    print("✓ q=0 与无法解析的 q 值被忽略，非字符串键可序列化")
+    return True
+
+
+def test_compression_middleware():
+    """测试按响应大小、流式与已有编码决定是否压缩"""
+    print("\n" + "=" * 60)
+    print("测试 2: 响应压缩中间件")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = _run_in(directory, _COMPRESSION, FRONTEND_DIR)
+
+    compressed = result["compressed"]
+    assert compressed["body"] == "x" * 4096 and compressed["messages"] == 1
+    assert ["content-encoding", "gzip"] in compressed["headers"]
+    assert ["vary", "Accept-Encoding"] in compressed["headers"]
+    assert [key for key, _ in compressed["headers"]].count("content-length") == 1
+    assert ["content-length", "4096"] not in compressed["headers"]
+    print("✓ 不小于 1 KiB 的响应被 gzip 压缩，Content-Length 更新为压缩后的长度")
+
+    for name in ("q_zero", "small"):
+        assert not any(key in ("content-encoding", "vary") for key, _ in result[name]["headers"]), name
+    assert result["small"]["body"] == "x" * 1023
+    print("✓ q=0 与小于 1 KiB 的响应原样发送")
+
+    streaming = result["streaming"]
+    assert streaming["messages"] == 3 and streaming["headers"] == [["content-type", "text/event-stream"]]
+    print("✓ 流式（SSE）响应逐条透传，不被缓冲")
+
+    encoded = result["encoded"]
+    assert encoded["headers"] == [["content-encoding", "gzip"]] and encoded["body"] == "x" * 4096
+    print("✓ 已有 Content-Encoding 的响应不重复压缩")
+
+    vary = [value for key, value in result["vary"]["headers"] if key == "vary"]
+    assert vary == ["Origin, Accept-Encoding"]
+    print("✓ 已有的 Vary 与 Accept-Encoding 合并")
+    return True
+
+
+def test_block_pages_and_etag():
+    """测试区块列表的高度游标与 ETag 重新验证"""
+    print("\n" + "=" * 60)
+    print("测试 3: 区块分页与 ETag")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = _run_in(directory, _BLOCKS, FRONTEND_DIR)
+
+    # 链高 5（含创世区块），每页 2 个区块，最后一页到达创世区块时没有下一页
+    assert result["pages"] == [[4, 3], [2, 1], [0]]
+    # 摘要在再出一个区块（链顶高度 5）之后查询
+    assert result["summaries"] == {"past_tip": [5, 4], "genesis": [0], "empty": []}
+    print("✓ 按高度游标倒序翻页，游标超出链顶时从链顶开始")
+
+    assert result["first"] == [200, "no-cache", 0]
+    assert result["revalidated"] == [304, True, ""]
+    assert result["with_transactions"] == [200, 1]
+    assert result["block"] == [200, 304, False]
+    assert result["after_mining"] == [200, True, [5, 4]]
+    print("✓ ETag 命中（含弱校验）时返回 304，附带交易或出新块后重新返回内容")
+    return True
+
+
+def test_transaction_page_params():
+    """测试交易列表拒绝非法的分页参数"""
+    print("\n" + "=" * 60)
+    print("测试 4: 交易列表分页参数")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = _run_in(directory, _TRANSACTIONS, FRONTEND_DIR)
+
+    assert result["last_blocks_zero"] == result["last_blocks_negative"] == [400, "last_blocks must be at least 1"]
+    assert result["limit_zero"] == result["limit_negative"] == [400, "limit must be at least 1"]
+    assert result["bad_cursor"] == [400, "Invalid cursor"]
+    print("✓ last_blocks、limit 小于 1 与无法解析的游标返回 400")
+
+    assert result["last_blocks_one"] == [200, 1]
+    assert result["limit_two"] == [200, 2] and result["limit_huge"] == [200, 3]
+    print("✓ 合法参数正常分页，超大 limit 按上限返回")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("API 服务器功能测试")
+    print("=" * 60)
+
+    try:
+        test_accept_encoding_and_json()
+        test_compression_middleware()
+        test_block_pages_and_etag()
+        test_transaction_page_params()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,105 @@
+"""
+测试区块持久化存储 (core/block_store.py)
+验证分段追加写、重启后按索引读取、按哈希查询以及崩溃后的尾部恢复
+"""
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.block_store import BlockStore, PersistentChain
+from core.types import Block, BlockHeader, Transaction, get_merkle_root
+from core.validator import ChainValidator, full_block_hash
+
+
+def _append_blocks(chain, count):
+    for _ in range(count):
+        index = len(chain)
+        txs = [Transaction(tx_type="vote", sender=f"addr{i}", nonce=index, gas_price=1, gas_limit=200,
+                           data={"block": index}, timestamp=1700000000) for i in range(2)]
+        block = Block(header=BlockHeader(index=index, timestamp=index,
+                                         previous_hash=chain[-1].hash if index else "0" * 64,
+                                         merkle_root=get_merkle_root(txs)), transactions=txs)
+        block.hash = full_block_hash(block)
+        chain.append(block)
+
+
+def test_persist_and_reload():
+    """测试分段写入与重启加载"""
+    print("=" * 60)
+    print("测试 1: 分段写入与重启加载")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = BlockStore(data_dir, segment_size=4096, cache_size=4)
+        chain = PersistentChain(store)
+        _append_blocks(chain, 30)
+        hashes = [block.hash for block in chain]
+        store.close()
+        segments = [name for name in os.listdir(data_dir) if name.endswith(".seg")]
+        assert len(segments) > 1
+
+        store = BlockStore(data_dir, segment_size=4096, cache_size=4)
+        chain = PersistentChain(store)
+        assert len(chain) == 30 and chain[-1].hash == hashes[-1]
+        assert [block.hash for block in chain[10:13]] == hashes[10:13]
+        assert store.get_by_hash(hashes[7]).header.index == 7
+        assert store.height_of("ab" * 32) is None
+        assert ChainValidator(full_block_hash, processes=1).validate(chain)["valid"]
+        print(f"✓ 30 个区块写入 {len(segments)} 个段文件，重启后读取与校验通过")
+
+        _append_blocks(chain, 2)
+        assert chain[30].header.previous_hash == hashes[-1] and len(chain) == 32
+        store.close()
+    return True
+
+
+def test_recover_partial_write():
+    """测试崩溃后丢弃不完整的尾部数据"""
+    print("\n" + "=" * 60)
+    print("测试 2: 崩溃恢复")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = BlockStore(data_dir)
+        _append_blocks(PersistentChain(store), 5)
+        store.close()
+
+        # 模拟写入区块数据后、写完索引前崩溃
+        with open(os.path.join(data_dir, "blocks-000000.seg"), "ab") as f:
+            f.write(b"\x10\x00\x00\x00{\"partial\"")
+        with open(os.path.join(data_dir, "index.bin"), "ab") as f:
+            f.write(b"\x00" * 7)
+
+        store = BlockStore(data_dir)
+        chain = PersistentChain(store)
+        assert len(chain) == 5
+        _append_blocks(chain, 1)
+        store.close()
+
+        store = BlockStore(data_dir)
+        assert len(store) == 6 and store.get(5).header.index == 5
+        store.close()
+    print("✓ 不完整的索引与段数据已被丢弃")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("区块持久化存储功能测试")
+    print("=" * 60)
+
+    try:
+        test_persist_and_reload()
+        test_recover_partial_write()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
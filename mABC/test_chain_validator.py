@@ -0,0 +1,198 @@
+"""
+测试全链校验 (core/validator.py)
+验证检查点增量校验、进程池并行校验、篡改检测、校验期间出块以及检查点持久化
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.types import Block, BlockHeader, Transaction, get_merkle_root
+from core.validator import VALIDATOR_CHECKPOINT_FILE, ChainValidator, full_block_hash
+
+
+def _make_chain(length, start=None):
+    """构造 length 个区块(含创世区块)，每块 3 笔交易"""
+    chain = list(start or [])
+    if not chain:
+        genesis = Block(header=BlockHeader(index=0, timestamp=0, previous_hash="0" * 64,
+                                           merkle_root=get_merkle_root([])), transactions=[])
+        genesis.hash = full_block_hash(genesis)
+        chain.append(genesis)
+    while len(chain) < length:
+        index = len(chain)
+        txs = [Transaction(tx_type="vote", sender=f"addr{i}", nonce=index, gas_price=1, gas_limit=200,
+                           data={"block": index}, timestamp=1700000000) for i in range(3)]
+        block = Block(header=BlockHeader(index=index, timestamp=index, previous_hash=chain[-1].hash,
+                                         merkle_root=get_merkle_root(txs)), transactions=txs)
+        block.hash = full_block_hash(block)
+        chain.append(block)
+    return chain
+
+
+def test_incremental_validation():
+    """测试检查点之后只校验新增区块"""
+    print("=" * 60)
+    print("测试 1: 增量校验")
+    print("=" * 60)
+
+    validator = ChainValidator(full_block_hash, processes=1, chunk_size=8)
+    chain = _make_chain(40)
+    report = validator.validate(chain)
+    assert report["valid"] and report["checked_blocks"] == 39
+    assert validator.verified_height == 39
+
+    chain = _make_chain(45, chain)
+    report = validator.validate(chain)
+    assert report["valid"] and report["start_height"] == 40 and report["checked_blocks"] == 5
+    print(f"✓ 第二次只校验 {report['checked_blocks']} 个新区块")
+    return True
+
+
+def test_parallel_detects_tampering():
+    """测试进程池并行校验能定位被篡改的区块"""
+    print("\n" + "=" * 60)
+    print("测试 2: 并行校验与篡改检测")
+    print("=" * 60)
+
+    chain = _make_chain(60)
+    validator = ChainValidator(full_block_hash, processes=2, chunk_size=8)
+    assert validator.validate(chain)["valid"]
+
+    # 篡改检查点之前的区块：检查点哈希未变，增量校验不会重新检查
+    chain[30].transactions[0].data["block"] = -1
+    assert validator.validate(chain)["checked_blocks"] == 0
+    validator.reset()
+    report = validator.validate(chain)
+    assert not report["valid"]
+    assert report["error_height"] == 30 and report["error"] == "Invalid Merkle root"
+    print(f"✓ 检测到区块 {report['error_height']}: {report['error']}")
+
+    chain = _make_chain(60)
+    chain[12].header.previous_hash = "f" * 64
+    report = ChainValidator(full_block_hash, processes=2, chunk_size=8).validate(chain)
+    assert not report["valid"] and report["error_height"] == 12
+    print(f"✓ 检测到区块 {report['error_height']}: {report['error']}")
+    return True
+
+
+class _GrowingChain(list):
+    """读取到链顶区块时追加一个被篡改的区块，模拟校验期间出块"""
+
+    def __getitem__(self, index):
+        block = super().__getitem__(index)
+        if index == 19 and len(self) == 20:
+            tampered = _make_chain(21, list(self))[20]
+            tampered.transactions[0].data = {"block": "tampered"}
+            self.append(tampered)
+        return block
+
+
+def test_block_mined_during_validation():
+    """测试校验期间新出的区块不会被记为已校验"""
+    print("\n" + "=" * 60)
+    print("测试 3: 校验期间出块")
+    print("=" * 60)
+
+    validator = ChainValidator(full_block_hash, processes=1, chunk_size=8)
+    chain = _GrowingChain(_make_chain(20))
+    report = validator.validate(chain)
+    assert len(chain) == 21
+    assert report["valid"] and report["end_height"] == 19
+    assert validator.verified_height == 19 and validator.verified_hash == chain[19].hash
+
+    report = validator.validate(chain)
+    assert not report["valid"] and report["error_height"] == 20
+    print("✓ 检查点只推进到校验开始时的链顶，新区块在下次校验时被检查")
+    return True
+
+
+# 出块两次后退出（不调用校验）
+_MINE_BLOCKS = """
+import json
+from core.vm import blockchain
+from core.client import ChainClient
+
+client = ChainClient(blockchain)
+treasury = blockchain.treasury
+for _ in range(2):
+    tx = client.create_transaction("penalty", treasury.address, {"target": treasury.address, "amount": 0},
+                                   treasury.private_key)
+    client.send_and_mine(tx, silent=True)
+print(json.dumps({"tip": len(blockchain.chain) - 1, "verified_height": blockchain.validator.verified_height}))
+"""
+
+# 重新启动：加载区块时校验并保存检查点
+_RESTART = """
+import json
+from core.vm import blockchain
+
+print(json.dumps({"verified_height": blockchain.validator.verified_height,
+                  "verified_hash": blockchain.validator.verified_hash}))
+"""
+
+
+def _run_in(directory, script, *args):
+    """在独立进程中运行脚本（区块链与世界状态单例创建在 directory 下），返回最后一行输出的 JSON"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)), OPENAI_API_KEY="x")
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=directory, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_persistent_checkpoint():
+    """测试检查点保存到文件，重启后只校验之后的区块"""
+    print("\n" + "=" * 60)
+    print("测试 4: 检查点持久化")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint_path = os.path.join(directory, VALIDATOR_CHECKPOINT_FILE)
+        chain = _make_chain(30)
+        assert ChainValidator(full_block_hash, processes=1, checkpoint_path=checkpoint_path).validate(chain)["valid"]
+
+        validator = ChainValidator(full_block_hash, processes=1, checkpoint_path=checkpoint_path)
+        assert (validator.verified_height, validator.verified_hash) == (29, chain[29].hash)
+        report = validator.validate(_make_chain(34, chain))
+        assert report["valid"] and report["start_height"] == 30 and report["checked_blocks"] == 4
+
+        with open(checkpoint_path, "w", encoding="utf-8") as f:
+            f.write("{")
+        assert ChainValidator(full_block_hash, processes=1, checkpoint_path=checkpoint_path).verified_height == -1
+    print("✓ 重启后从保存的检查点继续校验，检查点损坏时从头校验")
+
+    with tempfile.TemporaryDirectory() as directory:
+        mined = _run_in(directory, _MINE_BLOCKS)
+        assert mined == {"tip": 2, "verified_height": -1}
+        restarted = _run_in(directory, _RESTART)
+        assert restarted["verified_height"] == 2
+        with open(os.path.join(directory, "chain_data", VALIDATOR_CHECKPOINT_FILE), encoding="utf-8") as f:
+            assert json.load(f) == {"height": 2, "hash": restarted["verified_hash"]}
+    print("✓ 区块链启动时校验已加载的区块并保存检查点")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("全链校验功能测试")
+    print("=" * 60)
+
+    try:
+        test_incremental_validation()
+        test_parallel_detects_tampering()
+        test_block_mined_during_validation()
+        test_persistent_checkpoint()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,125 @@
+"""
+测试进程内事件总线 (core/event_bus.py)
+验证序号单调递增、按序号续传、环形缓冲区淘汰、订阅通知与多线程发布
+"""
+import sys
+import os
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.event_bus import EventBus, RewardSent, ToolCall, run_in_channel
+
+
+def test_resume_by_seq():
+    """测试按序号续传与缓冲区淘汰"""
+    print("=" * 60)
+    print("测试 1: 按序号续传")
+    print("=" * 60)
+
+    bus = EventBus(capacity=10)
+    for i in range(25):
+        bus.publish({"type": "agent_log", "content": f"log {i}"})
+
+    assert bus.last_seq == 25
+    assert [event["seq"] for event in bus.since(20)] == [21, 22, 23, 24, 25]
+    assert [event["seq"] for event in bus.since(20, limit=2)] == [21, 22]
+    # 客户端落后太多时从缓冲区最早的事件开始
+    assert bus.since(3)[0]["seq"] == 16
+    assert bus.since(25) == [] and bus.since(99) == []
+    assert [event["seq"] for event in bus.recent(3)] == [23, 24, 25]
+
+    bus.clear()
+    assert bus.recent() == []
+    assert bus.publish({"type": "reset"})["seq"] == 26
+    assert [event["seq"] for event in bus.since(25)] == [26]
+    print("✓ 续传、淘汰与清空后序号连续")
+    return True
+
+
+def test_listeners_and_threads():
+    """测试订阅通知与多线程发布"""
+    print("\n" + "=" * 60)
+    print("测试 2: 订阅与并发发布")
+    print("=" * 60)
+
+    bus = EventBus(capacity=5000)
+    received = []
+    listener = received.append
+    bus.subscribe(listener)
+
+    def publish_many(worker):
+        for i in range(500):
+            bus.publish({"worker": worker, "i": i})
+
+    threads = [threading.Thread(target=publish_many, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    seqs = [event["seq"] for event in bus.since(0)]
+    assert seqs == list(range(1, 2001))
+    assert sorted(event["seq"] for event in received) == seqs
+
+    bus.unsubscribe(listener)
+    bus.publish({"after": "unsubscribe"})
+    assert len(received) == 2000
+    print("✓ 4 个线程发布 2000 条事件，序号连续且全部通知到订阅者")
+    return True
+
+
+def test_typed_events_and_run_channels():
+    """测试类型化事件与按运行划分的通道"""
+    print("\n" + "=" * 60)
+    print("测试 3: 类型化事件与运行通道")
+    print("=" * 60)
+
+    bus = EventBus(run_capacity=3, max_runs=2)
+
+    def agent_run(tool):
+        for i in range(4):
+            bus.emit(ToolCall(agent="Data Detective", tool=tool, tool_input=str(i)))
+
+    run_in_channel("run-a", agent_run, "query_endpoint_stats")
+    bus.publish({"type": "contract_event", "name": "DataCollected"})
+    run_in_channel("run-b", agent_run, "query_traces")
+
+    event = bus.recent(1, run_id="run-b")[0]
+    assert event["type"] == "ToolCall" and event["log_type"] == "action"
+    assert event["content"] == "🔍 action: query_traces(3)" and event["run_id"] == "run-b"
+    assert bus.recent(1)[0]["run_id"] == "run-b"
+    # 每个运行只保留最近 3 条，续传按序号过滤
+    assert [e["seq"] for e in bus.since(0, run_id="run-a")] == [2, 3, 4]
+    assert [e["seq"] for e in bus.since(3, run_id="run-a")] == [4]
+    assert bus.since(0)[4]["run_id"] is None
+
+    # 超出保留的运行数后，最早的运行被丢弃
+    run_in_channel("run-c", agent_run, "query_logs")
+    assert bus.recent(run_id="run-a") == [] and len(bus.recent(run_id="run-c")) == 3
+
+    reward = RewardSent(to="0x1234567890abcdef", amount=300, reputation=1, success=True, block_number=7)
+    assert reward.content() == "奖励发送: to=0x1234...cdef, token=300, rep=1, success=True, onchain_block=7"
+    print("✓ 事件带类型与所属运行，每个运行的缓冲区有界")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("事件总线功能测试")
+    print("=" * 60)
+
+    try:
+        test_resume_by_seq()
+        test_listeners_and_threads()
+        test_typed_events_and_run_channels()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,80 @@
+"""
+测试事件循环延迟监控 (utils/loop_monitor.py)
+验证同步代码占住事件循环时能测到延迟，以及统计与启停
+"""
+import sys
+import os
+import asyncio
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.loop_monitor import EventLoopMonitor
+
+
+def test_detects_blocking():
+    """测试检测阻塞事件循环的同步代码"""
+    print("=" * 60)
+    print("测试 1: 检测事件循环阻塞")
+    print("=" * 60)
+
+    async def scenario():
+        monitor = EventLoopMonitor(interval=0.01)
+        monitor.start()
+        monitor.start()  # 重复启动不会创建第二个任务
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)  # 模拟在事件循环中执行的同步计算
+        await asyncio.sleep(0.03)
+        stats = monitor.stats()
+        await monitor.stop()
+        return stats, monitor.running
+
+    stats, running = asyncio.run(scenario())
+    assert stats["running"] and not running
+    assert stats["samples"] >= 3
+    assert stats["max_ms"] >= 150 and stats["window_max_ms"] == stats["max_ms"]
+    assert stats["p50_ms"] < stats["max_ms"]
+    print(f"✓ 阻塞 200ms 时测得延迟 {stats['max_ms']:.1f}ms")
+    return True
+
+
+def test_stats_window():
+    """测试统计窗口"""
+    print("\n" + "=" * 60)
+    print("测试 2: 统计窗口")
+    print("=" * 60)
+
+    monitor = EventLoopMonitor(interval=0.1, window=100)
+    assert monitor.stats()["samples"] == 0 and monitor.stats()["p99_ms"] == 0.0
+    monitor.record(0.5)
+    for i in range(100):
+        monitor.record(i / 1000)
+    monitor.record(-0.001)  # 计时误差导致的负值按 0 记录
+
+    stats = monitor.stats()
+    assert stats["samples"] == 100 and stats["current_ms"] == 0.0
+    assert stats["p50_ms"] == 50.0 and stats["p99_ms"] == 99.0
+    # 窗口外的最大值只体现在 max_ms 中
+    assert stats["window_max_ms"] == 99.0 and stats["max_ms"] == 500.0
+    print("✓ p50/p99 只统计最近的采样，max_ms 记录历史最大值")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("事件循环延迟监控测试")
+    print("=" * 60)
+
+    try:
+        test_detects_blocking()
+        test_stats_window()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,259 @@
+"""
+测试交易池 (core/mempool.py) 与后台出块器 (core/producer.py)
+验证同一发送者连续排队、跨发送者按 gas_price 出块、替换规则与池满淘汰、队尾堆大小，
+以及按策略批量出块、出块失败处理与同一发送者并发发送
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.mempool import Mempool
+from core.producer import BlockPolicy, BlockProducer
+from core.types import Block, BlockHeader, Transaction
+
+
+def _tx(sender, nonce, gas_price=1, memo=""):
+    return Transaction(tx_type="vote", sender=sender, nonce=nonce, gas_price=gas_price, gas_limit=200,
+                       data={"memo": memo}, signature="00", timestamp=1700000000)
+
+
+def test_nonce_queue_and_priority():
+    """测试 nonce 队列与跨发送者优先级"""
+    print("=" * 60)
+    print("测试 1: nonce 队列与优先级")
+    print("=" * 60)
+
+    pool = Mempool()
+    assert pool.add(_tx("alice", 5, gas_price=1), account_nonce=5)
+    assert pool.add(_tx("alice", 6, gas_price=9), account_nonce=5)
+    assert not pool.add(_tx("alice", 8), account_nonce=5)  # nonce 断档
+    assert pool.add(_tx("bob", 0, gas_price=3), account_nonce=0)
+    assert pool.next_nonce("alice", 5) == 7
+    assert pool.pending_cost("alice") == 200 + 9 * 200
+    assert len(pool) == 3
+
+    order = [(tx.sender, tx.nonce) for tx in pool.pop_executable()]
+    # alice 的高价交易必须等待其 nonce 5 先出块
+    assert order == [("bob", 0), ("alice", 5), ("alice", 6)]
+    assert len(pool) == 0 and pool.pop() is None
+    print(f"✓ 出块顺序: {order}")
+    return True
+
+
+def test_replacement_and_eviction():
+    """测试替换与池满淘汰"""
+    print("\n" + "=" * 60)
+    print("测试 2: 替换与淘汰")
+    print("=" * 60)
+
+    pool = Mempool(max_size=3, max_per_sender=2)
+    assert pool.add(_tx("alice", 0, gas_price=10), 0)
+    assert not pool.add(_tx("alice", 0, gas_price=10), 0)  # 完全重复
+    assert not pool.add(_tx("alice", 0, gas_price=10, memo="x"), 0)  # 加价不足
+    assert pool.add(_tx("alice", 0, gas_price=11, memo="x"), 0)
+    assert pool.add(_tx("alice", 1, gas_price=2), 0)
+    assert not pool.add(_tx("alice", 2, gas_price=50), 0)  # 超出单发送者上限
+    assert pool.add(_tx("bob", 0, gas_price=5), 0)
+    print("✓ 重复/替换/单发送者上限")
+
+    # 池满: carol 出价高于最便宜的队尾(alice nonce 1)，将其淘汰
+    assert pool.add(_tx("carol", 0, gas_price=4), 0)
+    assert len(pool) == 3 and pool.next_nonce("alice", 0) == 1
+    # 出价不高于当前最便宜的队尾则拒绝
+    assert not pool.add(_tx("dave", 0, gas_price=4), 0)
+    print("✓ 池满淘汰最便宜的队尾交易")
+
+    assert [tx.data["memo"] for tx in pool.remove_sender("alice")] == ["x"]
+    assert [tx.sender for tx in pool.pop_executable()] == ["bob", "carol"]
+    print("✓ 移除发送者后按价格出块")
+    return True
+
+
+class _MemoryChain:
+    """只有交易池与出块的最小区块链，避免测试读写 state.db"""
+
+    def __init__(self):
+        self.mempool = Mempool()
+        self.lock = threading.RLock()
+        self.producer = None
+        self.chain = []
+
+    def add_transaction(self, tx):
+        with self.lock:
+            return self.mempool.add(tx, account_nonce=0)
+
+    def mine_block(self, max_transactions=None, max_gas=None):
+        with self.lock:
+            transactions = self.mempool.pop_executable(max_transactions, max_gas)
+            if not transactions:
+                return None
+            header = BlockHeader(index=len(self.chain) + 1, timestamp=0, previous_hash="0", merkle_root="0")
+            block = Block(header=header, transactions=transactions, hash=f"block-{len(self.chain) + 1}")
+            self.chain.append(block)
+            return block
+
+
+def test_block_producer():
+    """测试后台出块器按交易数/延迟出块并完成 Future"""
+    print("\n" + "=" * 60)
+    print("测试 3: 后台出块器")
+    print("=" * 60)
+
+    chain = _MemoryChain()
+    producer = BlockProducer(chain, BlockPolicy(max_transactions=4, max_gas=10 ** 6, max_latency=0.2)).start()
+    assert chain.producer is producer
+    futures = [producer.submit(_tx(f"sender{i}", 0, gas_price=i + 1)) for i in range(6)]
+    receipts = [future.result(timeout=5) for future in futures]
+    assert all(receipt["success"] for receipt in receipts)
+    # 6 笔交易共享区块: 首个区块按交易数上限打包 4 笔，其余 2 笔在延迟到期后出块
+    assert sorted(len(block.transactions) for block in chain.chain) == [2, 4]
+    assert producer.wait_for_receipt(receipts[0]["tx_hash"]) == receipts[0]
+    print(f"✓ 6 笔交易打包进 {len(chain.chain)} 个区块")
+
+    rejected = producer.submit(_tx("sender0", 5)).result(timeout=1)
+    assert rejected["success"] is False and rejected["block_number"] is None
+    producer.stop()
+    assert chain.producer is None
+    print("✓ 未能入池的交易立即返回失败回执")
+    return True
+
+
+class _FailingChain(_MemoryChain):
+    """首次出块抛出异常（模拟写盘失败）的区块链"""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def mine_block(self, max_transactions=None, max_gas=None):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        return super().mine_block(max_transactions, max_gas)
+
+
+def test_block_producer_failure():
+    """测试出块出错时等待中的 Future 以异常结束，出块线程继续运行"""
+    print("\n" + "=" * 60)
+    print("测试 4: 出块失败")
+    print("=" * 60)
+
+    chain = _FailingChain()
+    producer = BlockProducer(chain, BlockPolicy(max_transactions=1, max_gas=10 ** 6, max_latency=0.1)).start()
+    try:
+        producer.submit(_tx("sender0", 0)).result(timeout=5)
+        assert False, "出块失败时 Future 应以异常结束"
+    except OSError as e:
+        assert str(e) == "disk full"
+    print("✓ 出块失败时等待中的 Future 以异常结束")
+
+    assert producer.running and producer._thread.is_alive()
+    receipt = producer.submit(_tx("sender1", 0)).result(timeout=5)
+    assert receipt["success"] and receipt["block_number"] is not None
+    producer.stop()
+    print("✓ 出块线程在失败后继续出块")
+    return True
+
+
+
+def test_tail_heap_bounded():
+    """测试池未满时队尾堆中的过期条目不会无限累积"""
+    print("\n" + "=" * 60)
+    print("测试 6: 队尾堆大小")
+    print("=" * 60)
+
+    pool = Mempool(max_size=100)
+    for round_ in range(50):
+        for sender in ("a", "b", "c"):
+            for nonce in range(round_ * 5, round_ * 5 + 5):
+                assert pool.add(_tx(sender, nonce, gas_price=nonce % 3 + 1), account_nonce=round_ * 5)
+        # 每次追加都让该发送者的旧队尾条目过期
+        assert len(pool._tails) <= 2 * len(pool._queues)
+        assert len(pool.pop_executable(limit=12)) == 12
+        pool.pop_executable()
+    assert len(pool) == 0 and pool._tails == [] and pool._heads == []
+    print("✓ 750 笔交易进出交易池后队尾堆仍有界")
+    return True
+
+# 两个线程同时以金库身份发送交易，每笔交易都应分到不同的 nonce 并上链
+_SAME_SENDER = """
+import json, threading
+from core.vm import blockchain
+from core.state import world_state
+from core.client import ChainClient
+from core.producer import BlockPolicy, BlockProducer
+
+victim = world_state.create_account("victim")
+victim.balance = 10 ** 6
+world_state.update_account(victim)
+treasury = blockchain.treasury
+producer = BlockProducer(blockchain, BlockPolicy(max_transactions=8, max_gas=10 ** 6, max_latency=0.05)).start()
+futures = []
+
+def send(count):
+    client = ChainClient(blockchain)
+    for _ in range(count):
+        futures.append(client.create_and_submit("penalty", treasury.address, {"target": "victim", "amount": 1},
+                                                treasury.private_key))
+
+threads = [threading.Thread(target=send, args=(10,)) for _ in range(2)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+receipts = [future.result(timeout=30) for future in futures]
+producer.stop()
+print(json.dumps({"mined": sum(1 for r in receipts if r["block_number"] is not None),
+                  "nonce": world_state.get_account(treasury.address).nonce}))
+"""
+
+
+def _run_in(directory, script, *args):
+    """在独立进程中运行脚本（区块链与世界状态单例创建在 directory 下），返回最后一行输出的 JSON"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)), OPENAI_API_KEY="x")
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=directory, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_concurrent_sender():
+    """测试多线程共用同一发送者时交易不会取到重复的 nonce"""
+    print("\n" + "=" * 60)
+    print("测试 5: 同一发送者并发发送交易")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = _run_in(directory, _SAME_SENDER)
+    assert result == {"mined": 20, "nonce": 20}, result
+    print("✓ 两个线程发送的 20 笔交易 nonce 各不相同，全部上链")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("交易池功能测试")
+    print("=" * 60)
+
+    try:
+        test_nonce_queue_and_priority()
+        test_replacement_and_eviction()
+        test_block_producer()
+        test_block_producer_failure()
+        test_concurrent_sender()
+        test_tail_heap_bounded()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,106 @@
+"""
+测试 Merkle 树 (core/types.py MerkleTree)
+验证根哈希与逐层重建的结果一致、增量追加，单个/批量证明，以及共用中间节点的批量校验
+"""
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.types import MerkleTree, Transaction, calculate_hash, get_merkle_root
+
+
+def _rebuild_root(leaves):
+    """逐层重建的参考实现(奇数个节点时复制最后一个)"""
+    level = leaves[:]
+    while len(level) > 1:
+        if len(level) % 2 == 1:
+            level.append(level[-1])
+        level = [calculate_hash(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def test_root_and_append():
+    """测试根哈希与增量追加"""
+    print("=" * 60)
+    print("测试 1: 根哈希与增量追加")
+    print("=" * 60)
+
+    assert MerkleTree().root() == get_merkle_root([]) == calculate_hash("")
+    incremental = MerkleTree()
+    for n in range(1, 34):
+        leaves = [calculate_hash(f"tx-{i}") for i in range(n)]
+        incremental.append(leaves[-1])
+        tree = MerkleTree(leaves)
+        assert tree.root() == _rebuild_root(leaves)
+        assert incremental.levels == tree.levels
+    print("✓ 1~33 个叶子的根哈希一致，增量追加与整体构建一致")
+
+    txs = [Transaction(tx_type="vote", sender=f"addr{i}", nonce=0, gas_price=1, gas_limit=200,
+                       data={"option": "For"}, timestamp=1700000000) for i in range(5)]
+    assert get_merkle_root(txs) == MerkleTree.from_transactions(txs).root()
+    print("✓ get_merkle_root 与 MerkleTree 一致")
+    return True
+
+
+def test_proofs():
+    """测试单个与批量证明"""
+    print("\n" + "=" * 60)
+    print("测试 2: Merkle 证明")
+    print("=" * 60)
+
+    leaves = [calculate_hash(f"tx-{i}") for i in range(11)]
+    tree = MerkleTree(leaves)
+    for i, leaf in enumerate(leaves):
+        assert MerkleTree.verify_proof(leaf, tree.proof(i), tree.root())
+    # 最后一个(奇数位)叶子与自身配对
+    assert tree.proof(10)[0] == {"position": "right", "hash": leaves[10]}
+    assert not MerkleTree.verify_proof(leaves[0], tree.proof(1), tree.root())
+
+    batch = tree.proofs([0, 5, 10])
+    assert list(batch) == [0, 5, 10] and batch[5] == tree.proof(5)
+    print("✓ 11 个叶子的证明全部通过校验")
+    return True
+
+
+def test_batch_verification_cache():
+    """测试批量校验时共用中间节点"""
+    print("\n" + "=" * 60)
+    print("测试 3: 批量校验")
+    print("=" * 60)
+
+    leaves = [calculate_hash(f"tx-{i}") for i in range(11)]
+    tree = MerkleTree(leaves)
+    cache = {}
+    assert all(MerkleTree.verify_proof(leaf, tree.proof(i), tree.root(), cache) for i, leaf in enumerate(leaves))
+    # 每个内部节点只计算一次：11 -> 6 -> 3 -> 2 -> 1
+    assert len(cache) == 6 + 3 + 2 + 1
+
+    # 缓存按 (左, 右) 子节点索引，篡改的证明仍然校验失败
+    tampered = tree.proof(3)
+    tampered[1] = {"position": tampered[1]["position"], "hash": calculate_hash("forged")}
+    assert not MerkleTree.verify_proof(leaves[3], tampered, tree.root(), cache)
+    assert not MerkleTree.verify_proof(leaves[0], tree.proof(1), tree.root(), cache)
+    print("✓ 全部叶子的批量校验只计算 12 次哈希")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("Merkle 树功能测试")
+    print("=" * 60)
+
+    try:
+        test_root_and_append()
+        test_proofs()
+        test_batch_verification_cache()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,75 @@
+"""
+测试指标异常预筛选索引 (metric_anomaly.py)
+构造一小时的平稳指标并注入故障，验证自身基线与同侪基线两种打分方式
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from handle.metric_anomaly import AnomalyIndex
+
+START = datetime(2024, 1, 9, 8, 0, 0)
+FAULT_MINUTE = "2024-01-09 09:00:00"
+
+
+def _stats(duration, error_rate=0.0, timeout_rate=0.0):
+    return {'calls': 20, 'success_rate': 100 - error_rate, 'error_rate': error_rate,
+            'average_duration': duration, 'timeout_rate': timeout_rate}
+
+
+def _make_stats():
+    """order/payment/cache 有一小时历史；payment 在 09:00 附近变慢，new-service 只在窗口内出现"""
+    aggregated_stats = {'order': {}, 'payment': {}, 'cache': {}, 'new-service': {}}
+    for i in range(80):
+        minute = (START + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S')
+        jitter = i % 3
+        aggregated_stats['order'][minute] = _stats(100 + jitter)
+        aggregated_stats['cache'][minute] = _stats(5 + jitter)
+        slow = 58 <= i <= 62
+        aggregated_stats['payment'][minute] = _stats(2000 if slow else 50 + jitter, error_rate=30.0 if slow else 0.0)
+        if i >= 55:
+            aggregated_stats['new-service'][minute] = _stats(40, error_rate=0.0)
+    return aggregated_stats
+
+
+def test_rank_anomalous_endpoints():
+    """测试窗口内异常端点排序"""
+    print("=" * 60)
+    print("测试 1: 异常端点排序")
+    print("=" * 60)
+
+    index = AnomalyIndex(_make_stats())
+    ranked = index.rank(FAULT_MINUTE, top_k=None)
+    assert [item['endpoint'] for item in ranked][0] == 'payment'
+    assert ranked[0]['suspicious'] is True
+    assert ranked[0]['metric'] in ('average_duration', 'error_rate')
+    healthy = {item['endpoint']: item for item in ranked[1:]}
+    assert set(healthy) == {'order', 'cache', 'new-service'}
+    assert not any(item['suspicious'] for item in healthy.values())
+    print(f"✓ 最可疑端点: {ranked[0]['endpoint']} (score={ranked[0]['score']})")
+
+    assert len(index.rank(FAULT_MINUTE, top_k=2)) == 2
+    assert index.rank("2023-01-01 00:00:00") == []
+    print("✓ top_k 截断与空窗口")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("指标异常预筛选功能测试")
+    print("=" * 60)
+
+    try:
+        test_rank_anomalous_endpoints()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,150 @@
+"""
+测试交易回执存储 (core/receipt_store.py)
+验证按交易哈希/区块高度查询回执、重启后读取历史回执、丢弃未落盘区块的回执，
+以及回执中记录合约实际生效的事件
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.receipt_store import RECEIPT_STORE_FILE, ReceiptStore
+from core.types import TransactionReceipt
+
+
+def _receipts(height, count):
+    """每个区块的最后一笔交易执行失败"""
+    return [
+        TransactionReceipt(
+            tx_hash=f"tx{height}-{i}", tx_type="penalty", sender="treasury", success=i < count - 1,
+            gas_used=200, block_number=height, block_hash=f"block{height}",
+            logs=[{"name": "penalty", "target": f"agent{i}", "amount": 50 * i}] if i < count - 1 else [],
+            error=None if i < count - 1 else "penalty rejected by contract",
+        )
+        for i in range(count)
+    ]
+
+
+def test_query_receipts():
+    """测试按交易哈希与区块高度查询回执"""
+    print("=" * 60)
+    print("测试 1: 查询回执")
+    print("=" * 60)
+
+    store = ReceiptStore()
+    for height in range(1, 6):
+        store.add_block(height, _receipts(height, 4))
+    assert len(store) == 20
+
+    receipt = store.get("tx3-2")
+    assert receipt == _receipts(3, 4)[2]
+    assert receipt.logs == [{"name": "penalty", "target": "agent2", "amount": 100}]
+    assert store.get("missing") is None
+    assert [r.tx_hash for r in store.block(4)] == ["tx4-0", "tx4-1", "tx4-2", "tx4-3"]
+    assert not store.block(4)[-1].success and store.block(9) == []
+    print("✓ 回执（含失败交易与事件日志）按哈希与区块高度均可查询")
+    return True
+
+
+def test_persistence_and_truncate():
+    """测试重启后读取历史回执与丢弃未落盘区块的回执"""
+    print("\n" + "=" * 60)
+    print("测试 2: 持久化与截断")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        db_path = os.path.join(data_dir, RECEIPT_STORE_FILE)
+        store = ReceiptStore(db_path)
+        for height in range(1, 8):
+            store.add_block(height, _receipts(height, 3))
+        store.close()
+
+        store = ReceiptStore(db_path)
+        assert store.get("tx2-1") == _receipts(2, 3)[1]
+        # 链只落盘到高度 5（长度 6）时，更高区块的回执被丢弃
+        assert store.truncate(6) == 6
+        assert store.get("tx6-0") is None and store.block(7) == []
+        assert len(store.block(5)) == 3
+        store.close()
+    print("✓ 重启后可读取历史回执，超出链顶的回执被丢弃")
+    return True
+
+
+# 罚没金额超过余额：回执记录按余额截断后的金额与金库入账
+_MINE_PENALTY = """
+import json
+from core.vm import blockchain
+from core.state import world_state
+from core.client import ChainClient
+from core.signature import transaction_digest
+
+client = ChainClient(blockchain)
+treasury = blockchain.treasury
+victim = world_state.create_account("victim")
+victim.balance = 1000
+victim.reputation = 3
+world_state.update_account(victim)
+tx = client.create_transaction("penalty", treasury.address, {"target": "victim", "amount": 5000, "reputation": -5},
+                               treasury.private_key)
+assert client.send_and_mine(tx, silent=True)
+print(json.dumps({"tx_hash": transaction_digest(tx), "treasury": treasury.address,
+                  "logs": client.get_transaction_receipt(transaction_digest(tx))["logs"]}))
+"""
+
+# 重新启动后按交易哈希读取回执
+_RESTART = """
+import json, sys
+from core.vm import blockchain
+
+print(json.dumps(blockchain.get_receipt(sys.argv[1]).logs))
+"""
+
+
+def _run_in(directory, script, *args):
+    """在独立进程中运行脚本（区块链与世界状态单例创建在 directory 下），返回最后一行输出的 JSON"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)), OPENAI_API_KEY="x")
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=directory, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_contract_logs():
+    """测试回执记录合约实际生效的事件，并随区块持久化"""
+    print("\n" + "=" * 60)
+    print("测试 3: 合约事件日志")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        mined = _run_in(directory, _MINE_PENALTY)
+        assert mined["logs"] == [
+            {"name": "penalty", "target": "victim", "amount": 1000, "reputation": -3},
+            {"name": "treasury_credit", "treasury": mined["treasury"], "amount": 1000},
+        ]
+        assert _run_in(directory, _RESTART, mined["tx_hash"]) == mined["logs"]
+    print("✓ 回执记录截断后的罚没金额、信誉变化与金库入账，重启后仍可查询")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("交易回执存储功能测试")
+    print("=" * 60)
+
+    try:
+        test_query_receipts()
+        test_persistence_and_truncate()
+        test_contract_logs()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,180 @@
+"""
+测试诊断运行队列 (utils/run_manager.py) 与运行隔离的 SOP 合约
+验证并发上限、运行状态流转、事件归入运行通道、历史记录裁剪，各运行的 SOP 互不影响，以及出块后发出的奖励事件仍归入提交时的运行
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.event_bus import event_bus, current_run_id
+from contracts.ops_contract import OpsSOPContract, ops_sop_contract, get_contract_for_proposal
+from utils.run_manager import RunManager, RUN_QUEUED, RUN_RUNNING, RUN_SUCCEEDED, RUN_FAILED
+
+
+def test_concurrency_limit():
+    """测试并发上限与排队"""
+    print("=" * 60)
+    print("测试 1: 并发上限")
+    print("=" * 60)
+
+    manager = RunManager(max_concurrency=2)
+    lock = threading.Lock()
+    release = threading.Event()
+    running = [0]
+    peak = [0]
+
+    def job(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+        return i * 10
+
+    records = [manager.submit(job, i) for i in range(5)]
+    deadline = time.time() + 5
+    while sum(r.status == RUN_RUNNING for r in records) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert [r.status for r in records[:2]] == [RUN_RUNNING, RUN_RUNNING]
+    assert [r.status for r in records[2:]] == [RUN_QUEUED] * 3
+    assert [manager.queue_position(r.run_id) for r in records] == [None, None, 0, 1, 2]
+
+    release.set()
+    assert [r.future.result(5) for r in records] == [0, 10, 20, 30, 40]
+    assert peak[0] == 2
+    assert all(r.status == RUN_SUCCEEDED and r.to_dict()["elapsed"] is not None for r in records)
+    manager.shutdown()
+    print("✓ 同时最多 2 个运行，其余按提交顺序排队")
+    return True
+
+
+def test_failure_channel_and_history():
+    """测试失败记录、运行通道与历史裁剪"""
+    print("\n" + "=" * 60)
+    print("测试 2: 失败、运行通道与历史裁剪")
+    print("=" * 60)
+
+    manager = RunManager(max_concurrency=1, max_history=3)
+
+    def failing():
+        raise ValueError("no data")
+
+    record = manager.submit(failing, run_id="run-failed", metadata={"endpoint": "food-buy"})
+    try:
+        record.future.result(5)
+        assert False, "运行应当失败"
+    except ValueError:
+        pass
+    info = record.to_dict()
+    assert info["status"] == RUN_FAILED and info["error"] == "no data" and info["endpoint"] == "food-buy"
+
+    def publish(i):
+        event_bus.publish({"type": "agent_log", "content": f"step {i}"})
+        return current_run_id.get()
+
+    records = [manager.submit(publish, i) for i in range(4)]
+    for r in records:
+        assert r.future.result(5) == r.run_id
+        assert event_bus.recent(1, run_id=r.run_id)[0]["content"].startswith("step")
+    assert current_run_id.get() is None
+
+    # 只保留最近 3 条记录，最早的已结束运行被丢弃
+    assert manager.get("run-failed") is None and manager.get(records[0].run_id) is None
+    assert [r.run_id for r in manager.list()] == [r.run_id for r in records[1:]]
+    manager.shutdown()
+    print("✓ 失败原因被记录，事件归入运行通道，历史记录有界")
+    return True
+
+
+def test_isolated_sop_contracts():
+    """测试各运行的 SOP 合约互不影响"""
+    print("\n" + "=" * 60)
+    print("测试 3: 运行隔离的 SOP 合约")
+    print("=" * 60)
+
+    ops_sop_contract.reset_for_testing()
+    first, second = OpsSOPContract(isolated=True), OpsSOPContract(isolated=True)
+    first.submit_data_collection("0xalert", "food-buy 指标异常")
+    proposal_id = first.propose_root_cause("0xscheduler", "mysql 连接池耗尽")
+
+    assert first.get_current_state() == "Root_Cause_Proposed"
+    assert second.get_current_state() == "Init" and ops_sop_contract.get_current_state() == "Init"
+    assert get_contract_for_proposal(proposal_id["proposal_id"]) is first
+    assert get_contract_for_proposal("unknown") is None
+
+    first.advance_to_consensus_phase(proposal_id["proposal_id"], passed=True)
+    assert first.get_current_state() == "Solution" and second.get_events() == []
+    print("✓ 提案只推进所属运行的合约")
+    return True
+
+
+# 奖励交易由后台出块器打包，RewardSent 在出块线程中发出
+_REWARD_IN_RUN = """
+import json
+from agents.base.dao_run import DAOExecutor
+from core.event_bus import event_bus, run_in_channel
+from core.producer import BlockPolicy, BlockProducer
+from core.state import world_state
+from core.vm import blockchain
+
+world_state.create_account("agent")
+executor = DAOExecutor(blockchain)
+treasury = executor._get_or_create_treasury_account()
+producer = BlockProducer(blockchain, BlockPolicy(max_latency=0.05)).start()
+run_in_channel("run-1", executor._send_reward, treasury, "agent", 100, 1, "Bounty: run-1")
+producer.stop()
+print(json.dumps([{"run_id": e["run_id"], "success": e["success"]}
+                  for e in event_bus.recent() if e["type"] == "RewardSent"]))
+"""
+
+
+def _run_in(directory, script, *args):
+    """在独立进程中运行脚本（区块链与世界状态单例创建在 directory 下），返回最后一行输出的 JSON"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)), OPENAI_API_KEY="x")
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=directory, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_reward_event_run_channel():
+    """测试出块线程发出的奖励事件仍归入提交奖励的运行"""
+    print("\n" + "=" * 60)
+    print("测试 4: 奖励事件的运行归属")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        events = _run_in(directory, _REWARD_IN_RUN)
+    assert events == [{"run_id": "run-1", "success": True}], events
+    print("✓ 出块后发出的 RewardSent 带有提交时的 run_id")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("诊断运行队列功能测试")
+    print("=" * 60)
+
+    try:
+        test_concurrency_limit()
+        test_failure_channel_and_history()
+        test_isolated_sop_contracts()
+        test_reward_event_run_channel()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,105 @@
+"""
+测试交易签名校验 (core/signature.py) 与密码学后端 (core/crypto.py)
+验证串行校验与进程池批量校验结果一致，以及各后端的 DER 签名互相兼容
+"""
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ecdsa import SigningKey, SECP256k1
+from ecdsa.util import sigencode_der
+
+from core.types import Transaction
+from core.crypto import BACKENDS, CryptoProvider
+from core.signature import PARALLEL_THRESHOLD, transaction_digest, verify_batch
+
+
+def _signed_jobs(count):
+    """两个账户交替签名的投票交易，每 5 笔篡改一笔"""
+    keys = [SigningKey.generate(curve=SECP256k1) for _ in range(2)]
+    jobs, expected = [], []
+    for i in range(count):
+        sk = keys[i % 2]
+        tx = Transaction(tx_type="vote", sender=f"addr{i % 2}", nonce=i, gas_price=1, gas_limit=200,
+                         data={"proposal_id": "p1", "option": "For"}, timestamp=1700000000)
+        digest = transaction_digest(tx)
+        signature = sk.sign_digest(bytes.fromhex(digest), sigencode=sigencode_der).hex()
+        tampered = i % 5 == 0
+        if tampered:
+            tx.data["option"] = "Against"
+            digest = transaction_digest(tx)
+        jobs.append((sk.get_verifying_key().to_string().hex(), signature, digest))
+        expected.append(not tampered)
+    return jobs, expected
+
+
+def test_verify_batch():
+    """测试批量校验"""
+    print("=" * 60)
+    print("测试 1: 批量签名校验")
+    print("=" * 60)
+
+    jobs, expected = _signed_jobs(PARALLEL_THRESHOLD + 8)
+    assert verify_batch(jobs, processes=1) == expected
+    print(f"✓ 串行校验: {sum(expected)}/{len(jobs)} 通过")
+
+    assert verify_batch(jobs, processes=2) == expected
+    print("✓ 进程池校验结果一致")
+    return True
+
+
+def test_backends_compatible():
+    """测试任一后端的签名可被其他后端校验"""
+    print("\n" + "=" * 60)
+    print("测试 2: 密码学后端互相兼容")
+    print("=" * 60)
+
+    sk = SigningKey.generate(curve=SECP256k1)
+    public_key_hex = sk.get_verifying_key().to_string().hex()
+    digest = bytes.fromhex(transaction_digest(
+        Transaction(tx_type="stake", sender="addr", nonce=0, gas_price=1, gas_limit=200, data={"amount": 10})))
+    backends = [backend() for backend in BACKENDS.values()]
+    for signer in backends:
+        signature = signer.sign_digest(sk, digest)
+        for verifier in backends:
+            assert verifier.verify_digest(public_key_hex, signature, digest)
+            assert not verifier.verify_digest(public_key_hex, signature, bytes(32))
+        assert signer.address_from_public_key(bytes.fromhex(public_key_hex)) == backends[0].address_from_public_key(
+            bytes.fromhex(public_key_hex))
+    print(f"✓ 后端: {', '.join(BACKENDS)}")
+
+    # 接口为抽象类，未实现签名/验签的后端无法实例化
+    try:
+        CryptoProvider()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("CryptoProvider should be abstract")
+    # 私钥转换缓存不以私钥秘密值为键
+    for backend in backends:
+        cache = getattr(backend, "_private_keys", {})
+        assert sk.privkey.secret_multiplier not in cache
+        assert all(key == sk.get_verifying_key().to_string() for key in cache)
+    print("✓ 后端接口为抽象类，私钥缓存按公钥索引")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("交易签名校验功能测试")
+    print("=" * 60)
+
+    try:
+        test_verify_batch()
+        test_backends_compatible()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
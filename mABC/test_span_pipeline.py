@@ -0,0 +1,174 @@
+"""
+测试 span 外排序建树 (span_tree.py) 与单遍流水线 (span_pipeline.py)
+使用构造的小规模 span 数据，验证分块归并、超时传播、指标/拓扑 sink、多进程模式以及阶段出错时的报错
+"""
+import sys
+import os
+import random
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from handle.span_tree import build_trace_trees, external_sort, write_jsonl
+from handle.span_pipeline import MetricSink, PipelineError, TopologySink, run_pipeline
+
+BASE_TIME = 1697349600000  # 2023-10-15 06:00:00 UTC
+
+
+def _make_spans(trace_count=30, seed=7):
+    """每个 trace: gateway -> order -> (db, cache)，部分 trace 的 db 超时"""
+    rng = random.Random(seed)
+    spans = []
+    for t in range(trace_count):
+        trace_id = f"trace-{t:03d}"
+        start = BASE_TIME + t * 20000
+        slow = t % 3 == 0
+        db_duration = 500 if slow else 10
+        spans.append({"traceId": trace_id, "segmentId": f"seg{t}a", "spanId": 0, "parentSpanId": -1, "refs": [],
+                      "serviceCode": "gateway", "endpointName": "/buy", "startTime": start,
+                      "endTime": start + db_duration + 40, "isError": False})
+        # 跨 segment 调用通过 refs 关联父 span
+        spans.append({"traceId": trace_id, "segmentId": f"seg{t}b", "spanId": 0, "parentSpanId": -1,
+                      "refs": [{"parentSegmentId": f"seg{t}a", "parentSpanId": 0}],
+                      "serviceCode": "order", "endpointName": "/order", "startTime": start + 5,
+                      "endTime": start + db_duration + 30, "isError": slow})
+        spans.append({"traceId": trace_id, "segmentId": f"seg{t}b", "spanId": 1, "parentSpanId": 0, "refs": [],
+                      "serviceCode": "order", "endpointName": "db", "startTime": start + 10,
+                      "endTime": start + 10 + db_duration, "isError": False})
+        spans.append({"traceId": trace_id, "segmentId": f"seg{t}b", "spanId": 2, "parentSpanId": 0, "refs": [],
+                      "serviceCode": "order", "endpointName": "cache", "startTime": start + 12,
+                      "endTime": start + 15, "isError": False})
+    rng.shuffle(spans)
+    return spans
+
+
+def test_external_sort_merges_chunks():
+    """测试分块落盘后的 k 路归并结果有序且完整"""
+    print("=" * 60)
+    print("测试 1: 外排序分块归并")
+    print("=" * 60)
+
+    spans = _make_spans()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = list(external_sort(iter(spans), chunk_size=7, tmp_dir=tmp_dir))
+        # 归并结束后清理临时文件
+        assert os.listdir(tmp_dir) == []
+
+    assert len(result) == len(spans)
+    trace_ids = [span["traceId"] for span in result]
+    assert trace_ids == sorted(trace_ids)
+    print(f"✓ {len(result)} 条 span 归并有序")
+    return True
+
+
+def test_deep_trace_timeout_propagation():
+    """测试深层 trace 的超时传播不会递归溢出"""
+    print("\n" + "=" * 60)
+    print("测试 2: 深层 trace 超时传播")
+    print("=" * 60)
+
+    depth = 20000
+    spans = [{"traceId": "deep", "segmentId": "s", "spanId": i, "parentSpanId": i - 1 if i else -1, "refs": []}
+             for i in range(depth)]
+    roots = build_trace_trees(spans, {f"s-{depth - 1}"})
+    assert len(roots) == 1
+    assert roots[0]["timeout"] is True
+    print(f"✓ 深度 {depth} 的 trace 根节点已标记超时")
+    return True
+
+
+def test_pipeline_sinks():
+    """测试单遍流水线的指标与拓扑输出"""
+    print("\n" + "=" * 60)
+    print("测试 3: 单遍流水线 (指标 + 拓扑)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "spans.jsonl")
+        write_jsonl(_make_spans(), source)
+
+        metric_sink, topology_sink = MetricSink(), TopologySink()
+        count = run_pipeline(source, [metric_sink, topology_sink], chunk_size=16, tmp_dir=tmp_dir)
+        assert count == 120
+
+        stats = metric_sink.result()
+        assert set(stats) == {"gateway-/buy", "order-/order", "order-db", "order-cache"}
+        db_calls = sum(minute["calls"] for minute in stats["order-db"].values())
+        assert db_calls == 30
+        # 超时沿调用链向上传播: db 超时 => order、gateway 超时；cache 不受影响
+        assert any(minute["timeout_rate"] > 0 for minute in stats["gateway-/buy"].values())
+        assert all(minute["timeout_rate"] == 0 for minute in stats["order-cache"].values())
+
+        maps = topology_sink.result()
+        all_children = {child for minutes in maps["order-/order"].values() for child in minutes}
+        assert all_children == {"order-db", "order-cache"}
+        assert "None" in maps
+        print(f"✓ 端点数: {len(stats)}, 拓扑父节点数: {len(maps)}")
+
+        # 多进程模式结果与单进程一致
+        metric_sink_mp, topology_sink_mp = MetricSink(), TopologySink()
+        count_mp = run_pipeline(source, [metric_sink_mp, topology_sink_mp], chunk_size=16, tmp_dir=tmp_dir,
+                                processes=True, workers=2, queue_size=2, batch_size=4)
+        assert count_mp == count
+        assert metric_sink_mp.result() == stats
+        assert topology_sink_mp.result() == maps
+        print("✓ 多进程模式结果一致")
+    return True
+
+
+def _expect_pipeline_error(source, tmp_dir, expected):
+    try:
+        run_pipeline(source, [MetricSink()], chunk_size=16, tmp_dir=tmp_dir,
+                     processes=True, workers=2, queue_size=2, batch_size=4)
+    except PipelineError as e:
+        assert expected in str(e), str(e)
+        return str(e)
+    raise AssertionError("pipeline finished without raising")
+
+
+def test_pipeline_stage_errors():
+    """测试多进程模式下阶段出错时主进程抛出异常，而不是当作正常结束"""
+    print("\n" + "=" * 60)
+    print("测试 4: 多进程阶段出错")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 读取+排序阶段出错：span 文件中有损坏的行
+        source = os.path.join(tmp_dir, "broken.jsonl")
+        write_jsonl(_make_spans(), source)
+        with open(source, "a", encoding="utf-8") as f:
+            f.write("{not json\n")
+        message = _expect_pipeline_error(source, tmp_dir, "JSONDecodeError")
+        assert "'source'" in message
+
+        # 建树+展平阶段出错：span 缺少 serviceCode
+        spans = _make_spans()
+        del spans[5]["serviceCode"]
+        source = os.path.join(tmp_dir, "missing.jsonl")
+        write_jsonl(spans, source)
+        message = _expect_pipeline_error(source, tmp_dir, "KeyError: 'serviceCode'")
+        assert "'tree'" in message
+    print("✓ 读取与建树阶段的异常堆栈均传回主进程并抛出 PipelineError")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("Span 流水线功能测试")
+    print("=" * 60)
+
+    try:
+        test_external_sort_merges_chunks()
+        test_deep_trace_timeout_propagation()
+        test_pipeline_sinks()
+        test_pipeline_stage_errors()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,201 @@
+"""
+测试世界状态快照 (core/snapshot.py)
+验证快照保存/加载、状态根校验、按链选择最近可用快照、旧快照清理，启动时重放罚没交易，
+以及重放投票交易时不推进 SOP 合约
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.snapshot import SnapshotStore, compute_state_root
+from core.types import Account, Block, BlockHeader
+
+
+def _chain(length, salt=""):
+    return [Block(header=BlockHeader(index=i, timestamp=i, previous_hash="", merkle_root=""),
+                  transactions=[], hash=f"{salt}{i}".rjust(64, "0")) for i in range(length)]
+
+
+def _accounts(balance):
+    return [Account(address=f"addr{i}", balance=balance + i, nonce=i) for i in range(5)]
+
+
+def test_state_root():
+    """测试状态根与账户顺序无关、随账户内容变化"""
+    print("=" * 60)
+    print("测试 1: 状态根")
+    print("=" * 60)
+
+    accounts = _accounts(100)
+    assert compute_state_root(accounts) == compute_state_root(list(reversed(accounts)))
+    changed = _accounts(100)
+    changed[2].balance += 1
+    assert compute_state_root(accounts) != compute_state_root(changed)
+    print("✓ 状态根与顺序无关，且能反映账户变化")
+    return True
+
+
+def test_latest_snapshot():
+    """测试按链选择最近可用快照"""
+    print("\n" + "=" * 60)
+    print("测试 2: 选择最近可用快照")
+    print("=" * 60)
+
+    chain = _chain(30)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SnapshotStore(directory, keep=3)
+        for height in (0, 10, 20):
+            store.save(height, chain[height].hash, _accounts(height), {"treasury_address": "addr0"})
+
+        snapshot = store.latest(chain)
+        assert snapshot.height == 20 and snapshot.metadata["treasury_address"] == "addr0"
+        assert [account.balance for account in snapshot.accounts][:2] == [20, 21]
+
+        # 链回退到 15：高于链顶的快照不可用
+        assert store.latest(chain[:16]).height == 10
+        # 高度 10 之后分叉：区块哈希不在链上的快照不可用
+        forked = chain[:11] + _chain(30, salt="f")[11:]
+        assert store.latest(forked).height == 10
+
+        # 损坏的快照被跳过
+        with open(os.path.join(directory, "snapshot-0000000020.json"), "w") as f:
+            f.write("{")
+        assert store.latest(chain).height == 10
+
+        # 超出保留数量的旧快照被删除
+        store.save(25, chain[25].hash, _accounts(25))
+        assert store.heights() == [10, 20, 25]
+    print("✓ 跳过超出链顶、分叉与损坏的快照，只保留最近 3 份")
+    return True
+
+
+# 在快照之后出块一笔罚没交易，再把世界状态高度退回快照高度，模拟出块后世界状态未落盘
+_MINE_PENALTY = """
+import json
+from core.vm import blockchain
+from core.state import world_state
+from core.client import ChainClient
+
+client = ChainClient(blockchain)
+treasury = blockchain.treasury
+victim = world_state.create_account("victim")
+victim.balance = 1000
+world_state.update_account(victim)
+snapshot_height = blockchain.chain[-1].header.index
+blockchain.take_snapshot()
+tx = client.create_transaction("penalty", treasury.address, {"target": "victim", "amount": 300, "reputation": -1},
+                               treasury.private_key)
+assert client.send_and_mine(tx, silent=True)
+world_state.set_block_height(snapshot_height)
+print(json.dumps({"treasury": world_state.get_account(treasury.address).balance,
+                  "victim": world_state.get_account("victim").balance,
+                  "state_root": blockchain.chain[-1].header.state_root}))
+"""
+
+# 重新启动：导入区块链单例时从快照恢复并重放罚没交易
+_RESTART = """
+import json
+from core.vm import blockchain
+from core.state import world_state
+
+print(json.dumps({"treasury": world_state.get_account(blockchain.treasury.address).balance,
+                  "victim": world_state.get_account("victim").balance,
+                  "state_root": world_state.state_root()}))
+"""
+
+
+# 投票达成共识时只推进持有提案的 SOP 合约；重放同样的投票时不推进任何 SOP 合约
+_REPLAY_VOTES = """
+import copy
+import json
+from core.vm import blockchain
+from core.client import ChainClient
+from contracts.ops_contract import OpsSOPContract, ops_sop_contract, _contracts_by_proposal
+
+client = ChainClient(blockchain)
+treasury = blockchain.treasury
+sop = OpsSOPContract(isolated=True)
+sop.submit_data_collection("0xalert", "food-buy 指标异常")
+proposal_id = sop.propose_root_cause("0xscheduler", "mysql 连接池耗尽")["proposal_id"]
+proposed = copy.deepcopy(sop.storage)
+snapshot_height = blockchain.chain[-1].header.index
+blockchain.take_snapshot()
+for target in (proposal_id, "unknown-proposal"):
+    tx = client.create_transaction("vote", treasury.address, {"proposal_id": target, "vote_option": "for"},
+                                   treasury.private_key)
+    assert client.send_and_mine(tx, silent=True)
+mined = {"owner": sop.get_current_state(), "global": ops_sop_contract.get_current_state()}
+
+# 持有提案的合约回到提案阶段后重放
+replayed_sop = OpsSOPContract(isolated=True)
+replayed_sop.storage = proposed
+_contracts_by_proposal[proposal_id] = replayed_sop
+blockchain.restore_state()
+print(json.dumps({"mined": mined, "replayed": {"owner": replayed_sop.get_current_state(),
+                                               "global": ops_sop_contract.get_current_state()}}))
+"""
+
+
+def _run_in(directory, script):
+    """在独立进程中运行脚本（区块链与世界状态单例创建在 directory 下），返回最后一行输出的 JSON"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)), OPENAI_API_KEY="x")
+    result = subprocess.run([sys.executable, "-c", script], cwd=directory, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_replay_penalty():
+    """测试启动时从快照重放的罚没交易记入金库"""
+    print("\n" + "=" * 60)
+    print("测试 3: 启动时重放罚没交易")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        mined = _run_in(directory, _MINE_PENALTY)
+        restored = _run_in(directory, _RESTART)
+        assert mined["victim"] == 700
+        # 罚没金额记入金库而不是被销毁，重放后的状态根与区块头一致
+        assert restored == mined
+    print("✓ 重放后罚没金额记入金库，状态根与链顶区块一致")
+    return True
+
+
+def test_replay_skips_sop():
+    """测试重放投票交易时不推进 SOP 合约，找不到持有提案的合约时不回退到全局合约"""
+    print("\n" + "=" * 60)
+    print("测试 4: 重放投票不推进 SOP")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = _run_in(directory, _REPLAY_VOTES)
+        assert result["mined"] == {"owner": "Solution", "global": "Init"}
+        assert result["replayed"] == {"owner": "Root_Cause_Proposed", "global": "Init"}
+    print("✓ 出块时只推进持有提案的合约，重放时不推进任何合约")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("世界状态快照功能测试")
+    print("=" * 60)
+
+    try:
+        test_state_root()
+        test_latest_snapshot()
+        test_replay_penalty()
+        test_replay_skips_sop()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
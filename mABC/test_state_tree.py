@@ -0,0 +1,118 @@
+"""
+测试账户状态树 (core/state_tree.py)
+验证增量更新与整体重建的根一致、成员/非成员证明以及证明长度
+"""
+import sys
+import os
+import json
+import random
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.state_tree import SparseMerkleTree, account_key, account_value_hash, build_state_tree
+from core.types import Account, Block, BlockHeader, calculate_hash
+from core.validator import full_block_hash
+
+
+def _accounts(count, balance=100):
+    return [Account(address=f"addr{i}", balance=balance + i) for i in range(count)]
+
+
+def test_incremental_root():
+    """测试增量更新/删除后的根与整体重建一致"""
+    print("=" * 60)
+    print("测试 1: 增量更新")
+    print("=" * 60)
+
+    accounts = _accounts(500)
+    tree = build_state_tree(accounts)
+    assert len(tree) == 500
+
+    rng = random.Random(7)
+    for account in rng.sample(accounts, 50):
+        account.balance += 1
+        tree.update(account_key(account.address), account_value_hash(account))
+    removed = {account.address for account in rng.sample(accounts, 40)}
+    for address in removed:
+        tree.delete(account_key(address))
+    remaining = [account for account in accounts if account.address not in removed]
+
+    shuffled = remaining[:]
+    rng.shuffle(shuffled)
+    assert tree.root() == build_state_tree(shuffled).root()
+    assert len(tree) == 460
+    assert tree.get(account_key("addr-missing")) is None
+
+    empty = SparseMerkleTree()
+    empty.update(b"\x01" * 32, b"\x02" * 32)
+    empty.delete(b"\x01" * 32)
+    assert empty.root() == SparseMerkleTree().root() == "0" * 64
+    print("✓ 50 次更新、40 次删除后的根与重建结果一致")
+    return True
+
+
+def test_account_proofs():
+    """测试成员/非成员证明"""
+    print("\n" + "=" * 60)
+    print("测试 2: 账户证明")
+    print("=" * 60)
+
+    accounts = _accounts(1000)
+    tree = build_state_tree(accounts)
+    root = tree.root()
+
+    account = accounts[123]
+    key, value = account_key(account.address), account_value_hash(account)
+    proof = tree.proof(key)
+    assert SparseMerkleTree.verify_proof(root, key, value, proof)
+    assert len(proof["siblings"]) < 40  # 约 log2(1000) ≈ 10
+    account.balance += 1
+    assert not SparseMerkleTree.verify_proof(root, key, account_value_hash(account), proof)
+
+    missing = account_key("not-an-account")
+    absent = tree.proof(missing)
+    assert SparseMerkleTree.verify_proof(root, missing, None, absent)
+    assert not SparseMerkleTree.verify_proof(root, key, None, tree.proof(key))
+
+    tampered = dict(proof, siblings=list(proof["siblings"]))
+    tampered["siblings"][0] = "ff" * 32
+    assert not SparseMerkleTree.verify_proof(root, key, value, tampered)
+    print(f"✓ 1000 个账户，证明长度 {len(proof['siblings'])}，篡改后校验失败")
+    return True
+
+
+def test_legacy_block_hash():
+    """测试没有状态根的旧区块哈希保持不变"""
+    print("\n" + "=" * 60)
+    print("测试 3: 旧区块哈希兼容")
+    print("=" * 60)
+
+    block = Block(header=BlockHeader(index=1, timestamp=1, previous_hash="0" * 64, merkle_root="ab"), transactions=[])
+    legacy = {"header": {"index": 1, "timestamp": 1, "previous_hash": "0" * 64, "merkle_root": "ab", "nonce": 0},
+              "transactions": []}
+    assert full_block_hash(block) == calculate_hash(json.dumps(legacy, sort_keys=True, separators=(",", ":")))
+    block.header.state_root = "cd"
+    assert full_block_hash(block) != calculate_hash(json.dumps(legacy, sort_keys=True, separators=(",", ":")))
+    print("✓ 旧区块哈希不变，新区块哈希覆盖状态根")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("账户状态树功能测试")
+    print("=" * 60)
+
+    try:
+        test_incremental_root()
+        test_account_proofs()
+        test_legacy_block_hash()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
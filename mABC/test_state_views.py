@@ -0,0 +1,137 @@
+"""
+测试世界状态的物化视图 (core/views.py)
+验证排行分页、增量更新与全量重算结果一致、投票统计
+"""
+import sys
+import os
+import random
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.types import Account
+from core.views import StateViews, voting_weight
+
+
+class _State:
+    """只提供视图所需接口的世界状态"""
+
+    def __init__(self):
+        self.state = {}
+        self._changed = set()
+        self._rebuild = True
+
+    def put(self, account: Account):
+        self.state[account.address] = account
+        self._changed.add(account.address)
+
+    def delete(self, address: str):
+        self.state.pop(address, None)
+        self._changed.add(address)
+
+    def take_view_changes(self):
+        rebuild, changed = self._rebuild, self._changed
+        self._rebuild, self._changed = False, set()
+        return rebuild, changed
+
+
+def _ranking(accounts):
+    ordered = sorted(accounts, key=lambda a: (-a.balance, -a.stake, -a.reputation, a.address))
+    return [a.address for a in ordered]
+
+
+def test_leaderboard_incremental():
+    """测试排行分页与增量更新"""
+    print("=" * 60)
+    print("测试 1: 排行分页与增量更新")
+    print("=" * 60)
+
+    rng = random.Random(7)
+    world = _State()
+    agents = {f"agent{i}" for i in range(20)}
+    for i in range(200):
+        address = f"agent{i}" if i < 20 else f"user{i}"
+        world.put(Account(address=address, balance=rng.randint(0, 5000), stake=rng.randint(0, 3), reputation=80))
+
+    views = StateViews()
+    version = views.refresh(world, agents, block_height=1)
+    board = views.leaderboard(0, 5)
+    assert board["total"] == 20 and board["block_height"] == 1
+    expected = _ranking(a for a in world.state.values() if a.address in agents)
+    assert [row["address"] for row in board["accounts"]] == expected[:5]
+    assert [row["address"] for row in views.leaderboard(5, 5)["accounts"]] == expected[5:10]
+
+    # 没有修改时不更新版本
+    assert views.refresh(world, agents, block_height=1) == version
+
+    # 修改少量账户后增量更新，与全量排序一致
+    for _ in range(3):
+        for address in rng.sample(sorted(world.state), 10):
+            account = world.state[address].model_copy()
+            account.balance = rng.randint(0, 5000)
+            world.put(account)
+        world.delete("user150")
+        assert views.refresh(world, agents, block_height=2) > version
+        expected = _ranking(a for a in world.state.values() if a.address in agents)
+        assert [row["address"] for row in views.leaderboard()["accounts"]] == expected
+
+    assert views.account("user150") is None
+    print("✓ 排行与全量排序一致，读取只取一页")
+    return True
+
+
+def test_proposal_tally():
+    """测试投票统计"""
+    print("\n" + "=" * 60)
+    print("测试 2: 提案投票统计")
+    print("=" * 60)
+
+    world = _State()
+    for i in range(5):
+        world.put(Account(address=f"agent{i}", reputation=60 + i, stake=100 * i))
+    views = StateViews()
+    views.refresh(world, {f"agent{i}" for i in range(5)})
+
+    holder = world.state["agent0"].model_copy(deep=True)
+    holder.root_cause_proposals["p1"] = {"proposer": "agent0", "votes": {"for": 0, "against": 0, "abstain": 0}}
+    world.put(holder)
+    for i, option in ((1, "for"), (2, "against")):
+        voter = world.state[f"agent{i}"].model_copy(deep=True)
+        weight = voting_weight(voter)
+        voter.votes["p1"] = {"proposal_id": "p1", "vote_option": option, "weight": weight}
+        holder.root_cause_proposals["p1"]["votes"][option] += weight
+        world.put(voter)
+    world.put(holder)
+    views.refresh(world, {f"agent{i}" for i in range(5)})
+
+    tally = views.proposal_tally("p1")
+    assert tally["holder_address"] == "agent0" and tally["account_count"] == 5
+    assert tally["votes"]["for"] == voting_weight(world.state["agent1"])
+    assert sorted(v["option"] for v in tally["voters"]) == ["against", "for"]
+    assert abs(tally["total_network_weight"] - sum(voting_weight(a) for a in world.state.values())) < 1e-9
+
+    # 账户被原地修改但尚未同步时，视图保持上一版本
+    holder.root_cause_proposals["p1"]["votes"]["for"] += 100
+    assert views.proposal_tally("p1")["votes"]["for"] == tally["votes"]["for"]
+    assert views.proposal_tally("missing")["holder_address"] is None
+    print("✓ 投票统计与逐账户计算一致")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("物化视图功能测试")
+    print("=" * 60)
+
+    try:
+        test_leaderboard_incremental()
+        test_proposal_tally()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
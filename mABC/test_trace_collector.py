@@ -4,11 +4,13 @@
 """
 import sys
 import os
+import time
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from handle.trace_collect import TraceExplorer
+from handle.topology_store import int_to_minute, minute_to_int
 
 def test_get_endpoint_downstream():
     """测试单个时间点的端点下游依赖查询"""
@@ -86,26 +88,22 @@ def test_get_endpoint_downstream_in_range():
     result = explorer.get_endpoint_downstream_in_range(endpoint, time)
     
     if result:
-        print(f"✓ 查询成功！返回 {len(result)} 个时间点的数据")
-        
-        # 只显示有数据的时间点
-        has_data_count = sum(1 for v in result.values() if v)
-        print(f"  有效数据点: {has_data_count}")
-        
-        print("\n有下游依赖的时间点:")
-        count = 0
-        for time_str, downstream_list in result.items():
-            if downstream_list:
-                print(f"  [{time_str}] → {downstream_list}")
-                count += 1
-                if count >= 5:  # 只显示前5个
-                    break
-        
-        if count == 0:
-            print("  (在查询范围内没有找到下游依赖数据)")
+        print(f"✓ 查询成功！返回 {len(result)} 个去重后的下游端点")
+        for downstream, seen in result.items():
+            print(f"  → {downstream} (首次: {seen['first_seen']}, 末次: {seen['last_seen']})")
+        assert set(result) == {"food-buy", "food-cancel"}
+        assert result["food-buy"] == {"first_seen": "2023-10-15 14:00:00", "last_seen": "2023-10-15 14:01:00"}
+        assert result["food-cancel"]["last_seen"] == "2023-10-15 14:00:00"
     else:
         print("✗ 查询失败：返回空结果")
     
+    # 窗口外无活跃边
+    assert explorer.get_endpoint_downstream_in_range(endpoint, "2023-10-15 13:30:00") == {}
+    
+    edges = explorer.get_active_edges_in_range(time)
+    print(f"  窗口内活跃调用边: {len(edges)}")
+    assert len(edges) == len({(e["parent"], e["child"]) for e in edges})
+    
     return True
 
 def test_dependency_chain():
@@ -174,6 +172,76 @@ def test_nonexistent_endpoint():
     
     return True
 
+def test_upstream_and_call_chain():
+    """测试上游查询与多跳调用链(BFS)"""
+    print("\n" + "=" * 60)
+    print("测试 5: 查询上游依赖与完整调用链")
+    print("=" * 60)
+    
+    explorer = TraceExplorer()
+    
+    # 单参数调用：全时段下游
+    downstream = explorer.get_endpoint_downstream("train-buy")
+    print(f"\n全时段 train-buy 下游: {downstream}")
+    assert "food-buy" in downstream
+    
+    upstream = explorer.get_endpoint_upstream("food-cancel")
+    print(f"全时段 food-cancel 上游: {upstream}")
+    assert set(upstream) == {"train-buy", "train-cancel", "food-buy"}
+    # 虚拟入口不作为上游返回
+    assert explorer.get_endpoint_upstream("train-buy") == []
+    
+    chain = explorer.get_call_chain_for_endpoint("train-buy", "2023-10-15 14:00:00")
+    print(f"train-buy 调用链: {chain}")
+    assert ("food-buy", 1) in chain["downstream"]
+    levels = dict(chain["downstream"])
+    assert all(level >= 1 for level in levels.values())
+    
+    # 深度上限
+    shallow = explorer.traverse("train-buy", "downstream", None, max_depth=1)
+    assert all(level == 1 for _, level in shallow)
+    
+    # 相同 (endpoint, window) 的查询命中缓存
+    again = explorer.get_call_chain_for_endpoint("train-buy", "2023-10-15 14:00:00")
+    assert again["downstream"] is chain["downstream"]
+    
+    # 时间窗口外无调用关系
+    far = explorer.get_call_chain_for_endpoint("train-buy", "2023-10-16 14:00:00")
+    assert far == {"upstream": [], "downstream": []}
+    print("✓ 查询成功！")
+    
+    return True
+
+def test_minute_keys_ignore_timezone():
+    """测试分钟换算与运行环境时区无关（包括夏令时切换的分钟）"""
+    print("\n" + "=" * 60)
+    print("测试 6: 分钟换算与时区无关")
+    print("=" * 60)
+    
+    previous = os.environ.get("TZ")
+    results = []
+    try:
+        for tz in ("UTC", "America/New_York", "Asia/Shanghai"):
+            os.environ["TZ"] = tz
+            time.tzset()
+            # 纽约 2024-03-10 02:30 处于夏令时跳过的区间，本地时间换算会偏移
+            minute = minute_to_int("2024-03-10 02:30:00")
+            assert int_to_minute(minute) == "2024-03-10 02:30:00"
+            downstream = TraceExplorer().get_endpoint_downstream_in_range("train-buy", "2023-10-15 14:00")
+            results.append((minute, downstream))
+    finally:
+        if previous is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = previous
+        time.tzset()
+    
+    assert results[0][0] == 28500630
+    assert all(result == results[0] for result in results)
+    print("✓ 各时区下分钟键与窗口查询结果一致")
+    
+    return True
+
 if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("TraceExplorer 功能测试")
@@ -184,6 +252,8 @@ if __name__ == "__main__":
         test_get_endpoint_downstream_in_range()
         test_dependency_chain()
         test_nonexistent_endpoint()
+        test_upstream_and_call_chain()
+        test_minute_keys_ignore_timezone()
         
         print("\n" + "=" * 60)
         print("✓ 所有测试完成！")
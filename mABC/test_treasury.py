@@ -0,0 +1,68 @@
+"""
+测试系统金库 (core/treasury.py)
+验证密钥文件以 0600 权限保存、重启后金库地址不变，以及公钥注册
+"""
+import sys
+import os
+import stat
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.blockchain import PublicKeyRegistry
+from core.treasury import TREASURY_KEY_FILE, Treasury
+
+
+def test_persistent_treasury():
+    """测试金库密钥的持久化"""
+    print("=" * 60)
+    print("测试 1: 金库密钥持久化")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        key_path = os.path.join(data_dir, "chain", TREASURY_KEY_FILE)
+        treasury = Treasury.load_or_create(key_path)
+        assert os.path.exists(key_path) and not os.path.exists(key_path + ".tmp")
+        assert stat.S_IMODE(os.stat(key_path).st_mode) == 0o600
+
+        # 重启后从密钥文件加载，地址与私钥不变
+        reloaded = Treasury.load_or_create(key_path)
+        assert reloaded.address == treasury.address
+        assert reloaded.private_key.to_string() == treasury.private_key.to_string()
+        public_key = treasury.private_key.get_verifying_key().to_string().hex()
+        assert PublicKeyRegistry.get_public_key(treasury.address) == public_key
+    print(f"✓ 金库地址 {treasury.address[:10]}... 在重启后保持不变")
+    return True
+
+
+def test_ephemeral_treasury():
+    """测试未持久化时的临时金库"""
+    print("\n" + "=" * 60)
+    print("测试 2: 临时金库")
+    print("=" * 60)
+
+    first, second = Treasury.load_or_create(), Treasury.load_or_create()
+    assert first.key_path is None and first.address != second.address
+    assert PublicKeyRegistry.get_public_key(first.address) is not None
+    print("✓ 未指定密钥文件时每次生成新的临时金库")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("系统金库功能测试")
+    print("=" * 60)
+
+    try:
+        test_persistent_treasury()
+        test_ephemeral_treasury()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,137 @@
+"""
+测试交易二级索引 (core/tx_index.py)
+验证按哈希/发送者/类型/提案/目标地址查询与分页、持久化后补齐，以及链被替换时重建
+"""
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.types import Block, BlockHeader, Transaction, calculate_hash, transaction_leaf_hash
+from core.tx_index import TX_INDEX_FILE, TransactionIndex, parse_cursor
+
+
+def _transaction(height: int, i: int, salt: str) -> Transaction:
+    """每个区块依次包含投票、奖励、惩罚与转账交易"""
+    kind = i % 4
+    if kind == 0:
+        tx_type, data = "vote", {"proposal_id": f"p{height % 3}", "vote_option": "for"}
+    elif kind == 1:
+        tx_type, data = "reward", {"target": f"agent{i % 3}", "amount": 300}
+    elif kind == 2:
+        tx_type, data = "penalty", {"target": f"agent{i % 3}", "amount": 50}
+    else:
+        tx_type, data = "transfer", {"to": "agent0", "amount": 1}
+    data["memo"] = f"{salt}{height}-{i}"
+    return Transaction(tx_type=tx_type, sender=f"sender{i % 2}", nonce=height * 100 + i,
+                       gas_price=1, gas_limit=100, data=data, signature=f"sig{i}")
+
+
+def _make_chain(blocks: int, txs_per_block: int, salt: str = ""):
+    chain = []
+    previous_hash = "0" * 64
+    for height in range(blocks):
+        txs = [_transaction(height, i, salt) for i in range(txs_per_block)]
+        block = Block(header=BlockHeader(index=height, timestamp=height, previous_hash=previous_hash, merkle_root=""),
+                      transactions=txs)
+        block.hash = calculate_hash(f"{salt}{height}{previous_hash}")
+        previous_hash = block.hash
+        chain.append(block)
+    return chain
+
+
+def _scan(chain, match):
+    """逐笔扫描的参考实现，按 (高度, 序号) 倒序"""
+    refs = [(block.header.index, position) for block in chain for position, tx in enumerate(block.transactions)
+            if match(tx, block.header.index)]
+    return sorted(refs, reverse=True)
+
+
+def _all_pages(index, **filters):
+    refs, cursor = [], None
+    while True:
+        page = index.query(before=cursor, limit=7, **filters)
+        refs += [(ref["block_index"], ref["tx_index"]) for ref in page["transactions"]]
+        if page["next_cursor"] is None:
+            return refs
+        cursor = parse_cursor(page["next_cursor"])
+
+
+def test_queries_and_pagination():
+    """测试二级索引查询与分页"""
+    print("=" * 60)
+    print("测试 1: 二级索引查询与分页")
+    print("=" * 60)
+
+    chain = _make_chain(12, 8)
+    index = TransactionIndex()
+    for block in chain:
+        assert index.add_block(block)
+    assert not index.add_block(chain[3])  # 不是紧接在链顶之后的区块不写入
+    assert index.height == 12 and len(index) == 96
+
+    target = chain[5].transactions[6]
+    assert index.lookup(transaction_leaf_hash(target)) == (5, 6)
+    assert index.lookup("missing") is None
+
+    assert _all_pages(index, proposal_id="p1") == _scan(chain, lambda tx, h: tx.data.get("proposal_id") == "p1")
+    assert _all_pages(index, tx_type="reward", target="agent1") == _scan(
+        chain, lambda tx, h: tx.tx_type == "reward" and tx.data.get("target") == "agent1")
+    assert _all_pages(index, target="agent0", sender="sender1") == _scan(
+        chain, lambda tx, h: (tx.data.get("target") or tx.data.get("to")) == "agent0" and tx.sender == "sender1")
+    assert _all_pages(index, tx_type=["penalty", "slash"], min_height=9) == _scan(
+        chain, lambda tx, h: tx.tx_type == "penalty" and h >= 9)
+    assert len(_all_pages(index)) == 96
+    print("✓ 各条件的分页结果与逐笔扫描一致")
+    return True
+
+
+def test_persistence_and_rebuild():
+    """测试持久化后补齐与链被替换时重建"""
+    print("\n" + "=" * 60)
+    print("测试 2: 持久化与重建")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        db_path = os.path.join(data_dir, TX_INDEX_FILE)
+        chain = _make_chain(10, 4)
+        index = TransactionIndex(db_path)
+        assert index.sync(chain[:6]) == 6
+        index.close()
+
+        # 重新打开后只补齐新增的区块
+        index = TransactionIndex(db_path)
+        assert index.height == 6
+        assert index.sync(chain) == 4 and index.sync(chain) == 0
+        assert index.lookup(transaction_leaf_hash(chain[8].transactions[1])) == (8, 1)
+
+        # 链被替换（链顶哈希不同）时从头重建，不会返回旧链上的交易
+        new_chain = _make_chain(7, 4, salt="reset-")
+        assert index.sync(new_chain) == 7
+        assert index.lookup(transaction_leaf_hash(chain[8].transactions[1])) is None
+        assert index.lookup(transaction_leaf_hash(new_chain[6].transactions[3])) == (6, 3)
+        assert index.height == 7 and len(index) == 28
+        index.close()
+    print("✓ 重启后只索引新增区块，链被替换时重建")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("交易索引功能测试")
+    print("=" * 60)
+
+    try:
+        test_queries_and_pagination()
+        test_persistence_and_rebuild()
+
+        print("\n" + "=" * 60)
+        print("✓ 所有测试完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 测试过程中出现错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
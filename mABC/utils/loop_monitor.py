@@ -0,0 +1,87 @@
+"""
+事件循环延迟监控
+- 后台任务每隔 interval 秒醒来一次，实际醒来时间比预期晚多少即为事件循环延迟（lag）
+- 同步代码占住事件循环时，所有请求（包括日志推送）都会被拖慢，延迟随之升高
+- 只保留最近 window 个采样，用于计算 p50/p99
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Dict, Optional
+
+DEFAULT_INTERVAL = 0.1   # 采样间隔（秒）
+DEFAULT_WINDOW = 600     # 保留的采样数（默认约 1 分钟）
+
+
+class EventLoopMonitor:
+    """
+    事件循环延迟监控
+
+    Args:
+        interval: 采样间隔（秒）
+        window: 保留的最近采样数
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, window: int = DEFAULT_WINDOW):
+        self.interval = interval
+        self._samples: deque = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """在当前事件循环中启动采样任务（需在事件循环中调用）"""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - expected)
+
+    def record(self, lag: float) -> None:
+        """记录一次采样（秒）"""
+        lag = max(0.0, lag)
+        self._samples.append(lag)
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        延迟统计（毫秒）
+
+        Returns:
+            dict: running、interval_ms、samples、current_ms、p50_ms、p99_ms、window_max_ms、max_ms
+        """
+        ordered = sorted(self._samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "samples": len(ordered),
+            "current_ms": round(self.last_lag * 1000, 3),
+            "p50_ms": round(percentile(0.5) * 1000, 3),
+            "p99_ms": round(percentile(0.99) * 1000, 3),
+            "window_max_ms": round((ordered[-1] if ordered else 0.0) * 1000, 3),
+            "max_ms": round(self.max_lag * 1000, 3),
+        }
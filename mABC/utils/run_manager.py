@@ -0,0 +1,123 @@
+"""
+诊断运行队列
+- 每次运行分配 run_id，按提交顺序排队，同时执行的运行数不超过 max_concurrency
+- 运行在 core.event_bus.run_in_channel 中执行，其间发布的事件归入该运行的通道
+- 记录运行状态（queued → running → succeeded / failed）、结果与耗时，只保留最近 max_history 次
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from core.event_bus import run_in_channel
+
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_MAX_HISTORY = 100
+
+RUN_QUEUED = "queued"
+RUN_RUNNING = "running"
+RUN_SUCCEEDED = "succeeded"
+RUN_FAILED = "failed"
+
+
+class RunRecord:
+    """一次运行的状态"""
+
+    def __init__(self, run_id: str, metadata: Dict[str, Any]):
+        self.run_id = run_id
+        self.metadata = metadata
+        self.status = RUN_QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        info = {
+            "run_id": self.run_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None,
+            **self.metadata,
+        }
+        if include_result:
+            info["result"] = self.result
+            info["error"] = self.error
+        return info
+
+
+class RunManager:
+    """
+    带并发上限的运行队列
+
+    Args:
+        max_concurrency: 同时执行的运行数上限
+        max_history: 保留的运行记录数，超出时丢弃最早的已结束运行
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, max_history: int = DEFAULT_MAX_HISTORY):
+        self.max_concurrency = max_concurrency
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="run")
+        self._lock = threading.Lock()
+        self._runs: "OrderedDict[str, RunRecord]" = OrderedDict()
+
+    def submit(self, fn: Callable[..., Any], *args, run_id: Optional[str] = None,
+               metadata: Optional[Dict[str, Any]] = None, **kwargs) -> RunRecord:
+        """
+        提交运行，立即返回其记录；fn 的返回值为运行结果，抛出的异常记为失败原因
+        """
+        record = RunRecord(run_id or uuid.uuid4().hex, metadata or {})
+        with self._lock:
+            self._runs[record.run_id] = record
+            self._trim()
+        record.future = self._executor.submit(self._execute, record, fn, args, kwargs)
+        return record
+
+    def _execute(self, record: RunRecord, fn: Callable[..., Any], args, kwargs) -> Any:
+        record.status = RUN_RUNNING
+        record.started_at = time.time()
+        try:
+            record.result = run_in_channel(record.run_id, fn, *args, **kwargs)
+            record.status = RUN_SUCCEEDED
+            return record.result
+        except Exception as e:
+            record.error = str(e)
+            record.status = RUN_FAILED
+            print(f"❌ Run {record.run_id} failed: {e}")
+            raise
+        finally:
+            record.finished_at = time.time()
+            with self._lock:
+                self._trim()
+
+    def _trim(self) -> None:
+        finished = [run_id for run_id, record in self._runs.items() if record.status in (RUN_SUCCEEDED, RUN_FAILED)]
+        excess = len(self._runs) - self.max_history
+        for run_id in finished[:max(0, excess)]:
+            del self._runs[run_id]
+
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def list(self) -> List[RunRecord]:
+        """全部运行记录（按提交顺序）"""
+        with self._lock:
+            return list(self._runs.values())
+
+    def queue_position(self, run_id: str) -> Optional[int]:
+        """排队中的运行前面还有多少个排队的运行，不在排队时返回 None"""
+        with self._lock:
+            queued = [rid for rid, record in self._runs.items() if record.status == RUN_QUEUED]
+        return queued.index(run_id) if run_id in queued else None
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)